@@ -0,0 +1,255 @@
+"""
+多账号Cookie池
+功能：一次加载多个cookie文件（每个文件对应一个账号的请求头），按轮询或最久未使用的顺序分配请求，
+     记录每个账号的请求数和失败数，并隔离出现登录跳转或连续返回空数据的账号
+"""
+import glob
+import json
+import os
+import threading
+import time
+
+
+class Account:
+    """
+    单个账号的请求头及使用情况
+    """
+
+    def __init__(self, name, headers):
+        """
+        Args:
+            name: 账号名称（一般为cookie文件名）
+            headers: requests使用的请求头，至少包含Cookie
+        """
+        self.name = name
+        self.headers = headers
+        self.request_count = 0
+        self.failure_count = 0
+        self.empty_count = 0
+        self.consecutive_failures = 0
+        self.consecutive_empty = 0
+        self.last_used = 0.0
+        self.quarantined_until = 0.0
+        self.quarantine_reason = ''
+
+    def is_available(self, now=None):
+        """
+        账号当前是否可用（未被隔离）
+        """
+        now = time.time() if now is None else now
+        return now >= self.quarantined_until
+
+    def __repr__(self):
+        return f"Account({self.name}, 请求={self.request_count}, 失败={self.failure_count})"
+
+
+class AccountPool:
+    """
+    线程安全的账号池，每个请求前调用 acquire 取得账号，请求结束后调用 report_* 反馈结果
+    """
+
+    STRATEGIES = ('round_robin', 'lru')
+
+    def __init__(self, cookie_files, strategy='round_robin', min_interval=0.0, max_requests=None,
+                 max_failures=3, max_empty=3, quarantine_seconds=1800):
+        """
+        Args:
+            cookie_files: cookie文件路径列表，每个文件是一个请求头JSON，格式参考weibo_cookie_sample.json
+            strategy: 分配策略，'round_robin' 轮询，'lru' 优先使用最久未使用的账号
+            min_interval: 同一账号两次请求之间的最小间隔（秒）
+            max_requests: 单个账号允许的最大请求数，超过后不再分配，None表示不限制
+            max_failures: 连续失败多少次后隔离账号
+            max_empty: 连续返回空数据多少次后隔离账号
+            quarantine_seconds: 隔离时长（秒）
+        """
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"未知的分配策略: {strategy}")
+
+        self.accounts = []
+        for file_path in cookie_files:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                headers = json.load(f)
+            self.accounts.append(Account(os.path.basename(file_path), headers))
+        if not self.accounts:
+            raise ValueError("账号池为空，请至少提供一个cookie文件")
+
+        self.strategy = strategy
+        self.min_interval = min_interval
+        self.max_requests = max_requests
+        self.max_failures = max_failures
+        self.max_empty = max_empty
+        self.quarantine_seconds = quarantine_seconds
+        self._next_index = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_glob(cls, pattern, **kwargs):
+        """
+        根据通配符加载所有匹配的cookie文件，例如 'weibo/weibo_cookie*.json'
+
+        Args:
+            pattern: 文件通配符
+            **kwargs: 传给构造函数的其它参数
+
+        Returns:
+            AccountPool
+        """
+        files = sorted(glob.glob(pattern))
+        if not files:
+            raise FileNotFoundError(f"没有找到匹配 {pattern} 的cookie文件")
+        print(f"账号池加载了 {len(files)} 个账号: {', '.join(os.path.basename(f) for f in files)}")
+        return cls(files, **kwargs)
+
+    def __len__(self):
+        return len(self.accounts)
+
+    def _candidates(self, now):
+        """
+        当前可以分配的账号（未隔离、未超出请求上限）
+        """
+        return [account for account in self.accounts
+                if account.is_available(now)
+                and (self.max_requests is None or account.request_count < self.max_requests)]
+
+    def _pick(self, candidates):
+        if self.strategy == 'lru':
+            return min(candidates, key=lambda account: account.last_used)
+
+        # 轮询：从上次的位置往后找第一个可用账号
+        for _ in range(len(self.accounts)):
+            account = self.accounts[self._next_index]
+            self._next_index = (self._next_index + 1) % len(self.accounts)
+            if account in candidates:
+                return account
+        return candidates[0]
+
+    def acquire(self, timeout=None):
+        """
+        取得一个账号，必要时等待该账号的最小请求间隔
+
+        Args:
+            timeout: 所有账号都被隔离时最多等待的秒数，None表示一直等到有账号解除隔离
+
+        Returns:
+            Account
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            with self._lock:
+                now = time.time()
+                candidates = self._candidates(now)
+                if candidates:
+                    account = self._pick(candidates)
+                    wait = account.last_used + self.min_interval - now
+                    # 先占用这个账号的时间片，其它线程会自动分到别的账号
+                    account.last_used = max(now, account.last_used + self.min_interval)
+                    account.request_count += 1
+                    break
+                # 超出请求上限的账号不会再恢复，只等待被隔离的账号
+                waiting = [account.quarantined_until for account in self.accounts
+                           if self.max_requests is None or account.request_count < self.max_requests]
+                if not waiting:
+                    raise RuntimeError("账号池中没有可用账号（全部超出请求上限）")
+                next_ready = min(waiting)
+
+            if deadline is not None and now >= deadline:
+                raise RuntimeError("账号池中没有可用账号（全部被隔离）")
+            wait_until = next_ready if deadline is None else min(next_ready, deadline)
+            print(f"所有账号都在隔离中，等待 {wait_until - now:.0f} 秒后继续")
+            time.sleep(max(0.0, wait_until - now))
+
+        if wait > 0:
+            time.sleep(wait)
+        return account
+
+    def report_success(self, account, empty=False):
+        """
+        反馈一次成功的请求
+
+        Args:
+            account: 本次使用的账号
+            empty: 返回的数据是否为空
+        """
+        with self._lock:
+            account.consecutive_failures = 0
+            if not empty:
+                account.consecutive_empty = 0
+                return
+            account.empty_count += 1
+            account.consecutive_empty += 1
+            if account.consecutive_empty >= self.max_empty:
+                self._quarantine(account, f"连续 {account.consecutive_empty} 次返回空数据")
+
+    def report_failure(self, account, reason='', login_required=False):
+        """
+        反馈一次失败的请求，出现登录跳转时立即隔离
+
+        Args:
+            account: 本次使用的账号
+            reason: 失败原因
+            login_required: 是否跳转到了登录页（cookie失效）
+        """
+        with self._lock:
+            account.failure_count += 1
+            account.consecutive_failures += 1
+            if login_required:
+                self._quarantine(account, reason or "需要重新登录")
+            elif account.consecutive_failures >= self.max_failures:
+                self._quarantine(account, f"连续失败 {account.consecutive_failures} 次: {reason}")
+
+    def quarantine(self, account, reason=''):
+        """
+        手动隔离账号
+        """
+        with self._lock:
+            self._quarantine(account, reason)
+
+    def _quarantine(self, account, reason):
+        account.quarantined_until = time.time() + self.quarantine_seconds
+        account.quarantine_reason = reason
+        account.consecutive_failures = 0
+        account.consecutive_empty = 0
+        print(f"账号 {account.name} 已隔离 {self.quarantine_seconds / 60:.0f} 分钟，原因: {reason}")
+
+    def pause(self, seconds):
+        """
+        按可用账号数缩短原本为单个账号设置的等待时间，账号越多等待越短
+
+        Args:
+            seconds: 单账号时的等待时间（秒）
+
+        Returns:
+            实际等待的秒数
+        """
+        with self._lock:
+            available = max(1, len(self._candidates(time.time())))
+        wait = seconds / available
+        time.sleep(wait)
+        return wait
+
+    def stats(self):
+        """
+        各账号的使用情况
+
+        Returns:
+            字典列表
+        """
+        now = time.time()
+        with self._lock:
+            return [{
+                'name': account.name,
+                'requests': account.request_count,
+                'failures': account.failure_count,
+                'empty': account.empty_count,
+                'available': account.is_available(now),
+                'quarantine_reason': account.quarantine_reason,
+            } for account in self.accounts]
+
+    def print_stats(self):
+        """
+        打印各账号的使用情况
+        """
+        for item in self.stats():
+            status = '可用' if item['available'] else f"隔离中（{item['quarantine_reason']}）"
+            print(f"{item['name']}: 请求 {item['requests']} 次，失败 {item['failures']} 次，"
+                  f"空数据 {item['empty']} 次，{status}")
@@ -0,0 +1,207 @@
+"""
+带缓冲的CSV写入器
+功能：每个输出文件只打开一次，行先放在内存缓冲区里，攒够一定行数或超过一定时间才一次性写入磁盘，
+     表头只在文件为空时写入且与第一批数据一起落盘；程序退出或按下Ctrl+C时自动写出缓冲区，
+     崩溃时最多丢失一个缓冲区的数据；可以同时维护统计索引（行数、不同ID数、时间范围、行的字节位置）
+"""
+import atexit
+import codecs
+import csv
+import io
+import os
+import signal
+import threading
+import time
+import weakref
+
+from common.stats_index import get_stats
+
+# 当前打开的所有写入器，退出或Ctrl+C时统一写出
+_open_writers = weakref.WeakSet()
+_sigint_installed = False
+
+
+class BufferedCsvWriter:
+    """
+    线程安全的缓冲CSV写入器，writerow 的用法与 csv.writer / csv.DictWriter 相同
+    """
+
+    def __init__(self, file_path, fieldnames=None, append=True, encoding='utf-8', max_rows=500,
+                 max_seconds=5.0, stats_columns=None, timestamp_column=None):
+        """
+        Args:
+            file_path: 输出文件路径，所在目录不存在时自动创建
+            fieldnames: 表头，文件为空时写入；传入后 writerow 也可以接受字典
+            append: 是否追加到已有文件，False时清空重写
+            encoding: 文件编码，'utf-8-sig' 时只在新文件开头写BOM
+            max_rows: 缓冲多少行后写入磁盘
+            max_seconds: 距上次写入超过多少秒后写入磁盘
+            stats_columns: 需要在统计索引中统计不同值个数的列，和 timestamp_column 都为None时不维护统计索引
+            timestamp_column: 统计时间范围的列
+        """
+        self.file_path = file_path
+        self.fieldnames = list(fieldnames) if fieldnames else None
+        self.max_rows = max_rows
+        self.max_seconds = max_seconds
+        self.rows_written = 0
+
+        output_dir = os.path.dirname(file_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        self._file = open(file_path, 'ab' if append else 'wb')
+        is_empty = os.fstat(self._file.fileno()).st_size == 0
+
+        # BOM由这里控制，编码时统一用不带BOM的编码
+        self._bom = b''
+        if codecs.lookup(encoding).name == 'utf-8-sig':
+            encoding = 'utf-8'
+            self._bom = codecs.BOM_UTF8 if is_empty else b''
+        self.encoding = encoding
+
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+        self._dict_writer = csv.DictWriter(self._buffer, self.fieldnames) if self.fieldnames else None
+        self._pending = 0
+        self._last_flush = time.time()
+        self._lock = threading.Lock()
+        self.closed = False
+
+        if is_empty and self.fieldnames:
+            # 表头只进缓冲区，和第一批数据一起写入，不会出现只有表头的半截文件
+            self._writer.writerow(self.fieldnames)
+
+        # 统计索引：已有的内容由 get_stats 补齐，之后每次写入磁盘时随缓冲区一起更新
+        self.stats = None
+        if stats_columns or timestamp_column:
+            self.stats = get_stats(file_path, stats_columns or (), timestamp_column)
+            self._stats_fields = [c for c in self.stats.id_columns + [self.stats.timestamp_column]
+                                  if c in (self.fieldnames or ())]
+            self._stats_values = {column: [] for column in self._stats_fields}
+            self._row_starts = []
+
+        _open_writers.add(self)
+        _install_sigint_handler()
+
+    def writerow(self, row):
+        """
+        写入一行（列表或字典）
+        """
+        with self._lock:
+            if self.closed:
+                raise ValueError(f"{self.file_path} 已关闭")
+            if self.stats is not None:
+                self._track_row(row)
+            if isinstance(row, dict):
+                self._dict_writer.writerow(row)
+            else:
+                self._writer.writerow(row)
+            self._pending += 1
+            if self._pending >= self.max_rows or time.time() - self._last_flush >= self.max_seconds:
+                self._flush()
+
+    def _track_row(self, row):
+        # 记录这一行在缓冲区中的开始位置和需要统计的列
+        self._row_starts.append(self._buffer.tell())
+        for column, values in self._stats_values.items():
+            values.append(row.get(column) if isinstance(row, dict) else row[self.fieldnames.index(column)])
+
+    def writerows(self, rows):
+        """
+        写入多行
+        """
+        for row in rows:
+            self.writerow(row)
+
+    def flush(self):
+        """
+        把缓冲区写入磁盘
+        """
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        data = self._buffer.getvalue()
+        if data and not self._file.closed:
+            encoded = data.encode(self.encoding)
+            base = os.fstat(self._file.fileno()).st_size + len(self._bom)
+            self._file.write(self._bom + encoded)
+            self._file.flush()
+            if self.stats is not None:
+                self._update_stats(data, base, base + len(encoded))
+            self._bom = b''
+            self.rows_written += self._pending
+            self._buffer.seek(0)
+            self._buffer.truncate()
+            self._pending = 0
+        self._last_flush = time.time()
+
+    def _update_stats(self, data, base, size):
+        # 只对需要记录字节位置的行计算编码后的长度
+        for i, start in enumerate(self._row_starts):
+            row = self.stats.rows + i
+            if row % self.stats.every == 0:
+                self.stats.add_offset(row, base + len(data[:start].encode(self.encoding)))
+        self.stats.add_rows(self._stats_values, len(self._row_starts))
+        self.stats.size = size
+        self.stats.save()
+        self._row_starts = []
+        self._stats_values = {column: [] for column in self._stats_fields}
+
+    def close(self):
+        """
+        写出缓冲区并关闭文件，可以重复调用
+        """
+        with self._lock:
+            if self.closed:
+                return
+            self._flush()
+            self._file.close()
+            self.closed = True
+        _open_writers.discard(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __repr__(self):
+        return f"BufferedCsvWriter({self.file_path}, 已写入={self.rows_written}, 缓冲={self._pending})"
+
+
+def flush_all():
+    """
+    写出所有打开的写入器的缓冲区
+    """
+    for writer in list(_open_writers):
+        # 正在写入的写入器跳过，由它自己的 close 负责，避免在信号处理中死锁
+        if writer._lock.acquire(blocking=False):
+            try:
+                writer._flush()
+            finally:
+                writer._lock.release()
+
+
+def _install_sigint_handler():
+    """
+    Ctrl+C时先写出缓冲区，再交给原来的处理函数（默认抛出KeyboardInterrupt）
+    """
+    global _sigint_installed
+    if _sigint_installed or threading.current_thread() is not threading.main_thread():
+        return
+    previous = signal.getsignal(signal.SIGINT)
+
+    def handler(signum, frame):
+        flush_all()
+        if previous == signal.SIG_IGN:
+            return
+        if callable(previous):
+            previous(signum, frame)
+        else:
+            raise KeyboardInterrupt
+
+    signal.signal(signal.SIGINT, handler)
+    _sigint_installed = True
+
+
+atexit.register(flush_all)
@@ -0,0 +1,63 @@
+"""
+评论数变化探测
+功能：爬评论之前先并发拉取一批帖子当前的评论数，与高水位记录里上次的评论数比较，
+     只把评论数增长了的帖子按增长量放进爬取队列，没有变化的帖子直接跳过
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from common.scheduler import PriorityScheduler
+
+
+def probe_comment_counts(items, fetch_count, max_workers=8):
+    """
+    并发获取每个帖子当前的评论数
+
+    :param items: 帖子列表（一般为URL）
+    :param fetch_count: 函数，输入一个帖子，返回当前评论数
+    :param max_workers: 并发线程数
+    :return: 与items顺序一致的评论数列表，获取失败的为None
+    """
+    def safe_fetch(item):
+        try:
+            return fetch_count(item)
+        except Exception as e:
+            print(f"获取 {item} 的评论数失败: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(safe_fetch, items))
+
+
+def probe_changed_posts(items, key_func, fetch_count, store, max_workers=8):
+    """
+    探测评论数有增长的帖子，直接生成评论爬虫使用的优先队列
+
+    :param items: 帖子列表（一般为URL）
+    :param key_func: 函数，输入一个帖子，返回高水位记录中的键（如微博mid）
+    :param fetch_count: 函数，输入一个帖子，返回当前评论数
+    :param store: WatermarkStore
+    :param max_workers: 并发线程数
+    :return: PriorityScheduler，元素为 (帖子, 当前评论数)，分数为评论数增量；
+             从没爬过的帖子增量按全部评论数计算，探测失败的帖子以0分排在最后
+    """
+    counts = probe_comment_counts(items, fetch_count, max_workers=max_workers)
+    scheduler = PriorityScheduler()
+    unchanged = failed = 0
+
+    for item, count in zip(items, counts):
+        if count is None:
+            failed += 1
+            scheduler.push((item, None), 0)
+            continue
+        mark = store.get(key_func(item))
+        last_count = mark.get('comments_count') if mark else None
+        if last_count is None:
+            scheduler.push((item, count), count)
+        elif count > last_count:
+            scheduler.push((item, count), count - last_count)
+        else:
+            unchanged += 1
+
+    print(f"探测了 {len(items)} 个帖子：{len(scheduler) - failed} 个有新评论，"
+          f"{unchanged} 个没有变化，{failed} 个探测失败")
+    return scheduler
@@ -0,0 +1,154 @@
+"""
+CSV文件的字节级操作
+功能：追加、截取CSV时不解析每个字段，只在字节层面找记录边界（正确处理引号内的换行），
+     再用大块拷贝或 os.truncate 完成，速度接近磁盘读写速度
+"""
+import codecs
+import csv
+import os
+import shutil
+
+# 每次读取/拷贝的块大小
+BLOCK_SIZE = 8 * 1024 * 1024
+
+
+def find_record_end(f, count, start=0, block_size=BLOCK_SIZE):
+    """
+    从 start 开始往后数 count 条记录，返回第 count 条记录结束（换行符之后）的字节位置。
+    引号内的换行不算记录边界，转义的双引号 "" 相当于先闭合再打开，不影响判断。
+
+    :param f: 以二进制模式打开的文件
+    :param count: 记录条数
+    :param start: 开始的字节位置，必须是某条记录的开头
+    :param block_size: 每次读取的字节数
+    :return: 字节位置；文件不足 count 条记录时返回None
+    """
+    if count <= 0:
+        return start
+    f.seek(start)
+    base = start
+    found = 0
+    in_quote = False
+    while True:
+        block = f.read(block_size)
+        if not block:
+            return None
+        pos = 0
+        end = len(block)
+        while pos < end:
+            if in_quote:
+                quote = block.find(b'"', pos)
+                if quote == -1:
+                    break
+                in_quote = False
+                pos = quote + 1
+                continue
+            quote = block.find(b'"', pos)
+            segment_end = end if quote == -1 else quote
+            # 引号之前的一段没有引号，整段数换行符即可
+            newlines = block.count(b'\n', pos, segment_end)
+            if found + newlines < count:
+                found += newlines
+                if quote == -1:
+                    break
+                in_quote = True
+                pos = quote + 1
+                continue
+            while True:
+                newline = block.find(b'\n', pos, segment_end)
+                found += 1
+                if found == count:
+                    return base + newline + 1
+                pos = newline + 1
+        base += end
+
+
+def read_header(file_path):
+    """
+    读取CSV文件的表头
+
+    :param file_path: 文件路径
+    :return: (表头字段列表, 数据开始的字节位置)，空文件返回 ([], 0)
+    """
+    with open(file_path, 'rb') as f:
+        data_start = find_record_end(f, 1)
+        f.seek(0)
+        raw = f.read(data_start) if data_start is not None else f.read()
+    if not raw:
+        return [], 0
+    if raw.startswith(codecs.BOM_UTF8):
+        raw = raw[len(codecs.BOM_UTF8):]
+    text = raw.decode('utf-8', errors='replace')
+    fields = next(csv.reader([text]), [])
+    return fields, data_start if data_start is not None else os.path.getsize(file_path)
+
+
+def copy_bytes(src, dst, offset):
+    """
+    把 src 从 offset 开始的内容拷贝到 dst 的当前位置，支持时用 os.sendfile 在内核中完成拷贝
+
+    :param src: 以二进制模式打开的源文件
+    :param dst: 以二进制模式打开的目标文件
+    :param offset: 源文件的起始字节位置
+    """
+    size = os.fstat(src.fileno()).st_size
+    if hasattr(os, 'sendfile'):
+        dst.flush()
+        try:
+            while offset < size:
+                sent = os.sendfile(dst.fileno(), src.fileno(), offset, min(size - offset, 1 << 30))
+                if sent == 0:
+                    break
+                offset += sent
+            return
+        except OSError:
+            # 部分文件系统不支持sendfile，从当前进度改用普通拷贝
+            pass
+    src.seek(offset)
+    shutil.copyfileobj(src, dst, BLOCK_SIZE)
+
+
+def append_csv_bytes(source_file, target_file):
+    """
+    把 source_file 的数据行按字节追加到 target_file 末尾，两个文件的表头必须一致；
+    目标文件不存在或为空时连同表头整个拷贝
+
+    :param source_file: 源文件
+    :param target_file: 目标文件
+    :return: 追加的字节数
+    """
+    source_header, data_start = read_header(source_file)
+    target_empty = not os.path.exists(target_file) or os.path.getsize(target_file) == 0
+    if not target_empty:
+        target_header, _ = read_header(target_file)
+        if target_header != source_header:
+            raise ValueError(f"表头不一致：{source_header} 与 {target_header}")
+        offset = data_start
+    else:
+        offset = 0
+
+    with open(source_file, 'rb') as src, open(target_file, 'ab+') as dst:
+        # 目标文件最后一行没有换行符时先补上，避免两条记录粘在一起
+        if not target_empty:
+            dst.seek(-1, os.SEEK_END)
+            if dst.read(1) != b'\n':
+                dst.write(b'\n')
+        dst.seek(0, os.SEEK_END)
+        copy_bytes(src, dst, offset)
+    return os.path.getsize(source_file) - offset
+
+
+def truncate_csv_bytes(file_path, n):
+    """
+    只保留CSV文件的表头和前 n 条数据，直接截断文件
+
+    :param file_path: 文件路径
+    :param n: 保留的数据条数
+    :return: 截断后的字节数；文件不足 n 条数据时不修改并返回None
+    """
+    with open(file_path, 'rb') as f:
+        end = find_record_end(f, n + 1)
+        if end is None or end >= os.fstat(f.fileno()).st_size:
+            return None
+    os.truncate(file_path, end)
+    return end
@@ -0,0 +1,364 @@
+"""
+URL去重队列（frontier）
+功能：先把URL规范化（去掉 refer_flag、xsec_token 等跟踪参数，统一域名和路径），
+     再用可扩展布隆过滤器做快速判断，布隆过滤器判断"可能见过"时才查询SQLite中的精确记录。
+     内存只随布隆过滤器线性增长（1%误判率下约每条1.2字节），几千万条URL也不会撑爆内存
+"""
+import hashlib
+import math
+import os
+import sqlite3
+import struct
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# 这些站点的帖子ID都在路径里，查询参数全部是来源/跟踪信息
+PATH_ID_HOSTS = ('weibo.com', 'www.zhihu.com', 'zhuanlan.zhihu.com', 'www.xiaohongshu.com', 'www.douyin.com')
+# 其它站点去掉这些跟踪参数
+TRACKING_PARAMS = {'refer_flag', 'xsec_token', 'xsec_source', 'source', 'from', 'share_token', 'scene',
+                   'chksm', 'utm_source', 'utm_medium', 'utm_campaign', 'utm_content', 'utm_term', 'spm'}
+# 域名别名
+HOST_ALIASES = {
+    'www.weibo.com': 'weibo.com',
+    'zhihu.com': 'www.zhihu.com',
+    'xiaohongshu.com': 'www.xiaohongshu.com',
+    'douyin.com': 'www.douyin.com',
+}
+
+
+def normalize_url(url):
+    """
+    规范化URL，作为去重的键（只用于判断是否重复，保存和请求时仍使用原始URL，
+    例如小红书的xsec_token在请求时是必需的）
+
+    :param url: 原始URL，例如 https://www.weibo.com/7455753652/Pralx8mbj?refer_flag=1001030103_
+    :return: 规范化后的URL，例如 https://weibo.com/7455753652/Pralx8mbj
+    """
+    url = url.strip()
+    if url.startswith('//'):
+        url = 'https:' + url
+    elif '://' not in url:
+        url = 'https://' + url
+
+    parts = urlsplit(url)
+    host = parts.hostname or ''
+    host = HOST_ALIASES.get(host, host)
+    path = parts.path.rstrip('/') or '/'
+
+    if host == 'www.xiaohongshu.com':
+        # 搜索结果页、发现页和explore页指向同一篇笔记
+        for prefix in ('/search_result/', '/discovery/item/'):
+            if path.startswith(prefix):
+                path = '/explore/' + path[len(prefix):]
+                break
+
+    if host in PATH_ID_HOSTS:
+        query = ''
+    else:
+        params = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                  if k not in TRACKING_PARAMS and not k.startswith('utm_')]
+        query = urlencode(sorted(params))
+
+    return urlunsplit(('https', host, path, query, ''))
+
+
+def _hash_pair(key):
+    """
+    计算双重哈希用的两个64位哈希值，所有分片共用，每个键只做一次摘要
+    """
+    h1, h2 = struct.unpack('<QQ', hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest())
+    return h1, h2 | 1
+
+
+class BloomFilter:
+    """
+    固定容量的布隆过滤器，使用blake2b摘要做双重哈希
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        """
+        Args:
+            capacity: 预计容纳的元素数量
+            error_rate: 在容量以内时的误判率
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def contains_hash(self, h1, h2):
+        bits, num_bits = self.bits, self.num_bits
+        for i in range(self.num_hashes):
+            pos = (h1 + i * h2) % num_bits
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def add_hash(self, h1, h2):
+        bits, num_bits = self.bits, self.num_bits
+        for i in range(self.num_hashes):
+            pos = (h1 + i * h2) % num_bits
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return self.contains_hash(*_hash_pair(key))
+
+    def is_full(self):
+        return self.count >= self.capacity
+
+
+class ScalableBloomFilter:
+    """
+    可扩展布隆过滤器：当前分片满了就新建一个容量翻倍、误判率减半的分片，总误判率保持在error_rate以内
+    """
+
+    FILE_MAGIC = b'SBF1'
+    HEADER = '<QdddIQ'
+
+    def __init__(self, initial_capacity=100000, error_rate=0.01, growth=2, tightening=0.5):
+        """
+        Args:
+            initial_capacity: 第一个分片的容量
+            error_rate: 总误判率上限
+            growth: 每个新分片的容量倍数
+            tightening: 每个新分片的误判率倍数
+        """
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.growth = growth
+        self.tightening = tightening
+        self.filters = []
+        # 保存时对应的精确记录条数，用来判断文件是否过期
+        self.synced_count = 0
+
+    def _new_filter(self):
+        n = len(self.filters)
+        capacity = self.initial_capacity * (self.growth ** n)
+        error = self.error_rate * (1 - self.tightening) * (self.tightening ** n)
+        self.filters.append(BloomFilter(capacity, error))
+
+    def contains_hash(self, h1, h2):
+        return any(f.contains_hash(h1, h2) for f in self.filters)
+
+    def add_hash(self, h1, h2):
+        """
+        把元素加入最新的分片（调用方已确认元素不存在）
+        """
+        if not self.filters or self.filters[-1].is_full():
+            self._new_filter()
+        self.filters[-1].add_hash(h1, h2)
+
+    def __contains__(self, key):
+        return self.contains_hash(*_hash_pair(key))
+
+    def __len__(self):
+        return sum(f.count for f in self.filters)
+
+    def add(self, key):
+        """
+        添加元素
+
+        Returns:
+            bool: 元素之前是否不存在（可能因误判返回False）
+        """
+        h1, h2 = _hash_pair(key)
+        if self.contains_hash(h1, h2):
+            return False
+        self.add_hash(h1, h2)
+        return True
+
+    def nbytes(self):
+        return sum(len(f.bits) for f in self.filters)
+
+    def save(self, file_path):
+        """
+        保存到文件
+        """
+        tmp_path = file_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(self.FILE_MAGIC)
+            f.write(struct.pack(self.HEADER, self.initial_capacity, self.error_rate,
+                                self.growth, self.tightening, len(self.filters), self.synced_count))
+            for bf in self.filters:
+                f.write(struct.pack('<QdQIQ', bf.capacity, bf.error_rate, bf.num_bits, bf.num_hashes, bf.count))
+                f.write(bf.bits)
+        os.replace(tmp_path, file_path)
+
+    @classmethod
+    def load(cls, file_path):
+        """
+        从文件加载
+
+        Returns:
+            ScalableBloomFilter
+        """
+        with open(file_path, 'rb') as f:
+            if f.read(4) != cls.FILE_MAGIC:
+                raise ValueError(f"{file_path} 不是布隆过滤器文件")
+            initial_capacity, error_rate, growth, tightening, n, synced_count = \
+                struct.unpack(cls.HEADER, f.read(struct.calcsize(cls.HEADER)))
+            sbf = cls(initial_capacity, error_rate, growth, tightening)
+            sbf.synced_count = synced_count
+            for _ in range(n):
+                capacity, error, num_bits, num_hashes, count = struct.unpack('<QdQIQ', f.read(struct.calcsize('<QdQIQ')))
+                bf = BloomFilter.__new__(BloomFilter)
+                bf.capacity, bf.error_rate, bf.num_bits, bf.num_hashes, bf.count = capacity, error, num_bits, num_hashes, count
+                bf.bits = bytearray(f.read((num_bits + 7) // 8))
+                sbf.filters.append(bf)
+        return sbf
+
+
+class UrlFrontier:
+    """
+    持久化的URL去重集合：布隆过滤器在内存中做快速判断，SQLite保存精确的键
+    """
+
+    def __init__(self, db_path=None, initial_capacity=100000, error_rate=0.01):
+        """
+        Args:
+            db_path: SQLite文件路径，None表示只在内存中去重（不持久化）
+            initial_capacity: 布隆过滤器第一个分片的容量
+            error_rate: 布隆过滤器误判率
+        """
+        self.db_path = db_path
+        self.bloom_path = db_path + '.bloom' if db_path else None
+        if db_path and os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+        self.conn = sqlite3.connect(db_path or ':memory:', check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS seen (key TEXT PRIMARY KEY, url TEXT, added_at INTEGER)")
+        self._lock = threading.Lock()
+
+        count = len(self)
+        if self.bloom_path and os.path.exists(self.bloom_path):
+            self.bloom = ScalableBloomFilter.load(self.bloom_path)
+            if self.bloom.synced_count != count:
+                # 上次没有正常关闭，布隆过滤器比数据库旧，重建
+                self._rebuild_bloom(initial_capacity, error_rate)
+        else:
+            self.bloom = ScalableBloomFilter(initial_capacity, error_rate)
+            if count:
+                self._rebuild_bloom(initial_capacity, error_rate)
+
+    def _rebuild_bloom(self, initial_capacity, error_rate):
+        self.bloom = ScalableBloomFilter(initial_capacity, error_rate)
+        for (key,) in self.conn.execute("SELECT key FROM seen"):
+            self.bloom.add(key)
+        print(f"已根据 {self.db_path} 重建布隆过滤器，共 {len(self.bloom)} 条")
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+
+    def __contains__(self, url):
+        key = normalize_url(url)
+        if key not in self.bloom:
+            return False
+        return self.conn.execute("SELECT 1 FROM seen WHERE key = ?", (key,)).fetchone() is not None
+
+    def _add_key(self, key, url, now):
+        # 布隆过滤器说没见过就一定没见过，只有"可能见过"时才查库确认
+        h1, h2 = _hash_pair(key)
+        maybe_seen = self.bloom.contains_hash(h1, h2)
+        if maybe_seen and self.conn.execute("SELECT 1 FROM seen WHERE key = ?", (key,)).fetchone() is not None:
+            return False
+        self.conn.execute("INSERT OR IGNORE INTO seen (key, url, added_at) VALUES (?, ?, ?)", (key, url, now))
+        if not maybe_seen:
+            self.bloom.add_hash(h1, h2)
+        return True
+
+    def add(self, url):
+        """
+        添加一个URL
+
+        :param url: 原始URL
+        :return: 是否为新URL
+        """
+        with self._lock:
+            added = self._add_key(normalize_url(url), url, int(time.time()))
+            self.conn.commit()
+        return added
+
+    def add_many(self, urls):
+        """
+        批量添加URL（一个事务），返回其中的新URL，保持原始顺序，同一批内的重复也会被去掉
+
+        :param urls: 原始URL的可迭代对象
+        :return: 新URL列表（原始形式）
+        """
+        new_urls = []
+        now = int(time.time())
+        with self._lock:
+            for url in urls:
+                if self._add_key(normalize_url(url), url, now):
+                    new_urls.append(url)
+            self.conn.commit()
+        return new_urls
+
+    def filter_new(self, urls, ignore_existing=False):
+        """
+        返回其中的新URL但不记录，保持原始顺序，同一批内的重复也会被去掉；
+        先把新URL写入输出文件，成功后再用 add_many 记录，写入失败时这些URL下次仍是新的
+
+        :param urls: 原始URL的可迭代对象
+        :param ignore_existing: 为True时不查已有记录，只去掉同一批内的重复（覆盖模式）
+        :return: 新URL列表（原始形式）
+        """
+        new_urls = []
+        batch = set()
+        with self._lock:
+            for url in urls:
+                key = normalize_url(url)
+                if key in batch:
+                    continue
+                if not ignore_existing and key in self.bloom and \
+                        self.conn.execute("SELECT 1 FROM seen WHERE key = ?", (key,)).fetchone() is not None:
+                    continue
+                batch.add(key)
+                new_urls.append(url)
+        return new_urls
+
+    def seed_from_file(self, file_path):
+        """
+        用已有的URL文本文件（每行一个，#开头为注释）初始化，用于从旧的txt去重方式迁移
+
+        :param file_path: URL文件路径
+        :return: 新加入的URL数量
+        """
+        if not os.path.exists(file_path):
+            return 0
+        with open(file_path, 'r', encoding='utf-8') as f:
+            urls = (line.strip() for line in f)
+            added = self.add_many(url for url in urls if url and not url.startswith('#'))
+        print(f"已从 {file_path} 导入 {len(added)} 条URL")
+        return len(added)
+
+    def clear(self):
+        """
+        清空所有记录
+        """
+        with self._lock:
+            self.conn.execute("DELETE FROM seen")
+            self.conn.commit()
+            self.bloom = ScalableBloomFilter(self.bloom.initial_capacity, self.bloom.error_rate)
+
+    def close(self):
+        """
+        保存布隆过滤器并关闭数据库
+        """
+        with self._lock:
+            if self.bloom_path:
+                self.bloom.synced_count = self.conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+                self.bloom.save(self.bloom_path)
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
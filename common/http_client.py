@@ -0,0 +1,146 @@
+"""
+爬虫请求会话
+功能：每次请求从账号池取一个账号的请求头（配置了代理池时再按账号分配代理），
+     根据响应判断账号或代理是否失效并分别反馈，失效时自动换下一个账号/代理重试
+"""
+import json
+import time
+
+import requests
+
+from common.proxy_pool import BAN_STATUS_CODES
+
+# 跳转到这些地址说明cookie已经失效
+LOGIN_URL_MARKERS = ('passport.weibo.com', 'login.sina.com.cn', 'weibo.com/login',
+                     'zhihu.com/signin', 'zhihu.com/signup', 'zhihu.com/account/unhuman')
+# 这些状态码说明账号被限制或需要登录
+LOGIN_STATUS_CODES = (401, 403, 418)
+
+
+class CrawlerSession:
+    """
+    基于账号池的请求会话，接口与 requests.get 类似
+    """
+
+    def __init__(self, pool, timeout=15, max_attempts=None, proxy_pool=None):
+        """
+        Args:
+            pool: AccountPool
+            timeout: 单次请求超时时间（秒）
+            max_attempts: 单个请求最多尝试的次数，默认等于账号数与代理数中较大的一个
+            proxy_pool: ProxyPool，None表示不使用代理
+        """
+        self.pool = pool
+        self.proxy_pool = proxy_pool
+        self.timeout = timeout
+        self.max_attempts = max_attempts or max(len(pool), len(proxy_pool) if proxy_pool else 0)
+        self.session = requests.Session()
+
+    @staticmethod
+    def is_login_redirect(response):
+        """
+        判断响应是否跳转到了登录页
+        """
+        urls = [response.url] + [r.headers.get('Location', '') for r in response.history]
+        return any(marker in url for url in urls for marker in LOGIN_URL_MARKERS)
+
+    def get(self, url, **kwargs):
+        """
+        发送GET请求，遇到登录跳转时换账号重试
+
+        Args:
+            url: 请求地址
+            **kwargs: 传给 requests 的其它参数，headers 会与账号的请求头合并
+
+        Returns:
+            requests.Response
+        """
+        return self._request(url, **kwargs)
+
+    def get_json(self, url, data_key=None, is_empty=None, **kwargs):
+        """
+        发送GET请求并解析JSON，返回的JSON里没有 data_key 字段（或为null）时记为一次空数据；
+        字段存在但为空列表（如没有评论、最后一页）属于正常结果，不计为空数据
+
+        Args:
+            url: 请求地址
+            data_key: 正常结果必须包含的字段，None表示不检查
+            is_empty: 调用方自己判断是否为空数据的函数，参数为解析后的JSON，返回True时记为空数据
+            **kwargs: 传给 requests 的其它参数
+
+        Returns:
+            解析后的JSON数据
+        """
+        return self._request(url, as_json=True, data_key=data_key, is_empty=is_empty, **kwargs)
+
+    def _request(self, url, as_json=False, data_key=None, is_empty=None, **kwargs):
+        """
+        发送请求，登录跳转、代理被封、连接失败或（as_json时）返回内容不是JSON时换账号/代理重试，
+        总共最多 max_attempts 次。只有登录失效、200却不是JSON（验证页）和空数据记在账号头上，
+        404、5xx 这类与账号无关的状态码直接返回给调用方
+
+        Returns:
+            as_json 为True时返回解析后的JSON，否则返回 requests.Response
+        """
+        extra_headers = kwargs.pop('headers', None) or {}
+        kwargs.setdefault('timeout', self.timeout)
+        last_error = None
+
+        for _ in range(self.max_attempts):
+            account = self.pool.acquire()
+            headers = dict(account.headers)
+            headers.update(extra_headers)
+            # 配置了代理池时一定经过代理，所有代理都被剔除时 choose 会等待，不会直接连接
+            proxy = self.proxy_pool.choose(account.name) if self.proxy_pool else None
+            if proxy is not None:
+                kwargs['proxies'] = proxy.as_requests_proxies()
+
+            start = time.time()
+            try:
+                response = self.session.get(url, headers=headers, **kwargs)
+            except requests.RequestException as e:
+                # 连接失败与账号无关，走代理时算在代理头上
+                if proxy is not None:
+                    self.proxy_pool.report(proxy, ok=False)
+                last_error = e
+                continue
+
+            # 先判断是否跳转到了登录页：这是cookie失效，不能算在代理头上
+            login_redirect = self.is_login_redirect(response)
+            if proxy is not None:
+                # 经过代理且没有跳转登录页时，这些状态码一般是代理IP被封，而不是账号的问题
+                banned = not login_redirect and response.status_code in BAN_STATUS_CODES
+                self.proxy_pool.report(proxy, latency=time.time() - start,
+                                       ok=response.status_code < 500 and not banned, banned=banned)
+                if banned:
+                    last_error = RuntimeError(f"代理 {proxy.url} 被封禁（状态码 {response.status_code}）")
+                    continue
+
+            if login_redirect or response.status_code in LOGIN_STATUS_CODES:
+                self.pool.report_failure(account, f"登录跳转或无权限（状态码 {response.status_code}）",
+                                         login_required=True)
+                last_error = RuntimeError(f"账号 {account.name} 需要重新登录")
+                continue
+
+            if not as_json:
+                if response.status_code == 200:
+                    self.pool.report_success(account)
+                return response
+
+            try:
+                data = json.loads(response.content.decode('utf-8'))
+            except ValueError as e:
+                # 200却返回了HTML（一般是验证页），说明账号有问题；其它状态码的错误页与账号无关
+                if response.status_code == 200:
+                    self.pool.report_failure(account, "返回内容不是JSON")
+                last_error = e
+                continue
+
+            if response.status_code == 200:
+                empty = data_key is not None and (not isinstance(data, dict) or data.get(data_key) is None)
+                if is_empty is not None:
+                    empty = empty or bool(is_empty(data))
+                self.pool.report_success(account, empty=empty)
+            return data
+
+        raise RuntimeError(f"请求 {url} 失败，已尝试 {self.max_attempts} 次: {last_error}")
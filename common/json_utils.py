@@ -0,0 +1,234 @@
+"""
+JSON读写工具
+功能：流式读取大JSON文件中的记录，避免一次性把整个文档加载进内存；
+     序列化默认使用orjson（未安装时回退到标准库json），默认输出紧凑格式，需要时再美化
+"""
+import json
+import os
+
+# ijson / orjson 为可选依赖，没有安装时回退到标准库
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 当前使用的序列化后端：'orjson' 或 'json'
+JSON_BACKEND = 'orjson' if orjson is not None else 'json'
+
+
+def set_json_backend(name):
+    """
+    切换序列化后端。
+
+    :param name: 'orjson' 或 'json'
+    """
+    global JSON_BACKEND
+    if name == 'orjson' and orjson is None:
+        print("未安装orjson，继续使用标准库json")
+        name = 'json'
+    if name not in ('orjson', 'json'):
+        raise ValueError(f"未知的JSON后端: {name}")
+    JSON_BACKEND = name
+
+
+def dumps_bytes(data, pretty=False, sort_keys=False):
+    """
+    把数据序列化为UTF-8编码的JSON字节串。
+
+    :param data: 要序列化的数据
+    :param pretty: 是否缩进美化输出，默认紧凑输出
+    :param sort_keys: 是否按键排序
+    :return: JSON字节串
+    """
+    if JSON_BACKEND == 'orjson':
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(data, option=option)
+        except TypeError:
+            # orjson不支持的类型（如超过64位的整数）交给标准库处理
+            pass
+    if pretty:
+        text = json.dumps(data, ensure_ascii=False, indent=2, sort_keys=sort_keys)
+    else:
+        text = json.dumps(data, ensure_ascii=False, separators=(',', ':'), sort_keys=sort_keys)
+    return text.encode('utf-8')
+
+
+def dumps(data, pretty=False, sort_keys=False):
+    """
+    把数据序列化为JSON字符串。
+
+    :param data: 要序列化的数据
+    :param pretty: 是否缩进美化输出，默认紧凑输出
+    :param sort_keys: 是否按键排序
+    :return: JSON字符串
+    """
+    return dumps_bytes(data, pretty=pretty, sort_keys=sort_keys).decode('utf-8')
+
+
+def loads(text):
+    """
+    解析JSON字符串或字节串。
+
+    :param text: JSON字符串或字节串
+    :return: 解析后的数据
+    """
+    if JSON_BACKEND == 'orjson':
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def dump_json(data, file_path, pretty=False):
+    """
+    把数据保存到JSON文件。
+
+    :param data: 要保存的数据
+    :param file_path: 输出的JSON文件路径
+    :param pretty: 是否缩进美化输出，默认紧凑输出
+    """
+    with open(file_path, 'wb') as f:
+        f.write(dumps_bytes(data, pretty=pretty))
+
+
+def load_json(file_path):
+    """
+    读取整个JSON文件（安装了orjson时使用orjson解析）。
+
+    :param file_path: JSON文件路径
+    :return: 解析后的数据
+    """
+    with open(file_path, 'rb') as f:
+        return loads(f.read())
+
+
+def iter_json_items(file_path, prefix='item', chunk_size=1 << 20):
+    """
+    逐条读取JSON文件中某个数组里的记录，不物化整个文档。
+
+    :param file_path: JSON文件路径
+    :param prefix: ijson风格的路径前缀，'item' 表示顶层数组，
+                   'data.data.item' 表示 data -> data 数组中的每一项
+    :param chunk_size: 标准库回退模式下每次读取的字符数
+    :return: 记录生成器
+    """
+    if ijson is not None:
+        with open(file_path, 'rb') as f:
+            try:
+                for item in ijson.items(f, prefix, use_float=True):
+                    yield item
+            except ijson.JSONError as e:
+                raise json.JSONDecodeError(str(e), '', 0) from e
+        return
+
+    if prefix == 'item':
+        # 顶层数组可以用标准库增量解析
+        with open(file_path, 'r', encoding='utf-8') as f:
+            yield from _iter_top_level_array(f, chunk_size)
+        return
+
+    # 没有ijson时，嵌套路径只能整体加载后再按路径取出数组
+    data = load_json(file_path)
+    keys = prefix.split('.')
+    if keys[-1] == 'item':
+        keys = keys[:-1]
+    for key in keys:
+        data = data.get(key, []) if isinstance(data, dict) else []
+    if isinstance(data, list):
+        yield from data
+
+
+def _iter_top_level_array(f, chunk_size):
+    """
+    使用 JSONDecoder.raw_decode 增量解析顶层数组中的每个元素。
+    """
+    decoder = json.JSONDecoder()
+    buf = ''
+    pos = 0
+    eof = False
+    started = False
+
+    while True:
+        # 跳过空白和分隔符
+        while pos < len(buf) and (buf[pos].isspace() or (started and buf[pos] == ',')):
+            pos += 1
+
+        if pos >= len(buf):
+            if eof:
+                if started:
+                    raise json.JSONDecodeError("JSON数组没有正常结束", buf, pos)
+                return
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+            buf = buf[pos:] + chunk
+            pos = 0
+            continue
+
+        if not started:
+            if buf[pos] != '[':
+                raise json.JSONDecodeError("顶层不是JSON数组", buf, pos)
+            started = True
+            pos += 1
+            continue
+
+        if buf[pos] == ']':
+            return
+
+        try:
+            item, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            end = None
+        # 元素可能在缓冲区末尾被截断：数字 "1.5" 读到 "1." 时也能解析出 1，
+        # 所以没有读到文件末尾时，元素后面必须是分隔符、']' 或空白，否则继续读取
+        if end is None or (not eof and (end == len(buf) or not (buf[end] in ',]' or buf[end].isspace()))):
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+            buf = buf[pos:] + chunk
+            pos = 0
+            continue
+
+        yield item
+        pos = end
+        # 丢弃已经解析过的部分，保持缓冲区大小稳定
+        if pos > chunk_size:
+            buf = buf[pos:]
+            pos = 0
+
+
+def write_json_array(items, file_path, pretty=False):
+    """
+    把可迭代对象中的记录逐条写成一个JSON数组，不需要先构建完整列表。
+
+    :param items: 记录的可迭代对象（可以是生成器）
+    :param file_path: 输出的JSON文件路径
+    :param pretty: 是否缩进美化输出，默认每条记录紧凑地占一行
+    :return: 写入的记录条数
+    """
+    output_dir = os.path.dirname(file_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    count = 0
+    with open(file_path, 'wb') as f:
+        f.write(b'[')
+        for item in items:
+            text = dumps_bytes(item, pretty=pretty)
+            f.write(b',\n' if count else b'\n')
+            if pretty:
+                text = b'  ' + text.replace(b'\n', b'\n  ')
+            f.write(text)
+            count += 1
+        f.write(b'\n]' if count else b']')
+    return count
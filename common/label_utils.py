@@ -0,0 +1,86 @@
+"""
+大模型标注结果解析工具
+功能：把 "[立场, 说明],[情感, 说明],[意图, 说明]" 这类标注字符串一次性拆分为
+     stance / sentiment / intent 三列，整列用 str.extract 处理，不逐行遍历
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+LABEL_COLUMNS = ['stance', 'sentiment', 'intent']
+
+# 依次取出字符串中的前三个 [xxx] 分组，分组之间允许有任意内容
+MULTI_LABEL_PATTERN = re.compile(r'\[([^\]]+)\].*?\[([^\]]+)\].*?\[([^\]]+)\]', re.S)
+# 抖音多模态标注格式更严格：三个分组之间只有一个逗号
+MULTIMODAL_LABEL_PATTERN = re.compile(r'\[([^\]]+)\],\[([^\]]+)\],\[([^\]]+)\]')
+# 分组内部的 "标签, 说明"，只保留前两项
+LABEL_PARTS_PATTERN = re.compile(r'^([^,]*),?([^,]*)')
+
+
+def extract_label_groups(values, pattern=MULTI_LABEL_PATTERN):
+    """
+    批量提取标注字符串中的三个分组（不含方括号）。
+
+    :param values: 标注字符串序列
+    :param pattern: 含三个捕获组的正则
+    :return: DataFrame，列为 stance/sentiment/intent，未匹配的行为空
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values, dtype=object)
+    groups = series.astype(object).where(series.notna(), '').astype(str).str.extract(pattern)
+    groups.columns = LABEL_COLUMNS
+    return groups
+
+
+def format_label(group):
+    """
+    把分组内容整理为 "[标签, 说明]"，没有说明时为 "[标签]"。
+
+    :param group: 分组内容序列，例如 "中立,事实报道 ,其他"
+    :return: 字符串序列
+    """
+    parts = group.str.extract(LABEL_PARTS_PATTERN)
+    label = parts[0].str.strip()
+    desc = parts[1].fillna('').str.strip()
+    formatted = np.where(desc != '', '[' + label + ', ' + desc + ']', '[' + label + ']')
+    return pd.Series(formatted, index=group.index, dtype=object)
+
+
+def split_label_columns(df, column='stance'):
+    """
+    把某一列中挤在一起的立场、情感、意图拆分到各自的列中（原地修改）。
+
+    :param df: DataFrame
+    :param column: 存放原始标注字符串的列
+    :return: 布尔序列，标记被拆分过的行
+    """
+    for col in LABEL_COLUMNS:
+        if col not in df.columns:
+            df[col] = ''
+
+    groups = extract_label_groups(df[column])
+    matched = groups['stance'].notna()
+    if matched.any():
+        matched_groups = groups[matched]
+        for col in LABEL_COLUMNS:
+            df[col] = df[col].astype(object)
+            df.loc[matched, col] = format_label(matched_groups[col])
+    return matched
+
+
+def print_label_samples(df, n=3):
+    """
+    打印前几行三列都含有标注内容的示例。
+
+    :param df: DataFrame
+    :param n: 打印的行数
+    """
+    has_labels = pd.Series(True, index=df.index)
+    for col in LABEL_COLUMNS:
+        has_labels &= df[col].astype(str).str.contains('[', regex=False)
+
+    for _, row in df.loc[has_labels, LABEL_COLUMNS].head(n).iterrows():
+        print(f"立场: {row['stance']}")
+        print(f"情感: {row['sentiment']}")
+        print(f"意图: {row['intent']}")
+        print("-" * 30)
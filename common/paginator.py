@@ -0,0 +1,115 @@
+"""
+游标翻页
+功能：按接口返回的 paging.next 一页一页往后翻，直到 paging.is_end，记录下一页的地址用于断点续爬；
+     offset可以推算的接口（如知乎v4的 offset=0&limit=20）可以同时预取多页
+"""
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+
+def offset_page_url(url, page, offset_param='offset', limit_param='limit'):
+    """
+    推算offset翻页接口第page页（从0开始）的地址
+
+    :param url: 第0页的地址，必须带数字的offset和limit参数
+    :param page: 页码
+    :return: 地址，offset不是数字（如知乎comment_v5的游标）时返回None
+    """
+    parts = urlsplit(url)
+    params = parse_qsl(parts.query, keep_blank_values=True)
+    values = dict(params)
+    offset = values.get(offset_param, '')
+    limit = values.get(limit_param, '')
+    if not offset.isdigit() or not limit.isdigit():
+        return None
+    new_offset = str(int(offset) + page * int(limit))
+    params = [(k, new_offset if k == offset_param else v) for k, v in params]
+    return urlunsplit(parts._replace(query=urlencode(params)))
+
+
+class CursorPaginator:
+    """
+    逐页产生接口返回的JSON。cursor 始终是下一页还没处理的地址，全部翻完后为None，
+    中途出错时停在出错的那一页，下次可以从 cursor 继续
+    """
+
+    def __init__(self, fetch_json, start_url, prefetch=1, budget=None, max_pages=None):
+        """
+        Args:
+            fetch_json: 函数，输入地址返回解析好的JSON，失败时抛出异常
+            start_url: 第一页的地址（或上次保存的cursor）
+            prefetch: 同时请求的页数，只对offset可以推算的接口生效，其它接口按paging.next顺序翻页
+            budget: RateBudget，每次请求前等待，None表示不限制
+            max_pages: 最多翻多少页，None表示直到is_end
+        """
+        self.fetch_json = fetch_json
+        self.cursor = start_url
+        self.prefetch = prefetch if offset_page_url(start_url, 1) else 1
+        self.budget = budget
+        self.max_pages = max_pages
+        self.page_count = 0
+        self.error = None
+
+    def _fetch(self, url):
+        if self.budget is not None:
+            self.budget.wait()
+        return self.fetch_json(url)
+
+    @staticmethod
+    def is_last_page(data):
+        paging = data.get('paging', {})
+        return paging.get('is_end', False) or not data.get('data') or not paging.get('next')
+
+    def __iter__(self):
+        if self.prefetch > 1:
+            yield from self._iter_prefetch()
+        else:
+            yield from self._iter_sequential()
+
+    def _iter_sequential(self):
+        while self.cursor and (self.max_pages is None or self.page_count < self.max_pages):
+            try:
+                data = self._fetch(self.cursor)
+            except Exception as e:
+                self.error = e
+                print(f'翻页失败，停在 {self.cursor}: {e}')
+                return
+            self.page_count += 1
+            yield data
+            next_url = data.get('paging', {}).get('next')
+            # next与当前页相同说明接口没有往后翻，避免死循环
+            self.cursor = None if self.is_last_page(data) or next_url == self.cursor else next_url
+
+    def _iter_prefetch(self):
+        start_url = self.cursor
+        page = 0
+        with ThreadPoolExecutor(max_workers=self.prefetch) as executor:
+            futures = {}
+
+            def submit_until(limit):
+                for p in range(len(futures) + page, limit):
+                    if self.max_pages is not None and p >= self.max_pages:
+                        break
+                    futures[p] = executor.submit(self._fetch, offset_page_url(start_url, p))
+
+            submit_until(self.prefetch)
+            try:
+                while page in futures:
+                    try:
+                        data = futures.pop(page).result()
+                    except Exception as e:
+                        self.error = e
+                        print(f'翻页失败，停在 {self.cursor}: {e}')
+                        break
+                    self.page_count += 1
+                    yield data
+                    page += 1
+                    if self.is_last_page(data):
+                        self.cursor = None
+                        break
+                    self.cursor = offset_page_url(start_url, page)
+                    submit_until(page + self.prefetch)
+            finally:
+                # 翻到最后一页或调用方提前停止时，多预取的页不再需要
+                for future in futures.values():
+                    future.cancel()
@@ -0,0 +1,158 @@
+"""
+分阶段流水线
+功能：把一个帖子的处理拆成几个阶段（如 正文 -> 评论），每个阶段有自己的工作线程和请求节奏，
+     阶段之间用有界队列连接，不同帖子的不同阶段可以同时进行，去掉阶段之间的空等
+"""
+import queue
+import random
+import threading
+import time
+
+# 队列结束标记
+_DONE = object()
+
+
+class RateBudget:
+    """
+    单个阶段的请求节奏：两次任务开始之间至少间隔 min_interval 秒（另加随机抖动），线程安全
+    """
+
+    def __init__(self, min_interval=0.0, jitter=0.0):
+        """
+        Args:
+            min_interval: 两次任务开始之间的最小间隔（秒）
+            jitter: 每次额外等待 0~jitter 秒的随机时间，避免请求过于规律
+        """
+        self.min_interval = min_interval
+        self.jitter = jitter
+        self._next_time = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """
+        等到本阶段允许开始下一个任务
+
+        Returns:
+            实际等待的秒数
+        """
+        with self._lock:
+            now = time.time()
+            start = max(now, self._next_time)
+            self._next_time = start + self.min_interval + random.uniform(0, self.jitter)
+        wait = start - now
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class Stage:
+    """
+    流水线中的一个阶段
+    """
+
+    def __init__(self, name, handler, workers=1, min_interval=0.0, jitter=0.0, queue_size=100):
+        """
+        Args:
+            name: 阶段名称，用于打印
+            handler: 函数，输入上一阶段的结果，返回交给下一阶段的结果，返回None表示不再往下传
+            workers: 工作线程数（handler使用全局状态时必须为1）
+            min_interval: 本阶段两次任务之间的最小间隔（秒）
+            jitter: 本阶段每次额外等待的随机时间上限（秒）
+            queue_size: 本阶段输入队列的长度，队列满时上一阶段会等待
+        """
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.budget = RateBudget(min_interval, jitter)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.done_count = 0
+        self.failed_count = 0
+        self.busy_seconds = 0.0
+        self._finished_workers = 0
+        self._lock = threading.Lock()
+
+
+class StagedPipeline:
+    """
+    按顺序连接多个阶段，每个阶段在自己的线程中运行，某个任务出错只影响该任务
+    """
+
+    def __init__(self, stages):
+        """
+        Args:
+            stages: Stage列表，按处理顺序排列
+        """
+        if not stages:
+            raise ValueError("流水线至少需要一个阶段")
+        self.stages = stages
+
+    def _worker(self, index):
+        stage = self.stages[index]
+        next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+        while True:
+            item = stage.queue.get()
+            if item is _DONE:
+                break
+            stage.budget.wait()
+            start = time.time()
+            try:
+                result = stage.handler(item)
+            except Exception as e:
+                print(f"[{stage.name}] 处理 {item} 时出错: {e}")
+                result = None
+                with stage._lock:
+                    stage.failed_count += 1
+            else:
+                with stage._lock:
+                    stage.done_count += 1
+            with stage._lock:
+                stage.busy_seconds += time.time() - start
+            if result is not None and next_stage is not None:
+                next_stage.queue.put(result)
+
+        # 本阶段最后一个线程结束时，通知下一阶段的所有线程结束
+        with stage._lock:
+            stage._finished_workers += 1
+            last = stage._finished_workers == stage.workers
+        if last and next_stage is not None:
+            for _ in range(next_stage.workers):
+                next_stage.queue.put(_DONE)
+
+    def run(self, items):
+        """
+        把所有任务送入第一个阶段，等待全部阶段处理完毕
+
+        Args:
+            items: 任务列表（一般为URL）
+
+        Returns:
+            总耗时（秒）
+        """
+        start = time.time()
+        threads = []
+        for index, stage in enumerate(self.stages):
+            for i in range(stage.workers):
+                thread = threading.Thread(target=self._worker, args=(index,),
+                                          name=f"{stage.name}-{i}", daemon=True)
+                thread.start()
+                threads.append(thread)
+
+        first = self.stages[0]
+        for item in items:
+            first.queue.put(item)
+        for _ in range(first.workers):
+            first.queue.put(_DONE)
+
+        for thread in threads:
+            thread.join()
+        return time.time() - start
+
+    def print_stats(self, total_seconds=None):
+        """
+        打印各阶段处理的任务数和忙碌时间
+        """
+        for stage in self.stages:
+            print(f"[{stage.name}] 完成 {stage.done_count} 个，失败 {stage.failed_count} 个，"
+                  f"忙碌 {stage.busy_seconds / 60:.2f} 分钟")
+        if total_seconds is not None:
+            print(f"流水线总耗时 {total_seconds / 60:.2f} 分钟")
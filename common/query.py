@@ -0,0 +1,201 @@
+"""
+爬取结果和清洗结果的SQL查询
+功能：用DuckDB把各平台的CSV/Parquet输出注册成视图（ID列按 common.schema 转成整数），
+     直接用SQL回答"多少个不同的用户评论过""哪些微博还没有元数据""每个平台每天多少条"这类问题，
+     不用再为每个问题写一次pandas脚本；DuckDB会并行扫描文件，Parquet还能下推过滤条件
+用法：在仓库根目录运行 python -m common.query "SELECT count(*) FROM weibo_comments"
+"""
+import argparse
+import glob
+import os
+
+from common.csv_bytes import read_header
+from common.schema import ID_COLUMNS, UINT64
+
+# duckdb 为可选依赖，只有查询时需要
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+# 视图名 -> (平台, 相对仓库根目录的文件通配符)，没有匹配到文件的视图不注册
+DATASETS = {
+    # 爬取结果
+    'weibo_comments': ('weibo', 'weibo/weibo_details*/review_data.csv'),
+    'weibo_meta': ('weibo', 'weibo/weibo_details*/meta_data.csv'),
+    'zhihu_comments': ('zhihu', 'zhihu/comments*.csv'),
+    'zhihu_meta': ('zhihu', 'zhihu/zhihu_data*.csv'),
+    'douyin_comments': ('douyin', 'douyin/douyin_results_final/merged_comments.csv'),
+    'douyin_meta': ('douyin', 'douyin/merged_body.csv'),
+    'xhs_comments': ('xhs', 'xhs/xhs_results_merge/xhs_merged_comments.csv'),
+    # 清洗并匹配后的结果（CSV或Parquet）
+    'weibo_clean_comments': ('weibo', 'weibo/weibo_final_results/cleaned_weibo_comments_data_matched.*'),
+    'weibo_clean_meta': ('weibo', 'weibo/weibo_final_results/cleaned_weibo_meta_data_matched.*'),
+    'zhihu_clean_meta': ('zhihu', 'zhihu/zhihu_results_final/cleaned_zhihu_meta_data_matched.*'),
+    'douyin_clean_comments': ('douyin', 'douyin/douyin_results_final/cleaned_douyin_comments_data_matched.*'),
+    'douyin_clean_meta': ('douyin', 'douyin/douyin_results_final/cleaned_douyin_meta_data_matched.*'),
+    'xhs_clean_comments': ('xhs', 'xhs/xhs_results_final/cleaned_xhs_comments_data_matched.*'),
+    # 带立场/情感/意图标签的评论
+    'weibo_labeled': ('weibo', 'weibo/weibo_final_results/cleaned_weibo_comments_ds_split.*'),
+    'zhihu_labeled': ('zhihu', 'zhihu/zhihu_results_final/cleaned_zhihu_comments_ds_split.*'),
+    'douyin_labeled': ('douyin', 'douyin/douyin_results_final/cleaned_douyin_comments_ds_split.*'),
+    'xhs_labeled': ('xhs', 'xhs/xhs_results_final/cleaned_xhs_comments_ds_split.*'),
+    'weixin_labeled': ('weixin', 'weixin/weixin_final_results/cleaned_weixin_comments_ds_split.*'),
+}
+
+# pandas类型 -> DuckDB类型
+_DUCKDB_TYPES = {UINT64: 'UBIGINT'}
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _literal(text):
+    return "'" + text.replace("'", "''") + "'"
+
+
+def source_sql(paths, platform):
+    """
+    生成读取一组文件的SQL：CSV的ID列先按文本读入，去掉空白和 '.0' 后用 TRY_CAST 转成整数，
+    无法识别的ID为NULL而不是让整个查询失败；Parquet保存时已经带类型，直接读取
+
+    :param paths: 文件路径列表（同一种格式）
+    :param platform: 平台名，用于查找 ID_COLUMNS，不在其中的平台不转换
+    :return: SELECT 语句
+    """
+    file_list = '[' + ', '.join(_literal(path) for path in paths) + ']'
+    if all(path.endswith('.parquet') for path in paths):
+        return f"SELECT * FROM read_parquet({file_list}, union_by_name = true)"
+
+    columns = set()
+    for path in paths:
+        columns.update(read_header(path)[0])
+    id_columns = {column: dtype for column, dtype in ID_COLUMNS.get(platform, {}).items()
+                  if column in columns and dtype in _DUCKDB_TYPES}
+    if not id_columns:
+        # 没有需要转换的ID列（如小红书、微信）时不能传空的 types = {}，DuckDB会报语法错误
+        return f"SELECT * FROM read_csv({file_list}, header = true, union_by_name = true)"
+    types = '{' + ', '.join(f"{_literal(column)}: 'VARCHAR'" for column in id_columns) + '}'
+    source = f"read_csv({file_list}, header = true, union_by_name = true, types = {types})"
+    replaces = ', '.join(
+        f"TRY_CAST(regexp_replace(trim({_quote(column)}), '\\.0+$', '') AS {_DUCKDB_TYPES[dtype]}) AS {_quote(column)}"
+        for column, dtype in id_columns.items())
+    return f"SELECT * REPLACE ({replaces}) FROM {source}"
+
+
+class CrawlQuery:
+    """
+    DuckDB查询会话，创建时把 DATASETS 中存在的文件注册成视图
+    """
+
+    def __init__(self, root='.', database=':memory:', threads=None, datasets=None):
+        """
+        Args:
+            root: 仓库根目录，DATASETS 中的路径相对于它
+            database: DuckDB数据库文件，默认只在内存中
+            threads: 并行扫描的线程数，None表示DuckDB默认（CPU核数）
+            datasets: 要注册的视图，默认为 DATASETS
+        """
+        if duckdb is None:
+            raise ImportError("查询需要安装duckdb：pip install duckdb")
+        self.root = root
+        self.con = duckdb.connect(database)
+        if threads:
+            self.con.execute(f"SET threads = {int(threads)}")
+        self.views = {}
+        for name, (platform, pattern) in (datasets or DATASETS).items():
+            # 某个视图的文件有问题时跳过它，不影响其它视图
+            try:
+                self.register(name, pattern, platform)
+            except Exception as e:
+                print(f"注册视图 {name} 失败: {e}")
+
+    def register(self, name, pattern, platform=None):
+        """
+        把匹配通配符的文件注册成视图，CSV和Parquet同时存在时优先用Parquet
+
+        :param name: 视图名
+        :param pattern: 文件通配符（相对 root，也可以是绝对路径）
+        :param platform: 平台名，决定ID列的类型
+        :return: 是否注册成功（没有匹配到文件时为False）
+        """
+        paths = sorted(p for p in glob.glob(os.path.join(self.root, pattern))
+                       if p.endswith(('.csv', '.parquet')) and os.path.getsize(p) > 0)
+        parquet = [p for p in paths if p.endswith('.parquet')]
+        paths = parquet or paths
+        if not paths:
+            return False
+        self.con.execute(f"CREATE OR REPLACE VIEW {_quote(name)} AS {source_sql(paths, platform)}")
+        self.views[name] = paths
+        return True
+
+    def sql(self, query, params=None):
+        """
+        执行SQL并返回DataFrame
+        """
+        return self.con.execute(query, params or []).df()
+
+    def distinct_count(self, view, column):
+        """
+        视图中某一列不同值的个数，如 distinct_count('weibo_comments', 'uid')
+        """
+        return self.con.execute(f"SELECT count(DISTINCT {_quote(column)}) FROM {_quote(view)}").fetchone()[0]
+
+    def missing_keys(self, view, other_view, key):
+        """
+        view 中出现但 other_view 中没有的key，如 missing_keys('weibo_comments', 'weibo_meta', 'mid') 为还没有元数据的微博
+        """
+        return self.sql(f"SELECT DISTINCT {_quote(key)} FROM {_quote(view)} WHERE {_quote(key)} IS NOT NULL "
+                        f"EXCEPT SELECT {_quote(key)} FROM {_quote(other_view)}")
+
+    def daily_counts(self, sources):
+        """
+        每个视图每天的条数，时间戳列为10位秒级或13位毫秒级时间戳，其它位数忽略
+
+        :param sources: {视图名: 时间戳列名}
+        :return: DataFrame，列为 view, date, count
+        """
+        parts = []
+        for view, column in sources.items():
+            value = f"TRY_CAST({_quote(column)} AS BIGINT)"
+            seconds = f"CASE WHEN {value} >= 1000000000000 THEN {value} // 1000 ELSE {value} END"
+            parts.append(f"SELECT {_literal(view)} AS view, CAST(to_timestamp({seconds}) AS DATE) AS date, "
+                         f"count(*) AS count FROM {_quote(view)} "
+                         f"WHERE {value} BETWEEN 1000000000 AND 9999999999 "
+                         f"OR {value} BETWEEN 1000000000000 AND 9999999999999 GROUP BY ALL")
+        return self.sql(' UNION ALL '.join(parts) + ' ORDER BY view, date')
+
+    def close(self):
+        self.con.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='用SQL查询各平台的爬取和清洗结果')
+    parser.add_argument('query', nargs='?', help='SQL语句，不提供时列出已注册的视图')
+    parser.add_argument('--root', default='.', help='仓库根目录')
+    parser.add_argument('--threads', type=int, default=None, help='并行扫描的线程数')
+    parser.add_argument('--output', default=None, help='把结果保存为CSV或Parquet文件')
+    parser.add_argument('--limit', type=int, default=50, help='终端最多显示多少行')
+    args = parser.parse_args(argv)
+
+    with CrawlQuery(args.root, threads=args.threads) as q:
+        if not args.query:
+            for name, paths in q.views.items():
+                print(f"{name}: {', '.join(paths)}")
+            return
+        if args.output:
+            q.con.execute(f"COPY ({args.query}) TO {_literal(args.output)}")
+            print(f"查询结果已保存到 {args.output}")
+            return
+        print(q.sql(args.query).to_string(max_rows=args.limit))
+
+
+if __name__ == '__main__':
+    main()
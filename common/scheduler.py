@@ -0,0 +1,135 @@
+"""
+优先级爬取调度
+功能：按预计能爬到的评论量（评论数、转发数、点赞数、发布时间）给待爬帖子排序，
+     在时间或数量预算内优先爬取价值最高的帖子，预算用完提前停止时也能拿到大部分评论
+"""
+import heapq
+import itertools
+import time
+
+# 微博mid的高位是时间戳，(mid >> 22) + 这个偏移量 = 秒级发布时间
+WEIBO_MID_EPOCH_OFFSET = 515483463
+
+
+def weibo_mid_to_timestamp(mid):
+    """
+    从微博mid推算发布时间
+
+    :param mid: 微博mid（数字或数字字符串）
+    :return: 秒级时间戳，无法解析时返回None
+    """
+    try:
+        return (int(mid) >> 22) + WEIBO_MID_EPOCH_OFFSET
+    except (TypeError, ValueError):
+        return None
+
+
+def engagement_score(comment_count, repost_count=0, like_count=0, created_at=None, now=None,
+                     half_life_hours=72, recency_bonus=0.5):
+    """
+    估计一个帖子的爬取价值，评论数占主导，转发和点赞作为补充，新帖子有额外加成（评论还在增长）
+
+    :param comment_count: 评论数
+    :param repost_count: 转发数
+    :param like_count: 点赞数
+    :param created_at: 发布时间（秒级时间戳），None表示不考虑时间
+    :param now: 当前时间，默认为time.time()
+    :param half_life_hours: 新帖加成的半衰期（小时）
+    :param recency_bonus: 刚发布的帖子最多加成的比例
+    :return: 分数，越大越优先
+    """
+    score = (comment_count or 0) + 0.2 * (repost_count or 0) + 0.02 * (like_count or 0)
+    if created_at:
+        now = time.time() if now is None else now
+        age_hours = max(0.0, (now - created_at) / 3600)
+        score *= 1 + recency_bonus * 0.5 ** (age_hours / half_life_hours)
+    return score
+
+
+class CrawlBudget:
+    """
+    爬取预算：最长运行时间和最多处理的条数，任意一个用完就停止
+    """
+
+    def __init__(self, max_seconds=None, max_items=None):
+        """
+        Args:
+            max_seconds: 最长运行时间（秒），None表示不限制
+            max_items: 最多处理的条数，None表示不限制
+        """
+        self.max_seconds = max_seconds
+        self.max_items = max_items
+        self.start_time = time.time()
+        self.used_items = 0
+
+    def charge(self, n=1):
+        self.used_items += n
+
+    def elapsed(self):
+        return time.time() - self.start_time
+
+    def exhausted(self):
+        if self.max_items is not None and self.used_items >= self.max_items:
+            return True
+        if self.max_seconds is not None and self.elapsed() >= self.max_seconds:
+            return True
+        return False
+
+
+class PriorityScheduler:
+    """
+    最大优先队列，分数相同时按加入顺序出队
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()
+        self.total_score = 0.0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, item, score):
+        """
+        加入一个待爬项
+
+        Args:
+            item: 待爬项（一般为URL）
+            score: 优先级分数，越大越先爬
+        """
+        heapq.heappush(self._heap, (-score, next(self._counter), item))
+        self.total_score += score
+
+    def pop(self):
+        """
+        取出分数最高的待爬项
+
+        Returns:
+            (item, score)
+        """
+        neg_score, _, item = heapq.heappop(self._heap)
+        return item, -neg_score
+
+    def drain(self, budget=None):
+        """
+        按优先级依次取出待爬项，预算用完时停止并打印未爬部分的统计
+
+        Args:
+            budget: CrawlBudget，None表示全部取出
+
+        Returns:
+            生成器，每次产生 (item, score)
+        """
+        total = self.total_score
+        done_score = 0.0
+        while self._heap:
+            if budget is not None and budget.exhausted():
+                left = len(self._heap)
+                covered = done_score / total * 100 if total else 100.0
+                print(f"预算已用完，剩余 {left} 个未爬取，已覆盖约 {covered:.1f}% 的预计评论量")
+                return
+            item, score = self.pop()
+            done_score += score
+            if budget is not None:
+                budget.charge()
+            yield item, score
@@ -0,0 +1,353 @@
+"""
+各平台数据表的字段类型
+功能：在读入CSV时统一校验和转换ID列——数字ID（微博mid/uid、知乎各类id、抖音aweme_id/cid等）存成UInt64，
+     小红书的十六进制ID存成category；每个ID从几十字节的Python字符串降到8字节整数，
+     isin / 去重 / merge 都在整数上进行；
+     性别、来源、地区、立场/情感/意图标签这类取值很少的文本列存成category，输出Parquet时保持字典编码；
+     读入时按 COLUMN_MAPPINGS 把各平台的列名统一成 article_id/comment_id/created_time/stance 等，
+     不再需要单独读一遍、改列名、再写一遍 _renamed.csv
+"""
+import os
+
+import pandas as pd
+
+# pyarrow 为可选依赖，只有读写Parquet时需要
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+UINT64 = 'UInt64'
+CATEGORY = 'category'
+
+# 每个平台的ID列及其类型，表里没有的列自动忽略
+ID_COLUMNS = {
+    'weibo': {
+        'mid': UINT64,
+        'review_id': UINT64,
+        'sup_comment': UINT64,
+        'uid': UINT64,
+    },
+    'zhihu': {
+        'article_id': UINT64,
+        'answer_id': UINT64,
+        'question_id': UINT64,
+        'comment_id': UINT64,
+        'super_comment_id': UINT64,
+    },
+    'douyin': {
+        'aweme_id': UINT64,
+        'cid': UINT64,
+        'uid': UINT64,
+        'reply_id': UINT64,
+        'reply_to_reply_id': UINT64,
+        'root_comment_id': UINT64,
+        'author_uid': UINT64,
+        'music_id': UINT64,
+    },
+    'xhs': {
+        'note_id': CATEGORY,
+        'comment_id': CATEGORY,
+        'user_id': CATEGORY,
+        'parent_comment_id': CATEGORY,
+    },
+}
+
+# 各平台评论（comments）和帖子元数据（meta）的列名 -> 统一列名，表里没有的列自动忽略
+COLUMN_MAPPINGS = {
+    'weibo': {
+        'comments': {
+            'mid': 'article_id',
+            'review_id': 'comment_id',
+            'sup_comment': 'parent_comment_id',
+            'created_at': 'created_time',
+            'text_raw': 'content',
+            'source': 'location',
+            'like': 'like_count',
+            'img_url': 'img_urls',
+            'review_num': 'comment_count',
+            'ds_stance': 'stance',
+            'ds_sentiment': 'sentiment',
+            'ds_intent': 'intent',
+        },
+        'meta': {
+            'mid': 'article_id',
+            'created_at': 'created_time',
+            'text': 'content',
+            'region': 'location',
+            'pic_num': 'img_count',
+            'pic_url': 'img_urls',
+            'video_url': 'video_urls',
+            'comments_count': 'comment_count',
+            'multimodal_stance': 'stance',
+            'multimodal_sentiment': 'sentiment',
+            'multimodal_intent': 'intent',
+        },
+    },
+    'zhihu': {
+        'comments': {
+            'author': 'uid',
+            'super_comment_id': 'parent_comment_id',
+            'author_name': 'username',
+            'ds_stance': 'stance',
+            'ds_sentiment': 'sentiment',
+            'ds_intent': 'intent',
+            'img_url': 'img_urls',
+            'created_area': 'location',
+            'child_comment_count': 'comment_count',
+        },
+        'meta': {
+            'author_id': 'uid',
+            'author_name': 'username',
+            'vote_count': 'like_count',
+            'multimodal_stance': 'stance',
+            'multimodal_sentiment': 'sentiment',
+            'multimodal_intent': 'intent',
+            'publish_time': 'created_time',
+        },
+    },
+    'douyin': {
+        'comments': {
+            'cid': 'comment_id',
+            'text': 'content',
+            'aweme_id': 'article_id',
+            'create_time': 'created_time',
+            'digg_count': 'like_count',
+            'nickname': 'username',
+            'reply_id': 'parent_comment_id',
+            'reply_to_reply_id': 'parent_parent_comment_id',
+            'text_extra': 'extra_info',
+            'ip_label': 'location',
+            'ds_stance': 'stance',
+            'ds_sentiment': 'sentiment',
+            'ds_intent': 'intent',
+        },
+        # multimodal_stance 需要先拆分成三列，不在这里改名
+        'meta': {
+            'aweme_id': 'article_id',
+            'desc': 'content',
+            'create_time': 'created_time',
+            'author_uid': 'uid',
+            'author_name': 'username',
+            'video_url': 'video_urls',
+            'digg_count': 'like_count',
+        },
+    },
+    'xhs': {
+        'comments': {
+            'note_id': 'article_id',
+            'create_time': 'created_time',
+            'ip_location': 'location',
+            'user_id': 'uid',
+            'nickname': 'username',
+            'sub_comment_count': 'child_comment_count',
+            'pictures': 'img_urls',
+            'ds_stance': 'stance',
+            'ds_sentiment': 'sentiment',
+            'ds_intent': 'intent',
+        },
+        'meta': {
+            'note_id': 'article_id',
+            'desc': 'content',
+            'video_url': 'video_urls',
+            'time': 'created_time',
+            'last_update_time': 'updated_time',
+            'user_id': 'uid',
+            'nickname': 'username',
+            'liked_count': 'like_count',
+            'ip_location': 'location',
+            'image_list': 'img_urls',
+            'multimodal_stance': 'stance',
+            'multimodal_sentiment': 'sentiment',
+            'multimodal_intent': 'intent',
+        },
+    },
+    'weixin': {
+        'comments': {
+            'url': 'article_id',
+            'created_at': 'created_time',
+            'like_num': 'like_count',
+            'id': 'comment_id',
+            'nick_name': 'username',
+            'province': 'location',
+            'reply_num': 'comment_count',
+            'reply_to_id': 'parent_comment_id',
+            'ds_stance': 'stance',
+            'ds_sentiment': 'sentiment',
+            'ds_intent': 'intent',
+        },
+        'meta': {
+            'url': 'article_id',
+            'author': 'username',
+            'multimodal_stance': 'stance',
+            'multimodal_sentiment': 'sentiment',
+            'multimodal_intent': 'intent',
+        },
+    },
+}
+
+# 取值很少、在几百万行里反复出现的文本列，各平台通用，表里没有的列自动忽略
+CATEGORY_COLUMNS = (
+    'gender', 'source', 'region', 'ip_location', 'ip_label', 'created_area', 'location', 'province', 'country',
+    'stance', 'sentiment', 'intent', 'ds_stance', 'ds_sentiment', 'ds_intent', 'multimodal_stance',
+)
+
+# 依次尝试的文件编码
+CSV_ENCODINGS = ('utf-8-sig', 'gbk', 'utf-8')
+
+
+def to_uint64_ids(series):
+    """
+    把ID列转成UInt64：去掉首尾空白和Excel导出时带上的 '.0'，不是纯数字的值置为NA
+
+    :param series: 字符串（或数字）列
+    :return: (转换后的列, 无法识别的个数)
+    """
+    if pd.api.types.is_integer_dtype(series.dtype):
+        return series.astype(UINT64), 0
+    text = series.astype('string').str.strip().str.replace(r'\.0+$', '', regex=True)
+    # 最多19位，保证不会超出uint64
+    valid = text.str.fullmatch(r'\d{1,19}').fillna(False).astype(bool)
+    ids = pd.to_numeric(text.where(valid), errors='coerce', dtype_backend='numpy_nullable').astype(UINT64)
+    invalid = int((~valid & text.notna() & (text != '')).sum())
+    return ids, invalid
+
+
+def normalize_ids(df, platform):
+    """
+    按平台的ID类型转换DataFrame中的ID列（原地修改）
+
+    :param df: DataFrame
+    :param platform: 平台名，见 ID_COLUMNS，不在其中的平台不转换
+    :return: 同一个DataFrame
+    """
+    for column, dtype in ID_COLUMNS.get(platform, {}).items():
+        if column not in df.columns:
+            continue
+        if dtype == UINT64:
+            df[column], invalid = to_uint64_ids(df[column])
+            if invalid:
+                print(f"{column} 列有 {invalid} 个无法识别的ID，已置为空")
+        else:
+            df[column] = df[column].astype('string').str.strip().astype(dtype)
+    return df
+
+
+def categorize(df, columns=CATEGORY_COLUMNS):
+    """
+    把取值很少的文本列转成category（原地修改），数字列（如知乎的gender）保持不变
+
+    :param df: DataFrame
+    :param columns: 需要转换的列名
+    :return: 同一个DataFrame
+    """
+    for column in columns:
+        if column in df.columns and not pd.api.types.is_numeric_dtype(df[column].dtype):
+            df[column] = df[column].astype('category')
+    return df
+
+
+def rename_columns(df, platform, kind):
+    """
+    按 COLUMN_MAPPINGS 把列名改成统一列名（原地修改）
+
+    :param df: DataFrame
+    :param platform: 平台名
+    :param kind: 'comments' 或 'meta'
+    :return: 同一个DataFrame
+    """
+    mapping = COLUMN_MAPPINGS[platform][kind]
+    df.rename(columns={column: mapping[column] for column in df.columns if column in mapping}, inplace=True)
+    return df
+
+
+def read_csv_any_encoding(file_path, encoding=None, **kwargs):
+    """
+    读取CSV文件，未指定编码时依次尝试 utf-8-sig、gbk、utf-8
+
+    :param file_path: 文件路径
+    :param encoding: 指定编码，None表示自动尝试
+    :param kwargs: 传给 pd.read_csv 的其它参数
+    :return: DataFrame
+    """
+    if encoding is not None:
+        return pd.read_csv(file_path, encoding=encoding, **kwargs)
+    for candidate in CSV_ENCODINGS[:-1]:
+        try:
+            return pd.read_csv(file_path, encoding=candidate, **kwargs)
+        except UnicodeDecodeError:
+            continue
+    return pd.read_csv(file_path, encoding=CSV_ENCODINGS[-1], **kwargs)
+
+
+def read_table(file_path, platform, encoding=None, dtype=None, categorical=True, kind=None, **kwargs):
+    """
+    按平台的字段类型读取CSV或Parquet：ID列先按字符串读入（避免缺失值把长ID变成浮点数丢失精度），再统一转换；
+    指定 kind 时再把列名改成统一列名
+
+    :param file_path: 文件路径，.parquet 结尾时按Parquet读取
+    :param platform: 平台名，见 ID_COLUMNS
+    :param encoding: 文件编码，None表示自动尝试
+    :param dtype: 其它列的类型，如 {'created_time': str}；传入 str 时所有列都按字符串读入（ID列之后照常转换），
+                  只改列名、不改变其它列的内容
+    :param categorical: 是否把 CATEGORY_COLUMNS 中的列转成category
+    :param kind: 'comments' 或 'meta'，按 COLUMN_MAPPINGS 改列名；None表示保持原列名
+    :param kwargs: 传给 pd.read_csv 的其它参数
+    :return: DataFrame
+    """
+    if file_path.endswith('.parquet'):
+        df = pd.read_parquet(file_path, **kwargs)
+    else:
+        if dtype is None or isinstance(dtype, dict):
+            column_types = {column: str for column in ID_COLUMNS.get(platform, {})}
+            column_types.update(dtype or {})
+        else:
+            column_types = dtype
+        df = read_csv_any_encoding(file_path, encoding=encoding, dtype=column_types, **kwargs)
+    # ID列按原列名转换，之后再改名
+    normalize_ids(df, platform)
+    if kind is not None:
+        rename_columns(df, platform, kind)
+    if categorical:
+        categorize(df)
+    return df
+
+
+def save_table(df, file_path, encoding='utf-8-sig'):
+    """
+    保存DataFrame：.parquet 结尾时写Parquet，category列按字典编码存储，读回来仍是category；否则写CSV
+
+    :param df: DataFrame
+    :param file_path: 输出路径
+    :param encoding: CSV的编码
+    """
+    if not file_path.endswith('.parquet'):
+        df.to_csv(file_path, index=False, encoding=encoding)
+        return
+    if pa is None:
+        raise ImportError("保存为Parquet需要安装pyarrow")
+    output_dir = os.path.dirname(file_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    # category列转成Arrow的字典数组，表的元数据里记录了pandas类型，read_parquet读回来仍是category
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    pq.write_table(table, file_path)
+
+
+def export_unified(input_file, output_file, platform, kind):
+    """
+    读取一张表并按 COLUMN_MAPPINGS 统一列名后保存，其它列按字符串原样保留，
+    供直接读取统一列名文件的下游使用（如 *_meta_data_renamed.csv）
+
+    :param input_file: 输入文件
+    :param output_file: 输出文件，.parquet 结尾时写Parquet
+    :param platform: 平台名
+    :param kind: 'comments' 或 'meta'
+    :return: 统一列名后的DataFrame
+    """
+    df = read_table(input_file, platform, dtype=str, categorical=False, kind=kind)
+    save_table(df, output_file)
+    print(f"统一列名后的数据已保存到: {output_file}")
+    return df
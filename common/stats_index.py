@@ -0,0 +1,314 @@
+"""
+爬取结果的统计索引
+功能：在CSV旁边维护一个 <文件名>.stats.json，记录行数、各ID列的HyperLogLog基数估计、
+     时间戳的最小/最大值，以及每隔N行的字节位置；查询条数、不同ID数时不用再读整个文件，
+     读取某一段行时可以直接跳到附近的位置；同时记录文件指纹，文件被整体重写（即使变大）时重新统计
+"""
+import base64
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from common.csv_bytes import find_record_end, read_header
+from common.json_utils import dump_json, load_json
+from common.time_utils import to_epoch_seconds, parse_local_time
+
+STATS_SUFFIX = '.stats.json'
+# 默认每隔多少行记录一次字节位置
+DEFAULT_EVERY = 10000
+# 文件指纹取已统计部分开头和结尾各多少字节
+FINGERPRINT_BYTES = 64 * 1024
+
+
+def hash_values(values):
+    """
+    把一组值（按字符串）哈希成uint64，同一个值在不同进程、不同次运行中的哈希相同
+
+    :param values: 值的序列
+    :return: uint64数组
+    """
+    strings = np.array(['' if pd.isna(v) else str(v) for v in values], dtype=object)
+    return pd.util.hash_array(strings)
+
+
+def file_fingerprint(file_path, size):
+    """
+    文件前 size 字节的指纹：inode，以及这部分开头和结尾各 FINGERPRINT_BYTES 字节的哈希；
+    只追加内容时指纹不变，文件被重写（变短、变长或替换成新文件）时指纹改变
+
+    :param file_path: 文件路径
+    :param size: 已统计的字节数
+    :return: 指纹字符串
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        inode = os.fstat(f.fileno()).st_ino
+        digest.update(f.read(min(size, FINGERPRINT_BYTES)))
+        if size > FINGERPRINT_BYTES:
+            f.seek(max(size - FINGERPRINT_BYTES, FINGERPRINT_BYTES))
+            digest.update(f.read(size - f.tell()))
+    return f"{inode}:{digest.hexdigest()}"
+
+
+class HyperLogLog:
+    """
+    HyperLogLog基数估计，2^p 个寄存器，p=12 时占4KB，相对误差约1.6%
+    """
+
+    def __init__(self, p=12, registers=None):
+        self.p = p
+        self.registers = registers if registers is not None else np.zeros(1 << p, dtype=np.uint8)
+
+    def add_hashes(self, hashes):
+        """
+        加入一批64位哈希值
+        """
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if not len(hashes):
+            return
+        bits = 64 - self.p
+        index = (hashes >> np.uint64(bits)).astype(np.intp)
+        rest = hashes & np.uint64((1 << bits) - 1)
+        # 剩余位中第一个1的位置（从高位数起，从1开始），rest < 2^52 转成浮点数是精确的
+        _, exponent = np.frexp(rest.astype(np.float64))
+        rank = (bits - exponent + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def add(self, values):
+        """
+        加入一批值，空值忽略
+        """
+        values = [v for v in values if not pd.isna(v) and v != '']
+        self.add_hashes(hash_values(values))
+
+    def merge(self, other):
+        """
+        合并另一个相同精度的估计
+        """
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self):
+        """
+        估计不同值的个数
+        """
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        # 基数较小时改用线性计数
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+    def to_text(self):
+        return base64.b64encode(self.registers.tobytes()).decode('ascii')
+
+    @classmethod
+    def from_text(cls, text, p=12):
+        return cls(p, np.frombuffer(base64.b64decode(text), dtype=np.uint8).copy())
+
+
+def to_seconds(values):
+    """
+    把时间戳或 '%Y-%m-%d %H:%M:%S' 格式的时间转换为秒级时间戳
+
+    :param values: 时间序列
+    :return: int64数组，无法识别的值已去掉
+    """
+    series = pd.Series(values, dtype=object)
+    seconds = to_epoch_seconds(series)
+    missing = seconds.isna() & series.notna()
+    if missing.any():
+        seconds[missing] = parse_local_time(series[missing].astype(str))
+    return seconds.dropna().to_numpy(dtype=np.int64)
+
+
+class StatsIndex:
+    """
+    一个CSV文件的统计索引，size 记录索引覆盖到的文件字节数，文件变长时只需要扫描新增的部分
+    """
+
+    def __init__(self, file_path, id_columns=(), timestamp_column=None, every=DEFAULT_EVERY):
+        """
+        Args:
+            file_path: CSV文件路径
+            id_columns: 需要统计不同值个数的列
+            timestamp_column: 时间戳列，None表示不统计时间范围
+            every: 每隔多少行记录一次字节位置
+        """
+        self.file_path = file_path
+        self.id_columns = list(id_columns)
+        self.timestamp_column = timestamp_column
+        self.every = every
+        self.rows = 0
+        self.size = 0
+        # 已统计部分的文件指纹，见 file_fingerprint
+        self.fingerprint = None
+        self.min_timestamp = None
+        self.max_timestamp = None
+        # offsets[k] 是第 k*every 行数据开始的字节位置
+        self.offsets = []
+        self.sketches = {column: HyperLogLog() for column in self.id_columns}
+
+    @property
+    def stats_path(self):
+        return self.file_path + STATS_SUFFIX
+
+    def distinct(self, column):
+        """
+        列中不同值的个数（估计值）
+        """
+        return self.sketches[column].count()
+
+    def add_rows(self, columns, count):
+        """
+        加入一批数据行的统计
+
+        :param columns: {列名: 值列表}，只需要包含ID列和时间戳列
+        :param count: 行数
+        """
+        for column, sketch in self.sketches.items():
+            if column in columns:
+                sketch.add(columns[column])
+        if self.timestamp_column in columns:
+            seconds = to_seconds(columns[self.timestamp_column])
+            if len(seconds):
+                low, high = int(seconds.min()), int(seconds.max())
+                self.min_timestamp = low if self.min_timestamp is None else min(self.min_timestamp, low)
+                self.max_timestamp = high if self.max_timestamp is None else max(self.max_timestamp, high)
+        self.rows += count
+
+    def add_offset(self, row, offset):
+        """
+        记录第 row 行数据开始的字节位置（row 为 every 的整数倍时才记录）
+        """
+        if row % self.every == 0 and row // self.every == len(self.offsets):
+            self.offsets.append(offset)
+
+    def save(self):
+        """
+        写入统计文件（先写临时文件再替换，中途退出不会留下半个文件）
+        """
+        if self.size and os.path.exists(self.file_path):
+            self.fingerprint = file_fingerprint(self.file_path, self.size)
+        data = {
+            'rows': self.rows,
+            'size': self.size,
+            'fingerprint': self.fingerprint,
+            'every': self.every,
+            'min_timestamp': self.min_timestamp,
+            'max_timestamp': self.max_timestamp,
+            'id_columns': self.id_columns,
+            'timestamp_column': self.timestamp_column,
+            'offsets': self.offsets,
+            'sketches': {column: sketch.to_text() for column, sketch in self.sketches.items()},
+        }
+        tmp_path = self.stats_path + '.tmp'
+        dump_json(data, tmp_path)
+        os.replace(tmp_path, self.stats_path)
+
+    @classmethod
+    def load(cls, file_path):
+        """
+        读取统计文件
+
+        :param file_path: CSV文件路径
+        :return: StatsIndex，统计文件不存在或无法解析时返回None
+        """
+        try:
+            data = load_json(file_path + STATS_SUFFIX)
+        except Exception:
+            return None
+        index = cls(file_path, data['id_columns'], data['timestamp_column'], data['every'])
+        index.rows = data['rows']
+        index.size = data['size']
+        index.fingerprint = data.get('fingerprint')
+        index.min_timestamp = data['min_timestamp']
+        index.max_timestamp = data['max_timestamp']
+        index.offsets = data['offsets']
+        index.sketches = {column: HyperLogLog.from_text(text) for column, text in data['sketches'].items()}
+        return index
+
+    def sync(self, chunksize=200000):
+        """
+        让索引覆盖整个文件：文件被重写过（变短，或已统计部分的指纹不一致）时从头统计，
+        只是追加了内容时只统计新增的部分
+
+        :param chunksize: 每次读取的行数
+        :return: 是否有变化
+        """
+        size = os.path.getsize(self.file_path) if os.path.exists(self.file_path) else 0
+        rewritten = size < self.size or (
+            self.size > 0 and self.fingerprint != file_fingerprint(self.file_path, self.size))
+        if rewritten:
+            self.__init__(self.file_path, self.id_columns, self.timestamp_column, self.every)
+        elif size == self.size:
+            return False
+        if size == 0:
+            return True
+        header, data_start = read_header(self.file_path)
+        start = max(self.size, data_start)
+
+        with open(self.file_path, 'rb') as f:
+            # 按字节找每隔every行的位置
+            row = self.rows
+            position = start
+            while position is not None and position < size:
+                self.add_offset(row, position)
+                step = self.every - row % self.every
+                position = find_record_end(f, step, position)
+                row += step
+
+            f.seek(start)
+            usecols = [c for c in self.id_columns + [self.timestamp_column] if c in header]
+            for chunk in pd.read_csv(f, header=None, names=header, usecols=usecols or None, dtype=str,
+                                     encoding='utf-8', chunksize=chunksize):
+                self.add_rows({column: chunk[column].tolist() for column in usecols}, len(chunk))
+        self.size = size
+        return True
+
+
+def get_stats(file_path, id_columns=(), timestamp_column=None, save=True):
+    """
+    获取文件的统计信息，优先使用统计文件，文件有变化时只补充统计新增的部分
+
+    :param file_path: CSV文件路径
+    :param id_columns: 需要统计不同值个数的列（统计文件里已有的列不需要再传）
+    :param timestamp_column: 时间戳列
+    :param save: 有更新时是否写回统计文件
+    :return: StatsIndex
+    """
+    index = StatsIndex.load(file_path)
+    missing = [column for column in id_columns if index is None or column not in index.id_columns]
+    if index is None or missing or (timestamp_column and timestamp_column != index.timestamp_column):
+        # 统计文件里没有需要的列，重新统计
+        columns = list(index.id_columns) + missing if index is not None else list(id_columns)
+        timestamp_column = timestamp_column or (index.timestamp_column if index is not None else None)
+        index = StatsIndex(file_path, columns, timestamp_column)
+    if index.sync() and save:
+        index.save()
+    return index
+
+
+def read_row_range(file_path, start, stop, index=None, **kwargs):
+    """
+    读取第 start 到 stop-1 行数据（不含表头），借助索引的字节位置直接跳到附近
+
+    :param file_path: CSV文件路径
+    :param start: 起始行
+    :param stop: 结束行（不包含）
+    :param index: StatsIndex，None时读取统计文件
+    :param kwargs: 传给 pd.read_csv 的其它参数
+    :return: DataFrame
+    """
+    index = index or get_stats(file_path)
+    header, data_start = read_header(file_path)
+    block = min(start // index.every, len(index.offsets) - 1) if index.offsets else -1
+    offset = index.offsets[block] if block >= 0 else data_start
+    skip = start - block * index.every if block >= 0 else start
+    with open(file_path, 'rb') as f:
+        f.seek(offset)
+        return pd.read_csv(f, header=None, names=header, skiprows=skip, nrows=max(stop - start, 0),
+                           encoding='utf-8', **kwargs)
@@ -0,0 +1,103 @@
+"""
+时间戳标准化工具
+功能：把各平台的时间格式（13位毫秒、10位秒、格式化时间字符串）批量转换为int64秒级时间戳，
+     避免逐行调用strptime/fromtimestamp；微博created_at字符串的逐条解析也统一放在这里
+"""
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# 微博接口返回的时间格式，例如 "Thu May 29 21:03:11 +0800 2025"
+WEIBO_TIME_FORMAT = "%a %b %d %H:%M:%S %z %Y"
+# 爬虫输出中常用的格式化时间
+DEFAULT_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _local_offsets(utc_seconds):
+    """
+    计算一组UTC秒级时间戳对应的本地时区偏移（秒，东八区为28800）。
+
+    :param utc_seconds: int64数组
+    :return: int64数组
+    """
+    if not time.daylight:
+        return np.full(len(utc_seconds), -time.timezone, dtype=np.int64)
+    # 有夏令时的时区偏移不固定，只对去重后的值逐个换算
+    codes, uniques = pd.factorize(utc_seconds)
+    offsets = np.array([time.localtime(int(ts)).tm_gmtoff for ts in uniques], dtype=np.int64)
+    return offsets[codes]
+
+
+def to_epoch_seconds(values):
+    """
+    把13位毫秒级或10位秒级时间戳批量转换为秒级时间戳，其它位数视为无效。
+
+    :param values: 时间戳序列（数字或字符串均可）
+    :return: Int64序列，无效值为空
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    numbers = pd.to_numeric(series, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+    result = np.full(len(numbers), np.nan)
+
+    # 13位：毫秒级，转成秒级
+    is_ms = (numbers >= 1e12) & (numbers < 1e13)
+    result[is_ms] = np.floor(numbers[is_ms] / 1000)
+    # 10位：秒级
+    is_s = (numbers >= 1e9) & (numbers < 1e10)
+    result[is_s] = np.floor(numbers[is_s])
+
+    return pd.Series(result, index=series.index).astype('Int64')
+
+
+def parse_local_time(values, fmt=DEFAULT_TIME_FORMAT):
+    """
+    批量把本地时间字符串转换为秒级时间戳，与 time.mktime(time.strptime(...)) 结果一致。
+
+    :param values: 时间字符串序列，例如 '2023-10-01 12:00:00'
+    :param fmt: 时间格式
+    :return: Int64序列，无法解析的值为空
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values, dtype=object)
+    dt = pd.to_datetime(series, format=fmt, errors='coerce')
+    valid = dt.notna().to_numpy()
+    # 先按UTC计算，再减去本地时区偏移
+    naive = dt[valid].to_numpy().astype('datetime64[s]').astype(np.int64)
+    stamps = naive - _local_offsets(naive + time.timezone)
+
+    result = pd.Series(pd.NA, index=series.index, dtype='Int64')
+    result[valid] = stamps
+    return result
+
+
+def weibo_time_to_timestamp(created_at):
+    """
+    把单条微博created_at字符串转换为秒级时间戳（爬虫逐条解析接口数据时使用）。
+
+    :param created_at: 时间字符串，例如 "Thu May 29 21:03:11 +0800 2025"
+    :return: 秒级时间戳
+    """
+    return int(datetime.strptime(created_at, WEIBO_TIME_FORMAT).timestamp())
+
+
+def format_weibo_time(created_at, fmt=DEFAULT_TIME_FORMAT):
+    """
+    把单条微博created_at字符串格式化为时间字符串，保持字符串自带的时区（一般为东八区）。
+
+    :param created_at: 时间字符串，例如 "Thu May 29 21:03:11 +0800 2025"
+    :param fmt: 输出的时间格式
+    :return: 时间字符串，例如 "2025-05-29 21:03:11"
+    """
+    return datetime.strptime(created_at, WEIBO_TIME_FORMAT).strftime(fmt)
+
+
+def format_timestamp(timestamp, fmt=DEFAULT_TIME_FORMAT):
+    """
+    把单个秒级时间戳格式化为本地时间字符串（爬虫逐条解析接口数据时使用）。
+
+    :param timestamp: 秒级时间戳
+    :param fmt: 时间格式
+    :return: 时间字符串
+    """
+    return datetime.fromtimestamp(timestamp).strftime(fmt)
@@ -0,0 +1,147 @@
+"""
+增量爬取的高水位记录
+功能：记住每个帖子上次爬到的最新评论（ID、时间）和评论数，再次爬取时按时间倒序翻页，
+     遇到已经爬过的评论就停止，只抓新增的部分
+"""
+import os
+import threading
+import time
+
+from common.json_utils import load_json, dump_json
+
+
+class WatermarkStore:
+    """
+    帖子 -> 高水位 的JSON持久化存储，线程安全
+    """
+
+    def __init__(self, file_path):
+        """
+        Args:
+            file_path: JSON文件路径，不存在时自动创建
+        """
+        self.file_path = file_path
+        self._lock = threading.Lock()
+        self.marks = load_json(file_path) if os.path.exists(file_path) else {}
+
+    def __len__(self):
+        return len(self.marks)
+
+    def __contains__(self, key):
+        return str(key) in self.marks
+
+    def get(self, key):
+        """
+        取得帖子的高水位
+
+        Args:
+            key: 帖子ID（微博mid、知乎文章/回答ID）
+
+        Returns:
+            dict，包含 newest_id / newest_created_at / comments_count / cursor / updated_at，没有记录时返回None
+        """
+        with self._lock:
+            mark = self.marks.get(str(key))
+            return dict(mark) if mark else None
+
+    def update(self, key, newest_id=None, newest_created_at=None, comments_count=None, cursor=None, save=True):
+        """
+        更新帖子的高水位，ID和时间只会往前推进
+
+        Args:
+            key: 帖子ID
+            newest_id: 本次见到的最新评论ID
+            newest_created_at: 本次见到的最新评论时间
+            comments_count: 帖子当前的评论数
+            cursor: 未爬完时下一页的地址，用于断点续爬，传入空字符串表示已经爬完（清除）
+            save: 是否立即写回文件
+        """
+        with self._lock:
+            mark = self.marks.setdefault(str(key), {})
+            if newest_id is not None and int(newest_id) > int(mark.get('newest_id') or 0):
+                mark['newest_id'] = int(newest_id)
+            if newest_created_at is not None and newest_created_at > (mark.get('newest_created_at') or 0):
+                mark['newest_created_at'] = newest_created_at
+            if comments_count is not None:
+                mark['comments_count'] = comments_count
+            if cursor:
+                mark['cursor'] = cursor
+            elif cursor is not None:
+                mark.pop('cursor', None)
+            mark['updated_at'] = int(time.time())
+            if save:
+                self._save()
+
+    def save(self):
+        """
+        写回文件
+        """
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        output_dir = os.path.dirname(self.file_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        tmp_path = self.file_path + '.tmp'
+        dump_json(self.marks, tmp_path)
+        os.replace(tmp_path, self.file_path)
+
+
+class IncrementalCursor:
+    """
+    单个帖子一次增量爬取的状态：判断评论是否已经爬过，连续遇到若干条旧评论后停止翻页
+    （不在见到第一条旧评论时就停，是为了跳过置顶的旧评论）
+    """
+
+    def __init__(self, watermark=None, stop_after=5):
+        """
+        Args:
+            watermark: WatermarkStore.get 的返回值，None表示没有历史记录（全量爬取）
+            stop_after: 连续遇到多少条旧评论后停止
+        """
+        self.since_id = int(watermark['newest_id']) if watermark and watermark.get('newest_id') else None
+        self.stop_after = stop_after
+        self.seen_streak = 0
+        self.newest_id = None
+        self.newest_created_at = None
+        self.new_count = 0
+
+    def is_seen(self, comment_id, created_at=None):
+        """
+        判断一条评论是否已经爬过，同时记录本次见到的最新评论
+
+        Args:
+            comment_id: 评论ID（递增的数字ID）
+            created_at: 评论时间
+
+        Returns:
+            bool
+        """
+        comment_id = int(comment_id)
+        if self.newest_id is None or comment_id > self.newest_id:
+            self.newest_id = comment_id
+            self.newest_created_at = created_at
+        if self.since_id is not None and comment_id <= self.since_id:
+            self.seen_streak += 1
+            return True
+        self.seen_streak = 0
+        self.new_count += 1
+        return False
+
+    @property
+    def should_stop(self):
+        return self.since_id is not None and self.seen_streak >= self.stop_after
+
+    def commit(self, store, key, comments_count=None, save=True):
+        """
+        把本次见到的最新评论写回高水位记录
+
+        Args:
+            store: WatermarkStore
+            key: 帖子ID
+            comments_count: 帖子当前的评论数
+            save: 是否立即写回文件
+        """
+        store.update(key, newest_id=self.newest_id, newest_created_at=self.newest_created_at,
+                     comments_count=comments_count, save=save)
@@ -2,6 +2,12 @@ import pandas as pd
 import re
 from bs4 import BeautifulSoup
 from datetime import datetime
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.label_utils import extract_label_groups, MULTIMODAL_LABEL_PATTERN
+from common.schema import read_table, save_table
 
 
 def extract_mentions(text):
@@ -130,8 +136,8 @@ def save_matched_info_from_meta_data(meta_file, comment_file):
     根据评论数据中的aweme_id，筛选出元数据中匹配的记录
     """
     # 读取CSV文件
-    meta_df = pd.read_csv(meta_file, encoding='utf-8', dtype={'aweme_id': str})
-    comment_df = pd.read_csv(comment_file, encoding='utf-8', dtype={'aweme_id': str, 'cid': str})
+    meta_df = read_table(meta_file, 'douyin')
+    comment_df = read_table(comment_file, 'douyin')
 
     # 检查是否包含 'aweme_id' 列
     if 'aweme_id' not in meta_df.columns or 'aweme_id' not in comment_df.columns:
@@ -139,10 +145,10 @@ def save_matched_info_from_meta_data(meta_file, comment_file):
         return
 
     # 获取comment_df中所有的aweme_id
-    comment_aweme_ids = set(comment_df['aweme_id'].dropna().astype(str))
+    comment_aweme_ids = comment_df['aweme_id'].dropna().unique()
 
     # 匹配到的行
-    matched_meta = meta_df[meta_df['aweme_id'].astype(str).isin(comment_aweme_ids)]
+    matched_meta = meta_df[meta_df['aweme_id'].isin(comment_aweme_ids)]
 
     # 保存匹配到的行到新的CSV文件
     print(f"从 {len(meta_df)} 条元数据中匹配到 {len(matched_meta)} 条记录")
@@ -156,8 +162,8 @@ def save_matched_info_from_comment_data(comment_file, meta_file):
     根据元数据中的aweme_id，筛选出评论数据中匹配的记录
     """
     # 读取CSV文件
-    comment_df = pd.read_csv(comment_file, encoding='utf-8', dtype={'aweme_id': str, 'cid': str})
-    meta_df = pd.read_csv(meta_file, encoding='utf-8', dtype={'aweme_id': str})
+    comment_df = read_table(comment_file, 'douyin')
+    meta_df = read_table(meta_file, 'douyin')
 
     # 检查是否包含 'aweme_id' 列
     if 'aweme_id' not in comment_df.columns or 'aweme_id' not in meta_df.columns:
@@ -165,10 +171,10 @@ def save_matched_info_from_comment_data(comment_file, meta_file):
         return
 
     # 获取meta_df中所有的aweme_id
-    meta_aweme_ids = set(meta_df['aweme_id'].dropna().astype(str))
+    meta_aweme_ids = meta_df['aweme_id'].dropna().unique()
 
     # 匹配到的行
-    matched_comment = comment_df[comment_df['aweme_id'].astype(str).isin(meta_aweme_ids)]
+    matched_comment = comment_df[comment_df['aweme_id'].isin(meta_aweme_ids)]
 
     # 保存匹配到的行到新的CSV文件
     print(f"从 {len(comment_df)} 条评论数据中匹配到 {len(matched_comment)} 条记录")
@@ -182,16 +188,7 @@ def clean_douyin_comments_data(input_file, output_file):
     清理抖音评论数据
     """
     # 读取CSV文件cid,text,aweme_id,create_time,digg_count,status,uid,nickname,reply_id,reply_comment,text_extra,reply_to_reply_id,is_note_comment,ip_label,root_comment_id,level,cotent_type
-    try:
-        df = pd.read_csv(input_file, encoding="utf-8-sig", dtype={'aweme_id': str, 'cid': str,
-                         'uid': str, 'reply_id': str, 'reply_to_reply_id': str, 'root_comment_id': str})
-    except:
-        try:
-            df = pd.read_csv(input_file, encoding="gbk", dtype={'aweme_id': str, 'cid': str,
-                             'uid': str, 'reply_id': str, 'reply_to_reply_id': str, 'root_comment_id': str})
-        except:
-            df = pd.read_csv(input_file, encoding="utf-8", dtype={'aweme_id': str, 'cid': str,
-                             'uid': str, 'reply_id': str, 'reply_to_reply_id': str, 'root_comment_id': str})
+    df = read_table(input_file, 'douyin')
 
     # 输出原始条目数
     print(f"原始CSV文件包含 {len(df)} 条记录")
@@ -234,7 +231,7 @@ def clean_douyin_comments_data(input_file, output_file):
     print(f"包含@用户名的记录数：{mention_count}")
 
     # 保存清理后的数据
-    df.to_csv(output_file, index=False, encoding="utf-8-sig")
+    save_table(df, output_file)
     print(f"清理后的数据已保存到：{output_file}")
 
 
@@ -243,13 +240,7 @@ def clean_douyin_meta_data(input_file, output_file):
     清理抖音元数据
     """
     # 读取CSV文件
-    try:
-        df = pd.read_csv(input_file, encoding="utf-8-sig", dtype={'aweme_id': str, 'author_uid': str, 'music_id': str})
-    except:
-        try:
-            df = pd.read_csv(input_file, encoding="gbk", dtype={'aweme_id': str, 'author_uid': str, 'music_id': str})
-        except:
-            df = pd.read_csv(input_file, encoding="utf-8", dtype={'aweme_id': str, 'author_uid': str, 'music_id': str})
+    df = read_table(input_file, 'douyin')
 
     # 输出原始条目数
     print(f"原始CSV文件包含 {len(df)} 条记录")
@@ -293,7 +284,7 @@ def clean_douyin_meta_data(input_file, output_file):
     df['hashtag_count'] = df['hashtags'].apply(lambda x: len(x.split(', ')) if x else 0)
 
     # 保存清理后的数据
-    df.to_csv(output_file, index=False, encoding="utf-8-sig")
+    save_table(df, output_file)
     print(f"清理后的数据已保存到：{output_file}")
 
 
@@ -361,76 +352,31 @@ if __name__ == "__main__":
     # save_matched_info_from_comment_data('douyin/douyin_results_final/cleaned_douyin_comments_ds.csv',
     #                                     'douyin/douyin_results_final/cleaned_douyin_meta_data_matched.csv')
 
-    # rename
-    # cid,text,aweme_id,create_time,digg_count,status,uid,nickname,reply_id,reply_comment,text_extra,reply_to_reply_id,is_note_comment,ip_label,root_comment_id,level,cotent_type,mentions,ds_stance,ds_sentiment,ds_intent
-    input_file = "douyin/douyin_results_final/cleaned_douyin_comments_ds_matched.csv"
-    output_file = "douyin/douyin_results_final/cleaned_douyin_comments_ds_renamed.csv"
-
-    df = pd.read_csv(input_file, encoding='utf-8-sig', dtype=str)
-    # 重命名列
-    df.rename(columns={'cid': 'comment_id',
-                       'text': 'content',
-                       'aweme_id': 'article_id',
-                       'create_time': 'created_time',
-                       'digg_count': 'like_count',
-                       'nickname': 'username',
-                       'reply_id': 'parent_comment_id',
-                       'reply_to_reply_id': 'parent_parent_comment_id',
-                       'text_extra': 'extra_info',
-                       'ip_label': 'location',
-                       'root_comment_id': 'root_comment_id',
-                       'ds_stance': 'stance',
-                       'ds_sentiment': 'sentiment',
-                       'ds_intent': 'intent'}, inplace=True)
-    # 保存重命名后的数据
-    df.to_csv(output_file, index=False, encoding='utf-8-sig')
-
+    # 评论和元数据的列名在读入时按 common.schema.COLUMN_MAPPINGS 统一，评论不再单独生成 _renamed.csv
+    # （见 utils.split_multi_stance(..., platform='douyin')），元数据还需要把 multimodal_stance 拆分成三列
     input_file = "douyin/douyin_results_final/cleaned_douyin_meta_data_matched.csv"
     output_file = "douyin/douyin_results_final/cleaned_douyin_meta_data_renamed.csv"
 
     # aweme_id,desc,create_time,author_uid,author_name,gender,follower_count,music_id,music_urls,video_url,duration,cover_url,share_url,comment_count,digg_count,share_count,collect_count,hashtags,text_length,hashtag_count,multimodal_stance
-    df = pd.read_csv(input_file, encoding='utf-8-sig', dtype=str)
-    # 重命名列
-    df.rename(columns={'aweme_id': 'article_id',
-                       'desc': 'content',
-                       'create_time': 'created_time',
-                       'author_uid': 'uid',
-                       'author_name': 'username',
-                       'video_url': 'video_urls',
-                       'digg_count': 'like_count'}, inplace=True)
+    df = read_table(input_file, 'douyin', dtype=str, categorical=False, kind='meta')
     # 针对multimodal_stance列进行处理
     # 例如："[中立, 事实报道],[中立, 事实陈述],[信息验证, 事实核实]"
     # 按照列表分成三列
     if 'multimodal_stance' in df.columns:
         print("正在处理multimodal_stance列...")
 
-        def parse_multimodal_stance(stance_str):
-            if pd.isna(stance_str) or stance_str == '':
-                return pd.Series(['', '', ''])
-
-            try:
-                stance_str = str(stance_str).strip()
-
-                # 使用正则表达式提取三个完整的列表内容
-                pattern = r'\[([^\]]+)\],\[([^\]]+)\],\[([^\]]+)\]'
-                match = re.search(pattern, stance_str)
-
-                if match:
-                    stance = f"[{match.group(1)}]"      # [中立, 事实报道]
-                    sentiment = f"[{match.group(2)}]"   # [中立, 事实陈述]
-                    intent = f"[{match.group(3)}]"      # [信息验证, 事实核实]
-                    return pd.Series([stance, sentiment, intent])
-                else:
-                    print(f"格式异常: {stance_str}")
-                    return pd.Series(['', '', ''])
-
-            except Exception as e:
-                print(f"解析错误 {stance_str}: {e}")
-                return pd.Series(['', '', ''])
-
-        # 应用解析函数
-        stance_df = df['multimodal_stance'].apply(parse_multimodal_stance)
-        stance_df.columns = ['stance', 'sentiment', 'intent']
+        # 使用正则表达式整列提取三个完整的列表内容，例如
+        # [中立, 事实报道],[中立, 事实陈述],[信息验证, 事实核实]
+        groups = extract_label_groups(df['multimodal_stance'], MULTIMODAL_LABEL_PATTERN)
+        matched = groups['stance'].notna()
+        stance_df = ('[' + groups + ']').fillna('')
+
+        # 非空但格式不符合的行
+        invalid = df['multimodal_stance'].fillna('').astype(str).str.strip().ne('') & ~matched
+        if invalid.any():
+            print(f"格式异常: {invalid.sum()} 条，例如:")
+            for stance_str in df.loc[invalid, 'multimodal_stance'].head(5):
+                print(f"  {stance_str}")
 
         # 将新列添加到原始DataFrame中
         df = pd.concat([df, stance_df], axis=1)
@@ -1,68 +1,127 @@
 import pandas as pd
-import json
 import os
-import time
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.json_utils import load_json
+from common.time_utils import parse_local_time
 
 # merge_comments_data from json files to csv files
 
+# 评论字段：(输出列名, JSON中的键, 默认值) | Comment fields: (output column, JSON key, default)
+COMMENT_FIELDS = [
+    ('cid', 'cid', ''),
+    ('text', 'text', ''),
+    ('aweme_id', 'aweme_id', ''),
+    ('create_time', 'create_time', ''),
+    ('digg_count', 'digg_count', 0),
+    ('status', 'status', 0),
+    ('uid', 'uid', ''),
+    ('nickname', 'nickname', ''),
+    ('reply_id', 'reply_id', ''),
+    ('reply_comment', 'reply_comment', ''),
+    ('text_extra', 'text_extra', []),
+    ('reply_to_reply_id', 'reply_to_reply_id', ''),
+    ('is_note_comment', 'is_note_comment', 0),
+    ('ip_label', 'ip_label', ''),
+    ('root_comment_id', 'root_comment_id', ''),
+    ('level', 'level', 0),
+    ('cotent_type', 'cotent_type', 0),
+]
+
+# 视频字段：(输出列名, JSON中的键, 默认值) | Video fields: (output column, JSON key, default)
+BODY_FIELDS = [
+    ('aweme_id', 'aweme_id', ''),
+    ('desc', 'desc', ''),
+    ('create_time', 'create_time', ''),
+    ('author_uid', 'author', ''),
+    ('author_name', 'author_name', ''),
+    ('gender', 'gender', 0),
+    ('follower_count', 'follower_count', 0),
+    ('music_id', 'music_id', ''),
+    ('music_urls', 'music_urls', []),
+    ('video_url', 'video_url', []),
+    ('duration', 'duration', 0),
+    ('cover_url', 'cover_url', []),
+    ('share_url', 'share_url', ''),
+    ('comment_count', 'comment_count', 0),
+    ('digg_count', 'digg_count', 0),
+    ('share_count', 'share_count', 0),
+    ('collect_count', 'collect_count', 0),
+]
+
+
+def read_json_columns(file_path, fields):
+    """
+    读取单个JSON文件，按列返回数据（在子进程中运行）| Read one JSON file and return column arrays (runs in a worker process).
+
+    :param file_path: JSON文件路径 | JSON file path.
+    :param fields: 字段列表 | Field list.
+    :return: {列名: 值列表}，读取失败时返回None | {column: values}, None on failure.
+    """
+    try:
+        data = load_json(file_path)
+    except Exception as e:
+        print(f"读取 {file_path} 时出错: {e}")
+        return None
+
+    columns = {name: [] for name, _, _ in fields}
+    for name, key, default in fields:
+        column = columns[name]
+        for item in data:
+            column.append(item.get(key, default))
+    return columns
+
+
+def parallel_read_columns(input_dir, fields, max_workers=None):
+    """
+    用进程池并行解析目录中的所有JSON文件，并把各文件的列拼接起来 | Parse all JSON files in parallel and concatenate their columns.
 
-def merge_comments(input_dir, output_file):
+    :param input_dir: 输入目录 | Input directory.
+    :param fields: 字段列表 | Field list.
+    :param max_workers: 进程数，默认为CPU核数 | Number of worker processes, defaults to CPU count.
+    :return: {列名: 值列表} | {column: values}
+    """
+    file_paths = [os.path.join(input_dir, filename)
+                  for filename in sorted(os.listdir(input_dir)) if filename.endswith('.json')]
+    columns = {name: [] for name, _, _ in fields}
+    if not file_paths:
+        return columns
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        # map保持文件顺序，保证去重时保留的记录与顺序读取一致 | map keeps file order so dedup keeps the same rows
+        for part in executor.map(read_json_columns, file_paths, repeat(fields), chunksize=4):
+            if part is None:
+                continue
+            for name, values in part.items():
+                columns[name].extend(values)
+    return columns
+
+
+def merge_comments(input_dir, output_file, max_workers=None):
     """
     合并评论数据 | Merge comment data from JSON files to a single CSV file.
 
     :param input_dir: 输入目录，包含多个JSON文件 | Input directory containing multiple JSON files.
     :param output_file: 输出CSV文件路径 | Output CSV file path.
+    :param max_workers: 解析JSON文件的进程数 | Number of processes used to parse JSON files.
     """
-    all_comments = []
-
-    # 遍历输入目录中的所有JSON文件 | Iterate through all JSON files in the input directory
-    for filename in os.listdir(input_dir):
-        if filename.endswith('.json'):
-            file_path = os.path.join(input_dir, filename)
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                for i in range(len(data)):
-                    comment = data[i]
-                    # 提取评论信息 | Extract comment information
-                    comment_info = {
-                        'cid': comment.get('cid', ''),
-                        'text': comment.get('text', ''),
-                        'aweme_id': comment.get('aweme_id', ''),
-                        'create_time': comment.get('create_time', ''),
-                        'digg_count': comment.get('digg_count', 0),
-                        'status': comment.get('status', 0),
-                        'uid': comment.get('uid', ''),
-                        'nickname': comment.get('nickname', ''),
-                        'reply_id': comment.get('reply_id', ''),
-                        'reply_comment': comment.get('reply_comment', ''),
-                        'text_extra': comment.get('text_extra', []),
-                        'reply_to_reply_id': comment.get('reply_to_reply_id', ''),
-                        'is_note_comment': comment.get('is_note_comment', 0),
-                        'ip_label': comment.get('ip_label', ''),
-                        'root_comment_id': comment.get('root_comment_id', ''),
-                        'level': comment.get('level', 0),
-                        'cotent_type': comment.get('cotent_type', 0),
-                    }
-                    all_comments.append(comment_info)
+    # 并行读取所有JSON文件，按列返回 | Read all JSON files in parallel as columns
+    columns = parallel_read_columns(input_dir, COMMENT_FIELDS, max_workers)
 
     # 将所有评论数据转换为DataFrame | Convert all comments to a DataFrame
-    df = pd.DataFrame(all_comments)
-
-    # 写下表头
-    if not df.empty:
-        df.columns = ['cid', 'text', 'aweme_id', 'create_time', 'digg_count', 'status', 'uid', 'nickname',
-                      'reply_id', 'reply_comment', 'text_extra', 'reply_to_reply_id',
-                      'is_note_comment', 'ip_label', 'root_comment_id', 'level', 'cotent_type']
-    else:
+    df = pd.DataFrame(columns)
+
+    if df.empty:
         print("没有找到任何评论数据。")  # No comment data found
         return
 
-    # 根据 cid, aweme_id, create_time 去重 | Remove duplicates based on cid, aweme_id, create_time
-    df.drop_duplicates(subset=['cid', 'text', 'aweme_id', 'create_time'], inplace=True)
-    # 把text小于等于3的评论删除 | Remove comments with text length less than or equal to 3
-    df = df[df['text'].str.len() > 3]
-    # 重置索引 | Reset index
-    df.reset_index(drop=True, inplace=True)
+    # 一次完成去重和过滤 | Dedup and filter in one pass
+    # 根据 cid, text, aweme_id, create_time 去重，并删除text小于等于3的评论 | Remove duplicates and comments with text length <= 3
+    keep = ~df.duplicated(subset=['cid', 'text', 'aweme_id', 'create_time']) & (df['text'].str.len() > 3)
+    df = df[keep].reset_index(drop=True)
     # 检查是否有数据 | Check if there is any data
     if df.empty:
         print("没有找到任何评论数据。")  # No comment data found
@@ -72,61 +131,27 @@ def merge_comments(input_dir, output_file):
     print(f"合并完成，数据已保存到 {output_file}")  # Merge complete, data saved to output_file
 
 
-def merge_body(input_dir, output_file):
+def merge_body(input_dir, output_file, max_workers=None):
     """
     合并视频数据 | Merge video data from JSON files to a single CSV file.
 
     :param input_dir: 输入目录，包含多个JSON文件 | Input directory containing multiple JSON files.
     :param output_file: 输出CSV文件路径 | Output CSV file path.
+    :param max_workers: 解析JSON文件的进程数 | Number of processes used to parse JSON files.
     """
-    all_videos = []
-
-    # 遍历输入目录中的所有JSON文件 | Iterate through all JSON files in the input directory
-    for filename in os.listdir(input_dir):
-        if filename.endswith('.json'):
-            file_path = os.path.join(input_dir, filename)
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                for item in data:
-                    # 提取视频信息 | Extract video information
-                    video_info = {
-                        'aweme_id': item.get('aweme_id', ''),
-                        'desc': item.get('desc', ''),
-                        # 'create_time': item.get('create_time', '')
-                        # time转成 timestamp, 获取到的是字符串 比如 '2023-10-01 12:00:00' | Convert time to timestamp, get a string like '2023-10-01 12:00:00'
-                        'create_time': int(time.mktime(time.strptime(item.get('create_time', ''), '%Y-%m-%d %H:%M:%S'))),
-                        'author_uid': item.get('author', ''),
-                        'author_name': item.get('author_name', ''),
-                        'gender': item.get('gender', 0),
-                        'follower_count': item.get('follower_count', 0),
-                        'music_id': item.get('music_id', ''),
-                        'music_urls': item.get('music_urls', []),
-                        'video_url': item.get('video_url', []),
-                        'duration': item.get('duration', 0),
-                        'cover_url': item.get('cover_url', []),
-                        'share_url': item.get('share_url', ''),
-                        'comment_count': item.get('comment_count', 0),
-                        'digg_count': item.get('digg_count', 0),
-                        'share_count': item.get('share_count', 0),
-                        'collect_count': item.get('collect_count', 0),
-                    }
-                    all_videos.append(video_info)
-
-    # 将所有视频数据转换为DataFrame | Convert all videos to a DataFrame
-    df = pd.DataFrame(all_videos)
-    # 写下表头
-    if not df.empty:
-        df.columns = ['aweme_id', 'desc', 'create_time', 'author_uid', 'author_name',
-                      'gender', 'follower_count', 'music_id', 'music_urls',
-                      'video_url', 'duration', 'cover_url', 'share_url',
-                      'comment_count', 'digg_count', 'share_count', 'collect_count']
-    else:
+    # 并行读取所有JSON文件，按列返回 | Read all JSON files in parallel as columns
+    columns = parallel_read_columns(input_dir, BODY_FIELDS, max_workers)
+    if not columns['aweme_id']:
         print("没有找到任何视频数据。")
         return
+
+    # time转成 timestamp, 获取到的是字符串 比如 '2023-10-01 12:00:00' | Convert time to timestamp, get a string like '2023-10-01 12:00:00'
+    columns['create_time'] = parse_local_time(columns['create_time'])
+
+    # 将所有视频数据转换为DataFrame | Convert all videos to a DataFrame
+    df = pd.DataFrame(columns)
     # 根据 aweme_id, desc, create_time 去重 | Remove duplicates based on aweme_id, desc, create_time
-    df.drop_duplicates(subset=['aweme_id', 'desc', 'create_time'], inplace=True)
-    # 重置索引 | Reset index
-    df.reset_index(drop=True, inplace=True)
+    df = df[~df.duplicated(subset=['aweme_id', 'desc', 'create_time'])].reset_index(drop=True)
     # 检查是否有数据 | Check if there is any data
     if df.empty:
         print("没有找到任何视频数据。")  # No video data found
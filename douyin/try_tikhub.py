@@ -1,11 +1,14 @@
 # 导入异步io库 | Import asyncio
 import asyncio
-import json
 import os
 import requests
+import sys
 import time
 from dotenv import load_dotenv
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.json_utils import dump_json
+
 
 if __name__ == "__main__":
     # 加载环境变量
@@ -51,9 +54,8 @@ if __name__ == "__main__":
 
         # search_id = video_data.get("data", {}).get("extra", {}).get("logid", "")
         # print(f"第 {i} 次请求成功，新的search_id为: {search_id}")
-        with open(f"douyin/douyin_results_tikhub_new/video_data_3_{i}.json", "w", encoding="utf-8") as f:
-            # video_data 是 一个字典 | video_data is a dictionary
-            json.dump(video_data, f, ensure_ascii=False, indent=2)
+        # video_data 是 一个字典 | video_data is a dictionary
+        dump_json(video_data, f"douyin/douyin_results_tikhub_new/video_data_3_{i}.json")
         # 输出提示信息 | Print a message
         print(f"数据已保存到 video_data_3_{i}.json")  # 输出提示信息 | Print a message
         if video_data.get("data", {}).get("has_more", 0) == 0:
@@ -1,8 +1,12 @@
 import json
 import os
 import re
+import sys
 import time
-from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.json_utils import load_json, dump_json, iter_json_items, write_json_array
+from common.time_utils import format_timestamp
 
 
 def get_json_data_from_file(file_path):
@@ -15,19 +19,42 @@ def get_json_data_from_file(file_path):
         print(f"文件 {file_path} 不存在")
         return None
 
-    with open(file_path, 'r', encoding='utf-8') as file:
-        try:
-            data = json.load(file)
-            return data
-        except json.JSONDecodeError as e:
-            print(f"读取JSON文件时出错: {e}")
-            return None
+    try:
+        return load_json(file_path)
+    except json.JSONDecodeError as e:
+        print(f"读取JSON文件时出错: {e}")
+        return None
+
+
+def iter_json_data_from_file(file_path):
+    """
+    逐条读取TikHub搜索结果文件中 data -> data 数组里的视频记录，不加载整个文件。
+
+    :param file_path: JSON文件的路径
+    :return: 原始视频记录生成器
+    """
+    if not os.path.exists(file_path):
+        print(f"文件 {file_path} 不存在")
+        return
+
+    try:
+        yield from iter_json_items(file_path, 'data.data.item')
+    except json.JSONDecodeError as e:
+        print(f"读取JSON文件时出错: {e}")
 
 
 def get_data_from_json(data):
-    data_list = []
-    data = data['data'].get('data', [])
-    for item in data:
+    return list(iter_data_from_items(data['data'].get('data', [])))
+
+
+def iter_data_from_items(items):
+    """
+    从原始视频记录中提取所需字段。
+
+    :param items: 原始视频记录的可迭代对象（可以是生成器）
+    :return: 提取后的视频数据生成器
+    """
+    for item in items:
         if item.get('type') != 1:
             continue
         aweme_id = item.get('aweme_info', {}).get('aweme_id', '')
@@ -61,10 +88,10 @@ def get_data_from_json(data):
         # follower_count = item['aweme_info']['author']['follower_count'],
         follower_count = item['aweme_info']['author'].get('follower_count', 0)
 
-        data_list.append({
+        yield {
             'aweme_id': aweme_id,
             'desc': desc,
-            'create_time': datetime.fromtimestamp(create_time).strftime('%Y-%m-%d %H:%M:%S'),
+            'create_time': format_timestamp(create_time),
             'author': author,
             'author_name': author_name,
             'gender': gender,
@@ -79,23 +106,21 @@ def get_data_from_json(data):
             'digg_count': digg_count,
             'share_count': share_count,
             'collect_count': collect_count
-        })
-
-    return data_list
+        }
 
 
-def save_data_to_json(data, file_path):
+def save_data_to_json(data, file_path, pretty=False):
     """
     将数据保存到指定的JSON文件中。
 
     :param data: 要保存的数据
+    :param pretty: 是否缩进美化输出，默认紧凑输出
     """
-    with open(file_path, 'w', encoding='utf-8') as file:
-        try:
-            json.dump(data, file, ensure_ascii=False, indent=4)
-            print(f"数据已保存到 {file_path}")
-        except Exception as e:
-            print(f"保存数据时出错: {e}")
+    try:
+        dump_json(data, file_path, pretty=pretty)
+        print(f"数据已保存到 {file_path}")
+    except Exception as e:
+        print(f"保存数据时出错: {e}")
 
 
 def delete_same_data(data):
@@ -105,33 +130,39 @@ def delete_same_data(data):
     :param data: 包含数据的列表
     :return: 删除重复数据后的列表
     """
+    return list(iter_unique_data(data))
+
+
+def iter_unique_data(data):
+    """
+    按aweme_id去重，逐条产出第一次出现的数据。
+
+    :param data: 数据的可迭代对象（可以是生成器）
+    :return: 去重后的数据生成器
+    """
     seen = set()
-    unique_data = []
     for item in data:
         aweme_id = item.get('aweme_id')
         if aweme_id not in seen:
             seen.add(aweme_id)
-            unique_data.append(item)
-    return unique_data
+            yield item
 
 
 if __name__ == "__main__":
     # 打开指定文件夹，读取所有JSON文件
     folder_path = 'douyin/douyin_results_tikhub_new'
-    all_data = []
-    for file_name in os.listdir(folder_path):
-        if file_name.endswith('.json'):
-            file_path = os.path.join(folder_path, file_name)
-            data = get_json_data_from_file(file_path)
-            if data:
-                all_data.extend(get_data_from_json(data))
-    # 删除重复数据
-    all_data = delete_same_data(all_data)
-    # 打印数据条数
-    print(f"总数据条数: {len(all_data)}")
-    # 保存所有数据到一个新的JSON文件
+
+    def iter_all_items():
+        for file_name in os.listdir(folder_path):
+            if file_name.endswith('.json'):
+                yield from iter_json_data_from_file(os.path.join(folder_path, file_name))
+
+    # 流式提取、去重并保存所有数据到一个新的JSON文件
     output_file_path = 'douyin/all_data2.json'
-    save_data_to_json(all_data, output_file_path)
+    total = write_json_array(iter_unique_data(iter_data_from_items(iter_all_items())), output_file_path)
+    # 打印数据条数
+    print(f"总数据条数: {total}")
+    print(f"数据已保存到 {output_file_path}")
 
     # # 对比两个JSON文件的数据，将不同的数据保存到一个新的JSON文件
     # file1_path = 'douyin/all_data.json'
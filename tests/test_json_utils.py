@@ -0,0 +1,30 @@
+import io
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.json_utils import _iter_top_level_array
+
+DOCUMENTS = [
+    '[1.5, 2.25, 3, 1e10, true]',
+    '[-0.5,1E-3,12345678901234567890,false,null]',
+    '[{"a": [1, 2.5]}, "x,]y", {"b": -1.25e+3}]',
+    ' [ 1 , 2.0 ]\n',
+    '[]',
+]
+
+
+@pytest.mark.parametrize('text', DOCUMENTS)
+@pytest.mark.parametrize('chunk_size', range(1, 17))
+def test_chunk_boundaries(text, chunk_size):
+    # 在任意位置截断缓冲区（包括数字中间），结果都应与一次性解析相同
+    items = list(_iter_top_level_array(io.StringIO(text), chunk_size))
+    assert items == json.loads(text)
+
+
+def test_truncated_array():
+    with pytest.raises(json.JSONDecodeError):
+        list(_iter_top_level_array(io.StringIO('[1, 2'), 4))
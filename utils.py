@@ -1,78 +1,177 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
 import matplotlib
 import matplotlib.pyplot as plt
-import re
+
+from common.label_utils import split_label_columns, print_label_samples
+from common.schema import read_table
+from common.time_utils import to_epoch_seconds
 
 matplotlib.rc('font', family='SimHei')  # 设置字体为黑体，支持中文显示
 
 
+def reservoir_sample(chunks, sample_size, seed=42, stratify_by=None):
+    """
+    对分块读入的数据做一遍扫描的蓄水池抽样：给每行一个随机键，只保留键最小的 sample_size 行，
+    等价于从全部数据中均匀无放回抽样，内存只和样本大小（分层时为层数×每层样本大小）有关。
+
+    :param chunks: DataFrame 的可迭代对象（如 pd.read_csv(..., chunksize=...)）
+    :param sample_size: 样本大小；分层抽样时为每一层的样本大小
+    :param seed: 随机种子，相同的种子和输入得到相同的样本
+    :param stratify_by: 分层的列名（或列名列表），如 'platform'、'mid'、'stance'，None表示不分层
+    :return: 抽样结果 DataFrame，按随机键排序
+    """
+    rng = np.random.default_rng(seed)
+    sample = None
+    for chunk in chunks:
+        chunk = chunk.assign(_sample_key=rng.random(len(chunk)))
+        sample = chunk if sample is None else pd.concat([sample, chunk], ignore_index=True)
+        if stratify_by is None:
+            sample = sample.nsmallest(sample_size, '_sample_key')
+        else:
+            sample = sample.sort_values('_sample_key').groupby(stratify_by, dropna=False, sort=False).head(sample_size)
+    if sample is None:
+        return pd.DataFrame()
+    return sample.sort_values('_sample_key').drop(columns='_sample_key').reset_index(drop=True)
+
+
 # 从csv文件中随机选取100条数据，保存在output_file中
-def sample_random_data(input_file, output_file, sample_size=100):
+def sample_random_data(input_file, output_file, sample_size=100, seed=42, stratify_by=None, chunksize=100000):
     """
     从CSV文件中随机选取指定数量的数据，并保存到新的CSV文件中。
+    按块流式读取，几个GB的评论文件也只占用一个块的内存。
 
     :param input_file: 输入CSV文件路径
     :param output_file: 输出CSV文件路径
-    :param sample_size: 随机选取的数据条数，默认为100
+    :param sample_size: 随机选取的数据条数，默认为100；分层抽样时为每一层的条数
+    :param seed: 随机种子，默认为42
+    :param stratify_by: 分层抽样的列名（或列名列表），默认不分层
+    :param chunksize: 每次读取的行数
     """
     try:
-        # 读取CSV文件
-        df = pd.read_csv(input_file, encoding='utf-8-sig', low_memory=False, dtype=str)
+        # 分块读取CSV文件
+        chunks = pd.read_csv(input_file, encoding='utf-8-sig', dtype=str, chunksize=chunksize)
         # 随机选取指定数量的数据
-        sampled_df = df.sample(n=sample_size, random_state=42)
+        sampled_df = reservoir_sample(chunks, sample_size, seed=seed, stratify_by=stratify_by)
         # 保存到新的CSV文件
         sampled_df.to_csv(output_file, index=False)
-        print(f"已从 {input_file} 中随机选取 {sample_size} 条数据，并保存到 {output_file}")
+        print(f"已从 {input_file} 中随机选取 {len(sampled_df)} 条数据，并保存到 {output_file}")
     except Exception as e:
         print(f"处理数据时出错: {e}")
 
 
-# 从csv文件中读取时间戳，并按照时间戳排序和统计不同天数，只关注时间戳列
-def read_and_sort_timestamps(input_file, timestamp_col='timestamp'):
+# 统计粒度对应的秒数
+BIN_SECONDS = {'D': 86400, 'H': 3600}
+
+
+def count_timestamps(input_file, timestamp_col='timestamp', freq='D', chunksize=500000):
     """
-    从CSV文件中读取时间戳列，按照时间戳排序，并统计不同天数。
+    流式统计CSV文件中每天（或每小时）的数据条数：只读取时间戳列，按块转换成秒级时间戳后用 np.bincount 分桶累加。
 
     :param input_file: 输入CSV文件路径
     :param timestamp_col: 时间戳列名，默认为'timestamp'
+    :param freq: 统计粒度，'D'按天，'H'按小时
+    :param chunksize: 每次读取的行数
+    :return: Series，索引为日期（按小时时为时间），值为条数，只包含有数据的时间段
     """
-    try:
-        # 读取CSV文件
-        df = pd.read_csv(input_file)
-        # 确保时间戳列存在
-        if timestamp_col not in df.columns:
-            raise ValueError(f"列 '{timestamp_col}' 在输入文件中不存在。")
+    bin_seconds = BIN_SECONDS[freq]
+    columns = pd.read_csv(input_file, encoding='utf-8-sig', nrows=0).columns
+    if timestamp_col not in columns:
+        raise ValueError(f"列 '{timestamp_col}' 在输入文件中不存在。")
+
+    counts = np.zeros(0, dtype=np.int64)
+    first_bin = None
+    for chunk in pd.read_csv(input_file, encoding='utf-8-sig', usecols=[timestamp_col], chunksize=chunksize):
+        seconds = to_epoch_seconds(chunk[timestamp_col]).dropna().to_numpy(dtype=np.int64)
+        if not len(seconds):
+            continue
+        bins = seconds // bin_seconds
+        low = int(bins.min()) if first_bin is None else min(first_bin, int(bins.min()))
+        # 出现更早的时间段时，把已有的计数整体后移
+        if first_bin is not None and low < first_bin:
+            counts = np.concatenate([np.zeros(first_bin - low, dtype=np.int64), counts])
+        first_bin = low
+        chunk_counts = np.bincount(bins - first_bin)
+        if len(chunk_counts) > len(counts):
+            counts = np.concatenate([counts, np.zeros(len(chunk_counts) - len(counts), dtype=np.int64)])
+        counts[:len(chunk_counts)] += chunk_counts
+
+    nonzero = np.flatnonzero(counts)
+    index = pd.to_datetime(((first_bin or 0) + nonzero) * bin_seconds, unit='s')
+    if freq == 'D':
+        index = index.date
+    return pd.Series(counts[nonzero], index=index, name=input_file)
+
+
+def plot_counts(counts, title, save_path):
+    """
+    画出各时间段的数据条数柱状图并保存
 
-        # 时间戳为字符串, 转换为时间格式
-        df[timestamp_col] = pd.to_datetime(df[timestamp_col].astype(float), unit='s')
-        # 按照时间戳排序
-        df = df.sort_values(by=timestamp_col)
-        # 提取日期部分
-        df['date'] = df[timestamp_col].dt.date
-        # 统计不同日期的数量
-        date_counts = df['date'].value_counts().sort_index()
-        # 打印统计结果
-        # print("不同日期的数量统计:")
-        # for date, count in date_counts.items():
-        #     print(f"{date}: {count} 条数据")
-
-        # 显示统计结果的图表，每个柱状图上方显示具体的数量
-        plt.figure(figsize=(12, 6))
-        date_counts.plot(kind='bar', color='skyblue')
-        plt.title('不同日期的数据条数统计')
-        plt.xlabel('日期')
-        plt.ylabel('数据条数')
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        for i, count in enumerate(date_counts):
+    :param counts: count_timestamps 的结果（Series），或多个文件的结果拼成的DataFrame
+    :param title: 图表标题
+    :param save_path: 图片保存路径
+    """
+    plt.figure(figsize=(12, 6))
+    if isinstance(counts, pd.Series):
+        counts.plot(kind='bar', color='skyblue')
+        # 每个柱状图上方显示具体的数量
+        for i, count in enumerate(counts):
             plt.text(i, count + 0.5, str(count), ha='center', va='bottom')
-        save_path = input_file.replace('.csv', '_date_counts_statistics.png')
-        plt.savefig(save_path)
-        print(f"统计结果已保存为 '{save_path}'")
+    else:
+        counts.plot(kind='bar', ax=plt.gca())
+    plt.title(title)
+    plt.xlabel('日期')
+    plt.ylabel('数据条数')
+    plt.xticks(rotation=45)
+    plt.tight_layout()
+    plt.savefig(save_path)
+    plt.close()
+    print(f"统计结果已保存为 '{save_path}'")
+
+
+# 从csv文件中读取时间戳，并统计不同天数的数据条数，只关注时间戳列
+def read_and_sort_timestamps(input_file, timestamp_col='timestamp', freq='D'):
+    """
+    从CSV文件中读取时间戳列，统计不同天数（或小时）的数据条数并画图。
 
+    :param input_file: 输入CSV文件路径
+    :param timestamp_col: 时间戳列名，默认为'timestamp'
+    :param freq: 统计粒度，'D'按天，'H'按小时
+    """
+    try:
+        date_counts = count_timestamps(input_file, timestamp_col, freq)
+        save_path = input_file.replace('.csv', '_date_counts_statistics.png')
+        plot_counts(date_counts, '不同日期的数据条数统计', save_path)
     except Exception as e:
         print(f"处理时间戳时出错: {e}")
 
 
+def compare_timestamp_counts(sources, save_path, freq='D', max_workers=None):
+    """
+    多个文件（平台）并行统计各时间段的数据条数，画在同一张图上。
+
+    :param sources: {名称: (CSV文件路径, 时间戳列名)}，如 {'微博': ('weibo/...csv', 'created_at')}
+    :param save_path: 图片保存路径
+    :param freq: 统计粒度，'D'按天，'H'按小时
+    :param max_workers: 并行的进程数，默认为CPU核数
+    :return: DataFrame，每列为一个文件的统计结果
+    """
+    names = list(sources)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(count_timestamps, path, column, freq) for path, column in sources.values()]
+        results = {}
+        for name, future in zip(names, futures):
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                print(f"统计 {name} 时出错: {e}")
+    counts = pd.DataFrame(results).fillna(0).astype(np.int64).sort_index()
+    plot_counts(counts, '各平台不同日期的数据条数统计', save_path)
+    return counts
+
+
 # 把一个csv文件中的时间戳转换成另一个csv文件的时间戳(假设两个csv文件其余内容相同,只是一个csv文件时间戳有问题,需要修正)
 def convert_timestamps(input_file, output_file, timestamp_col='timestamp'):
     """
@@ -107,20 +206,26 @@ def convert_timestamps(input_file, output_file, timestamp_col='timestamp'):
         print(f"处理时间戳转换时出错: {e}")
 
 
-def split_multi_stance(input_file, output_file):
+def split_multi_stance(input_file, output_file, platform=None):
     """
     有些评论因为内容是分点的，所以会有多个立场，情感，意图
     但是这些内容因为处理不得当，全部被保留了下来且只放在了stance列
     但是因为我们只需要一个立场，情感，意图，所以需要去除多余的立场，情感，意图，并把对应的情感和意图放在对应的列中
+
+    :param platform: 平台名，指定时读入后按 common.schema.COLUMN_MAPPINGS 统一列名（ds_stance -> stance 等），
+                     输入可以直接是各平台清洗匹配后的评论文件
     """
     # 读取CSV文件
-    try:
-        df = pd.read_csv(input_file, encoding="utf-8-sig", dtype=str)
-    except:
+    if platform is not None:
+        df = read_table(input_file, platform, dtype=str, categorical=False, kind='comments')
+    else:
         try:
-            df = pd.read_csv(input_file, encoding="gbk", dtype=str)
+            df = pd.read_csv(input_file, encoding="utf-8-sig", dtype=str)
         except:
-            df = pd.read_csv(input_file, encoding="utf-8", dtype=str)
+            try:
+                df = pd.read_csv(input_file, encoding="gbk", dtype=str)
+            except:
+                df = pd.read_csv(input_file, encoding="utf-8", dtype=str)
 
     # 检查是否包含 'stance' 列
     if 'stance' not in df.columns:
@@ -129,61 +234,10 @@ def split_multi_stance(input_file, output_file):
 
     print(f"原始数据包含 {len(df)} 条记录")
 
-    # 如果不存在 sentiment 和 intent 列，则创建它们
-    if 'sentiment' not in df.columns:
-        df['sentiment'] = ''
-    if 'intent' not in df.columns:
-        df['intent'] = ''
-
-    # 应用解析函数
+    # 应用解析函数（缺少的 sentiment 和 intent 列会自动创建）
     print("正在解析多立场数据...")
-
-    # 直接遍历DataFrame，逐行处理
-    processed_count = 0
-    for idx, row in df.iterrows():
-        stance_str = row['stance']
-
-        # 检查是否需要处理
-        if pd.isna(stance_str) or stance_str == '':
-            continue
-
-        stance_str = str(stance_str).strip()
-        bracket_count = stance_str.count('[')
-
-        if bracket_count < 3:
-            continue  # 不是多立场格式，跳过
-
-        try:
-            # 使用正则表达式提取所有的 [xxx, xxx] 格式内容
-            pattern = r'\[([^\]]+)\]'
-            matches = re.findall(pattern, stance_str)
-
-            if len(matches) >= 3:
-                # 解析第一组（立场）
-                stance_parts = matches[0].split(',')
-                stance = stance_parts[0].strip() if len(stance_parts) > 0 else ''
-                stance_desc = stance_parts[1].strip() if len(stance_parts) > 1 else ''
-
-                # 解析第二组（情感）
-                sentiment_parts = matches[1].split(',')
-                sentiment = sentiment_parts[0].strip() if len(sentiment_parts) > 0 else ''
-                sentiment_desc = sentiment_parts[1].strip() if len(sentiment_parts) > 1 else ''
-
-                # 解析第三组（意图）
-                intent_parts = matches[2].split(',')
-                intent = intent_parts[0].strip() if len(intent_parts) > 0 else ''
-                intent_desc = intent_parts[1].strip() if len(intent_parts) > 1 else ''
-
-                # 直接更新原DataFrame的对应行
-                df.at[idx, 'stance'] = f'[{stance}, {stance_desc}]' if stance_desc else f'[{stance}]'
-                df.at[idx, 'sentiment'] = f'[{sentiment}, {sentiment_desc}]' if sentiment_desc else f'[{sentiment}]'
-                df.at[idx, 'intent'] = f'[{intent}, {intent_desc}]' if intent_desc else f'[{intent}]'
-
-                processed_count += 1
-
-        except Exception as e:
-            print(f"解析错误 {stance_str}: {e}")
-            continue
+    processed = split_label_columns(df, 'stance')
+    processed_count = int(processed.sum())
 
     print(f"发现并处理了 {processed_count} 行包含多立场信息")
 
@@ -202,17 +256,7 @@ def split_multi_stance(input_file, output_file):
     # 显示一些处理后的示例
     if processed_count > 0:
         print("\n处理后的示例数据:")
-        # 找到一些被处理过的行来展示
-        sample_count = 0
-        for idx, row in df.iterrows():
-            if sample_count >= 3:
-                break
-            if '[' in str(row['stance']) and '[' in str(row['sentiment']) and '[' in str(row['intent']):
-                print(f"立场: {row['stance']}")
-                print(f"情感: {row['sentiment']}")
-                print(f"意图: {row['intent']}")
-                print("-" * 30)
-                sample_count += 1
+        print_label_samples(df)
 
     # 保存处理后的数据
     df.to_csv(output_file, index=False, encoding="utf-8-sig")
@@ -266,16 +310,17 @@ if __name__ == "__main__":
                             'filter_data/cleaned_weixin_comments_ds_filtered.csv')
 
     # 示例：将CSV文件中的多立场数据解析并保存到新的CSV文件中
-    # split_multi_stance('weibo/weibo_final_results/cleaned_weibo_comments_ds_renamed.csv',
-    #                    'weibo/weibo_final_results/cleaned_weibo_comments_ds_split.csv')
-    # split_multi_stance('douyin/douyin_results_final/cleaned_douyin_comments_ds_renamed.csv',
-    #                    'douyin/douyin_results_final/cleaned_douyin_comments_ds_split.csv')
-    # split_multi_stance('zhihu/zhihu_results_final/cleaned_zhihu_comments_ds_renamed.csv',
-    #                    'zhihu/zhihu_results_final/cleaned_zhihu_comments_ds_split.csv')
-    # split_multi_stance('xhs/xhs_results_final/cleaned_xhs_comments_ds_renamed.csv',
-    #                    'xhs/xhs_results_final/cleaned_xhs_comments_ds_split.csv')
-    # split_multi_stance('weixin/weixin_final_results/weixin_comments_clean_with_ds_renamed.csv',
-    #                    'weixin/weixin_final_results/cleaned_weixin_comments_ds_split.csv')
+    # 读入时按平台统一列名，不需要先生成 _renamed.csv
+    # split_multi_stance('weibo/weibo_final_results/cleaned_weibo_comments_ds_matched.csv',
+    #                    'weibo/weibo_final_results/cleaned_weibo_comments_ds_split.csv', platform='weibo')
+    # split_multi_stance('douyin/douyin_results_final/cleaned_douyin_comments_ds_matched.csv',
+    #                    'douyin/douyin_results_final/cleaned_douyin_comments_ds_split.csv', platform='douyin')
+    # split_multi_stance('zhihu/zhihu_results_final/cleaned_zhihu_comments_ds_matched.csv',
+    #                    'zhihu/zhihu_results_final/cleaned_zhihu_comments_ds_split.csv', platform='zhihu')
+    # split_multi_stance('xhs/xhs_results_final/cleaned_xhs_comments_ds_matched.csv',
+    #                    'xhs/xhs_results_final/cleaned_xhs_comments_ds_split.csv', platform='xhs')
+    # split_multi_stance('weixin/weixin_final_results/weixin_comments_clean_with_ds.csv',
+    #                    'weixin/weixin_final_results/cleaned_weixin_comments_ds_split.csv', platform='weixin')
 
     # # # 输入CSV文件路径
     # input_csv_file = ['douyin/douyin_results_final/comments_ds.csv',
@@ -305,6 +350,12 @@ if __name__ == "__main__":
     # input_csv_file = 'weixin/weixin_final_results/weixin_comments_clean.csv'
     # read_and_sort_timestamps(input_csv_file, timestamp_col='created_at')
 
+    # 多个平台并行统计，画在同一张图上
+    # compare_timestamp_counts({'微博': ('weibo/weibo_final_results/cleaned_weibo_comments_data_matched.csv', 'created_at'),
+    #                           '抖音': ('douyin/douyin_results_final/cleaned_douyin_comments_data_matched.csv', 'create_time'),
+    #                           '小红书': ('xhs/xhs_results_final/cleaned_xhs_comments_data_matched.csv', 'create_time')},
+    #                          'filter_data/platform_date_counts_statistics.png')
+
     # convert_timestamps('weibo/weibo_final_results/cleaned_weibo_meta_data2_matched.csv',
     #                    'weibo/weibo_final_results/cleaned_weibo_meta_data_matched_stance_sentiment_intent.csv',
     #                    timestamp_col='created_at')
@@ -1,5 +1,11 @@
 import pandas as pd
 import re
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.label_utils import split_label_columns, print_label_samples
+from common.schema import read_table, save_table, export_unified
 
 
 def extract_image_urls(text):
@@ -157,8 +163,8 @@ def save_matched_info_from_meta_data(meta_file, review_file):
     根据评论数据中的mid，筛选出元数据中匹配的记录
     """
     # 读取CSV文件
-    meta_df = pd.read_csv(meta_file, encoding='utf-8', dtype={'mid': str})
-    review_df = pd.read_csv(review_file, encoding='utf-8', dtype={'mid': str, 'review_id': str, 'sup_comment': str})
+    meta_df = read_table(meta_file, 'weibo')
+    review_df = read_table(review_file, 'weibo')
 
     # 检查是否包含 'mid' 列
     if 'mid' not in meta_df.columns or 'mid' not in review_df.columns:
@@ -166,10 +172,10 @@ def save_matched_info_from_meta_data(meta_file, review_file):
         return
 
     # 获取review_df中所有的mid
-    review_mids = set(review_df['mid'].dropna().astype(str))
+    review_mids = review_df['mid'].dropna().unique()
 
     # 匹配到的行
-    matched_meta = meta_df[meta_df['mid'].astype(str).isin(review_mids)]
+    matched_meta = meta_df[meta_df['mid'].isin(review_mids)]
 
     # 保存匹配到的行到新的CSV文件
     matched_meta_file = meta_file.replace('.csv', '_matched.csv')
@@ -184,8 +190,8 @@ def save_matched_info_from_review_data(review_file, meta_file):
     根据元数据中的mid，筛选出评论数据中匹配的记录
     """
     # 读取CSV文件
-    review_df = pd.read_csv(review_file, encoding='utf-8', dtype={'mid': str, 'review_id': str, 'sup_comment': str})
-    meta_df = pd.read_csv(meta_file, encoding='utf-8', dtype={'mid': str})
+    review_df = read_table(review_file, 'weibo')
+    meta_df = read_table(meta_file, 'weibo')
 
     # 检查是否包含 'mid' 列
     if 'mid' not in review_df.columns or 'mid' not in meta_df.columns:
@@ -193,10 +199,10 @@ def save_matched_info_from_review_data(review_file, meta_file):
         return
 
     # 获取meta_df中所有的mid
-    meta_mids = set(meta_df['mid'].dropna().astype(str))
+    meta_mids = meta_df['mid'].dropna().unique()
 
     # 匹配到的行
-    matched_review = review_df[review_df['mid'].astype(str).isin(meta_mids)]
+    matched_review = review_df[review_df['mid'].isin(meta_mids)]
 
     # 保存匹配到的行到新的CSV文件
     matched_review_file = review_file.replace('.csv', '_matched.csv')
@@ -211,13 +217,7 @@ def clean_weibo_comments_data(input_file, output_file):
     清理微博评论数据
     """
     # 读取CSV文件
-    try:
-        df = pd.read_csv(input_file, encoding="utf-8-sig", dtype={'mid': str, 'review_id': str, 'sup_comment': str, 'uid': str})
-    except:
-        try:
-            df = pd.read_csv(input_file, encoding="gbk", dtype={'mid': str, 'review_id': str, 'sup_comment': str, 'uid': str})
-        except:
-            df = pd.read_csv(input_file, encoding="utf-8", dtype={'mid': str, 'review_id': str, 'sup_comment': str, 'uid': str})
+    df = read_table(input_file, 'weibo')
 
     # 输出原始条目数
     print(f"原始CSV文件包含 {len(df)} 条记录")
@@ -266,7 +266,7 @@ def clean_weibo_comments_data(input_file, output_file):
     print(f"- 总图片记录数：{img_count}")
 
     # 保存清理后的数据
-    df.to_csv(output_file, index=False, encoding="utf-8-sig")
+    save_table(df, output_file)
     print(f"清理后的数据已保存到：{output_file}")
 
 
@@ -275,13 +275,7 @@ def clean_weibo_meta_data(input_file, output_file):
     清理微博元数据
     """
     # 读取CSV文件
-    try:
-        df = pd.read_csv(input_file, encoding="utf-8-sig", dtype={'mid': str, 'uid': str})
-    except:
-        try:
-            df = pd.read_csv(input_file, encoding="gbk", dtype={'mid': str, 'uid': str})
-        except:
-            df = pd.read_csv(input_file, encoding="utf-8", dtype={'mid': str, 'uid': str})
+    df = read_table(input_file, 'weibo')
 
     # 输出原始条目数
     print(f"原始CSV文件包含 {len(df)} 条记录")
@@ -317,7 +311,7 @@ def clean_weibo_meta_data(input_file, output_file):
         df[col] = df[col].str.replace(url_pattern, '', regex=True)
 
     # 保存清理后的数据
-    df.to_csv(output_file, index=False, encoding="utf-8-sig")
+    save_table(df, output_file)
     print(f"清理后的数据已保存到：{output_file}")
 
 
@@ -372,15 +366,10 @@ def remove_multi_stance(input_file, output_file):
     有些评论因为内容是分点的，所以会有多个立场，情感，意图
     但是这些内容因为处理不得当，全部被保留了下来且只放在了stance列
     但是因为我们只需要一个立场，情感，意图，所以需要去除多余的立场，情感，意图，并把对应的情感和意图放在对应的列中
+    读入时按 COLUMN_MAPPINGS 统一列名（ds_stance -> stance 等）
     """
     # 读取CSV文件
-    try:
-        df = pd.read_csv(input_file, encoding="utf-8-sig", dtype=str)
-    except:
-        try:
-            df = pd.read_csv(input_file, encoding="gbk", dtype=str)
-        except:
-            df = pd.read_csv(input_file, encoding="utf-8", dtype=str)
+    df = read_table(input_file, 'weibo', dtype=str, categorical=False, kind='comments')
 
     # 检查是否包含 'stance' 列
     if 'stance' not in df.columns:
@@ -389,62 +378,11 @@ def remove_multi_stance(input_file, output_file):
 
     print(f"原始数据包含 {len(df)} 条记录")
     
-    # 如果不存在 sentiment 和 intent 列，则创建它们
-    if 'sentiment' not in df.columns:
-        df['sentiment'] = ''
-    if 'intent' not in df.columns:
-        df['intent'] = ''
-    
-    # 应用解析函数
+    # 应用解析函数（缺少的 sentiment 和 intent 列会自动创建）
     print("正在解析多立场数据...")
-    
-    # 直接遍历DataFrame，逐行处理
-    processed_count = 0
-    for idx, row in df.iterrows():
-        stance_str = row['stance']
-        
-        # 检查是否需要处理
-        if pd.isna(stance_str) or stance_str == '':
-            continue
-            
-        stance_str = str(stance_str).strip()
-        bracket_count = stance_str.count('[')
-        
-        if bracket_count < 3:
-            continue  # 不是多立场格式，跳过
-        
-        try:
-            # 使用正则表达式提取所有的 [xxx, xxx] 格式内容
-            pattern = r'\[([^\]]+)\]'
-            matches = re.findall(pattern, stance_str)
-            
-            if len(matches) >= 3:
-                # 解析第一组（立场）
-                stance_parts = matches[0].split(',')
-                stance = stance_parts[0].strip() if len(stance_parts) > 0 else ''
-                stance_desc = stance_parts[1].strip() if len(stance_parts) > 1 else ''
-                
-                # 解析第二组（情感）  
-                sentiment_parts = matches[1].split(',')
-                sentiment = sentiment_parts[0].strip() if len(sentiment_parts) > 0 else ''
-                sentiment_desc = sentiment_parts[1].strip() if len(sentiment_parts) > 1 else ''
-                
-                # 解析第三组（意图）
-                intent_parts = matches[2].split(',')
-                intent = intent_parts[0].strip() if len(intent_parts) > 0 else ''
-                intent_desc = intent_parts[1].strip() if len(intent_parts) > 1 else ''
-                
-                # 直接更新原DataFrame的对应行
-                df.at[idx, 'stance'] = f'[{stance}, {stance_desc}]' if stance_desc else f'[{stance}]'
-                df.at[idx, 'sentiment'] = f'[{sentiment}, {sentiment_desc}]' if sentiment_desc else f'[{sentiment}]'
-                df.at[idx, 'intent'] = f'[{intent}, {intent_desc}]' if intent_desc else f'[{intent}]'
-                
-                processed_count += 1
-                
-        except Exception as e:
-            print(f"解析错误 {stance_str}: {e}")
-            continue
-    
+    processed = split_label_columns(df, 'stance')
+    processed_count = int(processed.sum())
+
     print(f"发现并处理了 {processed_count} 行包含多立场信息")
     
     # 统计处理结果
@@ -462,18 +400,8 @@ def remove_multi_stance(input_file, output_file):
     # 显示一些处理后的示例
     if processed_count > 0:
         print("\n处理后的示例数据:")
-        # 找到一些被处理过的行来展示
-        sample_count = 0
-        for idx, row in df.iterrows():
-            if sample_count >= 3:
-                break
-            if '[' in str(row['stance']) and '[' in str(row['sentiment']) and '[' in str(row['intent']):
-                print(f"立场: {row['stance']}")
-                print(f"情感: {row['sentiment']}")  
-                print(f"意图: {row['intent']}")
-                print("-" * 30)
-                sample_count += 1
-    
+        print_label_samples(df)
+
     # 保存处理后的数据
     df.to_csv(output_file, index=False, encoding="utf-8-sig")
     print(f"处理后的数据已保存到: {output_file}")
@@ -486,7 +414,7 @@ def remove_multi_stance(input_file, output_file):
 if __name__ == "__main__":
 
     remove_multi_stance(
-        input_file='weibo/weibo_final_results/cleaned_weibo_comments_ds_renamed.csv',
+        input_file='weibo/weibo_final_results/cleaned_weibo_comments_ds_matched.csv',
         output_file='weibo/weibo_final_results/cleaned_weibo_comments_ds_split.csv')
 
     # 分析数据结构（可选）
@@ -518,38 +446,7 @@ if __name__ == "__main__":
     #     output_file='weibo/weibo_final_results/comments_ds.csv'
     # )
 
-    # input_file = 'weibo/weibo_final_results/cleaned_weibo_comments_ds_matched.csv'
-
-    # df = pd.read_csv(input_file, encoding="utf-8-sig", dtype=str)
-    # df.rename(columns={'mid': 'article_id',
-    #                    'review_id': 'comment_id',
-    #                    'sup_comment': 'parent_comment_id',
-    #                    'created_at': 'created_time',
-    #                    'text_raw': 'content',
-    #                    'source': 'location',
-    #                    'like': 'like_count',
-    #                    'img_url': 'img_urls',
-    #                    'review_num': 'comment_count',
-    #                    'ds_stance': 'stance',
-    #                    'ds_sentiment': 'sentiment',
-    #                    'ds_intent': 'intent'}, inplace=True)
-
-    # output_file = 'weibo/weibo_final_results/cleaned_weibo_comments_ds_renamed.csv'
-    # df.to_csv(output_file, index=False, encoding="utf-8-sig")
-
-    # input_file = 'weibo/weibo_final_results/cleaned_weibo_meta_data_matched.csv'
-    # df_meta = pd.read_csv(input_file, encoding="utf-8-sig", dtype=str)
-    # df_meta.rename(columns={'mid': 'article_id',
-    #                         'created_at': 'created_time',
-    #                         'text': 'content',
-    #                         'region': 'location',
-    #                         'pic_num': 'img_count',
-    #                         'pic_url': 'img_urls',
-    #                         'video_url': 'video_urls',
-    #                         'comments_count': 'comment_count',
-    #                         'multimodal_stance': 'stance',
-    #                         'multimodal_sentiment': 'sentiment',
-    #                         'multimodal_intent': 'intent'}, inplace=True)
-
-    # output_file_meta = 'weibo/weibo_final_results/cleaned_weibo_meta_data_renamed.csv'
-    # df_meta.to_csv(output_file_meta, index=False, encoding="utf-8-sig")
+    # 列名按 common.schema.COLUMN_MAPPINGS 统一（mid -> article_id、ds_stance -> stance 等）
+    # 评论在拆分立场时读入即统一（见上面的 remove_multi_stance）
+    export_unified('weibo/weibo_final_results/cleaned_weibo_meta_data_matched.csv',
+                   'weibo/weibo_final_results/cleaned_weibo_meta_data_renamed.csv', 'weibo', 'meta')
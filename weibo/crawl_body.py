@@ -1,10 +1,19 @@
-import requests
-import json
-from datetime import datetime
-import csv
-import time
 import random
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.time_utils import weibo_time_to_timestamp
+from common.account_pool import AccountPool
+from common.http_client import CrawlerSession
+from common.proxy_pool import load_proxy_pool
+from common.buffered_writer import BufferedCsvWriter
+from common.stats_index import get_stats
+
+# 账号池会话，第一次请求时加载 weibo/weibo_cookie*.json 中的全部账号
+session = None
+META_FIELDS = ['mid', 'uid', 'text', 'created_at', 'region', 'pic_num', 'pic_url', 'video_url',
+               'comments_count', 'reposts_count', 'like_count', 'original_url', 'user_url']
 
 
 def get_weibo_data(data):
@@ -17,9 +26,7 @@ def get_weibo_data(data):
     # 微博内容
     text = data['text_raw']
     # 发布时间
-    created_at = data['created_at']
-    dt = datetime.strptime(created_at, "%a %b %d %H:%M:%S %z %Y")  # 将字符串转换为datetime对象
-    created_at = int(dt.timestamp())  # 转换为时间戳
+    created_at = weibo_time_to_timestamp(data['created_at'])  # 转换为时间戳
     # 地区
     try:
         region = data['region_name']
@@ -63,10 +70,13 @@ def get_weibo_data(data):
     return mid, uid, user_url, text, created_at, pic_num, pic_url, video_url, comments_count, reposts_count, like_count, region
 
 
-def get_header():
-    with open("weibo/weibo_cookie.json", 'r') as f:
-        header = json.loads(f.read())
-    return header
+def get_session():
+    global session
+    if session is None:
+        pool = AccountPool.from_glob("weibo/weibo_cookie*.json", min_interval=1)
+        # 仓库根目录有 proxies.txt 时按账号分配代理
+        session = CrawlerSession(pool, proxy_pool=load_proxy_pool())
+    return session
 
 
 def change_url(original_url):
@@ -80,6 +90,43 @@ def change_url(original_url):
     return new_url
 
 
+def open_meta_csv(file_name='weibo_details/meta_data.csv', append=True):
+    """
+    打开微博详情CSV文件，文件为空（新文件或覆盖模式）时写入表头
+
+    Args:
+        file_name: 保存文件名
+        append: 是否追加模式，True为追加，False为覆盖
+
+    Returns:
+        BufferedCsvWriter，由调用方关闭
+    """
+    return BufferedCsvWriter(file_name, META_FIELDS, append=append, max_rows=20,
+                             stats_columns=['mid', 'uid'], timestamp_column='created_at')
+
+
+def crawl_meta(original_url, writer):
+    """
+    爬取一条微博的详情并写入CSV
+
+    Args:
+        original_url: 微博URL
+        writer: BufferedCsvWriter 或 csv.writer
+
+    Returns:
+        get_weibo_data 的结果
+    """
+    url = change_url(original_url)
+    resp = get_session().get_json(url, data_key='mid')
+    weibo_data = get_weibo_data(resp)
+    mid, uid, user_url, text, created_at, pic_num, \
+        pic_url, video_url, comment_count, repost_count, like_count, region = weibo_data
+    # 写入csv文件
+    writer.writerow([mid, uid, text, created_at, region, pic_num, pic_url, video_url,
+                     comment_count, repost_count, like_count, original_url, user_url,])
+    return weibo_data
+
+
 def crawl_pipeline(urls, file_name='weibo_details/meta_data.csv', append=True):
     """
     爬取微博详情并保存到CSV文件
@@ -93,41 +140,18 @@ def crawl_pipeline(urls, file_name='weibo_details/meta_data.csv', append=True):
         print("没有要爬取的微博URL")
         return
 
-    # 创建目录(如果不存在)
-    os.makedirs(os.path.dirname(file_name), exist_ok=True)
-
-    # 确定文件打开模式和是否需要写入表头
-    file_exists = os.path.exists(file_name)
-    write_header = not file_exists or not append
-    file_mode = 'a' if append and file_exists else 'w'
-
     # 结果保存在csv文件中
-    with open(file_name, file_mode, newline='', encoding='utf-8') as csvfile:
-        fieldnames = ['mid', 'uid', 'text', 'created_at', 'region', 'pic_num', 'pic_url', 'video_url',
-                      'comments_count', 'reposts_count', 'like_count', 'original_url', 'user_url']
-        writer = csv.writer(csvfile)
-
-        # 如果需要写入表头(新文件或覆盖模式)
-        if write_header:
-            writer.writerow(fieldnames)
-
+    with open_meta_csv(file_name, append) as writer:
         # 遍历每个url
         for original_url in urls:
-            # 获取微博数据
-            url = change_url(original_url)
-            resp = requests.get(url=url, headers=get_header())
-            resp = json.loads(resp.content.decode('utf-8'))
-            mid, uid, user_url, text, created_at, pic_num, \
-                pic_url, video_url, comment_count, repost_count, like_count, region = get_weibo_data(resp)
-            # 写入csv文件
-            writer.writerow([mid, uid, text, created_at, region, pic_num, pic_url, video_url,
-                            comment_count, repost_count, like_count, original_url, user_url,])
+            # 获取微博数据并写入csv文件
+            mid = crawl_meta(original_url, writer)[0]
 
             # 每爬一条微博，随机等待2-5秒，防止反爬
             print(f"爬取微博ID: {mid} 成功，等待下一条...")
-            sleep_time = random.uniform(4, 5)
-            print(f"等待 {sleep_time:.2f} 秒...")
-            time.sleep(sleep_time)
+            # 账号越多等待越短
+            sleep_time = get_session().pool.pause(random.uniform(4, 5))
+            print(f"等待了 {sleep_time:.2f} 秒")
 
 
 if __name__ == "__main__":
@@ -146,16 +170,9 @@ if __name__ == "__main__":
     # crawl_pipeline(['https://weibo.com/1314608344/PllANsMlp?refer_flag=1001030103_'])
     # print(f"微博数据已保存到weibo_details/meta_data.csv")
 
-    # 看看爬取的结果有多少条
-    with open("weibo_details/meta_data.csv", "r", encoding="utf-8") as f:
-        reader = csv.reader(f)
-        # 读取表头
-        header = next(reader)
-        # 统计行数
-        count = sum(1 for row in reader)
-        print(f"爬取到 {count} 条微博数据")
-    # 关闭文件
-    f.close()
+    # 看看爬取的结果有多少条（读取统计索引，文件有新增内容时只统计新增的部分）
+    stats = get_stats("weibo_details/meta_data.csv", ['mid', 'uid'], 'created_at')
+    print(f"爬取到 {stats.rows} 条微博数据，约 {stats.distinct('mid')} 条不同的微博，{stats.distinct('uid')} 个博主")
 
     # # 读取微博数据中的图片url
     # with open("weibo_details/meta_data.csv", "r", encoding="utf-8") as f:
@@ -4,9 +4,14 @@
 
 import requests
 import json
-from datetime import datetime
 import csv
 import time
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.time_utils import format_weibo_time
+from weibo.mid_codec import url_to_mid
 
 # 统计评论数量
 count = 0
@@ -30,31 +35,6 @@ def get_keyword(url):
     return list[-2], url_to_mid(list[-1])
 
 
-# 解码
-def decode_base62(b62_str):
-    charset = "0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
-    base = 62
-    num = 0
-    for c in b62_str:
-        num = num * base + charset.index(c)
-    return num
-
-
-# 将url转换为mid
-# 通过将url分段，每段进行base62解码，最后拼接成完整的mid
-# 例如：url = "Prnn7nRCg" -> mid = 5153820120452372
-def url_to_mid(url):
-    result = ''
-    for i in range(len(url), 0, -4):
-        start = max(i - 4, 0)
-        segment = url[start:i]
-        num = str(decode_base62(segment))
-        if start != 0:
-            num = num.zfill(7)  # 除最后一段外都补满7位
-        result = num + result
-    return int(result)
-
-
 # 根据UID返回博主的用户名
 def get_name(uid):
     url = f"https://weibo.com/ajax/profile/info?custom={uid}"
@@ -68,9 +48,7 @@ def get_comment_data(data):
     # 上级评论ID
     rootidstr = data['rootidstr']
     # 发表日期
-    created_at = data['created_at']
-    dt = datetime.strptime(created_at, "%a %b %d %H:%M:%S %z %Y")
-    created_at = dt.strftime("%Y-%m-%d %H:%M:%S")
+    created_at = format_weibo_time(data['created_at'])
     # 用户名
     screen_name = data['user']['screen_name']
     # 用户ID
@@ -1,15 +1,37 @@
-import requests
-import json
-from datetime import datetime
-import csv
 import time
 import os
 import random
-from crawl_body import crawl_pipeline
+import sys
+from crawl_body import get_session, change_url, open_meta_csv, crawl_meta
+from merge_json import load_priorities
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.time_utils import weibo_time_to_timestamp
+from common.frontier import normalize_url
+from common.scheduler import PriorityScheduler, CrawlBudget
+from common.watermark import WatermarkStore, IncrementalCursor
+from common.change_probe import probe_changed_posts
+from common.pipeline import Stage, StagedPipeline
+from common.buffered_writer import BufferedCsvWriter
+from weibo.mid_codec import url_to_mid
 
 # 全局变量定义
 count = 0
 csv_writer = None
+# 当前微博的增量爬取状态，以及所有微博的高水位记录
+cursor = None
+watermarks = None
+WATERMARK_FILE = "weibo/weibo_watermarks.json"
+REVIEW_FIELDS = ['mid', 'review_id', 'sup_comment', 'uid', 'created_at', 'gender', 'source', 'text_raw', 'like', 'review_num']
+# 评论文件旁维护的统计索引：不同微博/评论/用户数和时间范围
+REVIEW_STATS = {'stats_columns': ['mid', 'review_id', 'uid'], 'timestamp_column': 'created_at'}
+
+
+def get_watermarks():
+    global watermarks
+    if watermarks is None:
+        watermarks = WatermarkStore(WATERMARK_FILE)
+    return watermarks
 
 
 def add_count():
@@ -17,33 +39,6 @@ def add_count():
     count += 1
 
 
-def get_header():
-    with open("weibo/weibo_cookie.json", 'r') as f:
-        header = json.loads(f.read())
-    return header
-
-
-def decode_base62(b62_str):
-    charset = "0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
-    base = 62
-    num = 0
-    for c in b62_str:
-        num = num * base + charset.index(c)
-    return num
-
-
-def url_to_mid(url):
-    result = ''
-    for i in range(len(url), 0, -4):
-        start = max(i - 4, 0)
-        segment = url[start:i]
-        num = str(decode_base62(segment))
-        if start != 0:
-            num = num.zfill(7)  # 除最后一段外都补满7位
-        result = num + result
-    return int(result)
-
-
 def get_keyword(url):
     list = url.split('/')
     list[-1] = list[-1].split('?')[0]  # 去掉url中的参数部分
@@ -52,15 +47,21 @@ def get_keyword(url):
 
 def get_name(uid):
     url = f"https://weibo.com/ajax/profile/info?custom={uid}"
-    return json.loads(requests.get(url=url, headers=get_header()).content.decode('utf-8'))['data']['user']['screen_name']
+    return get_session().get_json(url)['data']['user']['screen_name']
+
+
+def get_comments_count(url):
+    """
+    通过微博详情接口（与crawl_body相同的statuses/show）获取当前评论数
+    """
+    resp = get_session().get_json(change_url(url), data_key='mid')
+    return resp['comments_count']
 
 
 def get_comment_data(data):
     idstr = data['idstr']
     rootidstr = data['rootidstr']
-    created_at = data['created_at']
-    dt = datetime.strptime(created_at, "%a %b %d %H:%M:%S %z %Y")
-    created_at = int(dt.timestamp())  # 转成timestamp
+    created_at = weibo_time_to_timestamp(data['created_at'])  # 转成timestamp
     user_id = data['user']['id']
     text_raw = data['text_raw']
     like = data['like_counts']
@@ -96,24 +97,30 @@ def get_comment_info(uid, mid, max_id, fetch_level, orig_mid):
     :param fetch_level: 评论级别(0为一级评论,1为二级评论)
     :param orig_mid: 原始微博ID,用于标识评论所属的微博
     """
-    global count, csv_writer
+    global count, csv_writer, cursor
     if max_id == '':
         url = f"https://weibo.com/ajax/statuses/buildComments?flow=1&is_reload=1&id={mid}&is_show_bulletin=2&is_mix=0&count=20&uid={uid}&fetch_level={fetch_level}&locale=zh-CN"
     else:
         url = f"https://weibo.com/ajax/statuses/buildComments?flow=1&is_reload=1&id={mid}&is_show_bulletin=2&is_mix=0&max_id={max_id}&count=20&uid={uid}&fetch_level={fetch_level}&locale=zh-CN"
 
-    resp = json.loads(requests.get(url=url, headers=get_header()).content.decode('utf-8'))
+    # 没有评论或最后一页时 data 为空列表，只有缺少 data 字段才算空数据
+    resp = get_session().get_json(url, data_key='data')
     datas = resp['data']
 
     for data in datas:
+        # 增量模式：一级评论按时间倒序（flow=1），跳过已经爬过的，连续遇到旧评论就不再翻页
+        if fetch_level == 0 and cursor is not None and \
+                cursor.is_seen(data['idstr'], weibo_time_to_timestamp(data['created_at'])):
+            if cursor.should_stop:
+                break
+            continue
         add_count()
         # 每爬取100条数据，等待5秒，防止反爬干扰
         if count % 100 == 0:
             print(f"已爬取到{count}条数据")
             # 随机等待，避免被封
-            sleep_time = random.uniform(5, 10)
-            print(f"爬取评论-等待 {sleep_time:.2f} 秒...")
-            time.sleep(sleep_time)
+            sleep_time = get_session().pool.pause(random.uniform(5, 10))
+            print(f"爬取评论-等待了 {sleep_time:.2f} 秒")
 
         idstr, rootidstr, created_at, user_id, text_raw, like, total_number, gender, source = get_comment_data(data)
         if fetch_level == 0:
@@ -125,6 +132,10 @@ def get_comment_info(uid, mid, max_id, fetch_level, orig_mid):
 
     print(f"当前爬取:{count}条")
 
+    if fetch_level == 0 and cursor is not None and cursor.should_stop:
+        print(f"已到达上次爬取的位置，本次新增 {cursor.new_count} 条一级评论")
+        return
+
     # 下一条索引
     max_id = resp['max_id']
     if max_id != 0:
@@ -133,9 +144,14 @@ def get_comment_info(uid, mid, max_id, fetch_level, orig_mid):
         return
 
 
-def crawl_single_weibo(url):
-    """爬取单个微博URL的所有评论"""
-    global csv_writer
+def crawl_single_weibo(url, incremental=False, comments_count=None):
+    """
+    爬取单个微博URL的所有评论
+    :param url: 微博URL
+    :param incremental: 是否增量爬取（只爬上次之后的新评论），全量爬取时也会记录高水位
+    :param comments_count: 探测到的当前评论数，爬取成功后记入高水位，供下次变化探测比较
+    """
+    global csv_writer, cursor
 
     try:
         print(f"\n开始爬取: {url}")
@@ -148,16 +164,35 @@ def crawl_single_weibo(url):
         # except:
         #     print(f"微博ID: {mid}, 无法获取作者名称")
 
+        store = get_watermarks()
+        cursor = IncrementalCursor(store.get(mid) if incremental else None)
         get_comment_info(uid, mid, '', 0, mid)
+        # 爬取成功后才更新高水位，中途出错的微博下次仍会从头爬取；
+        # 先把缓冲区里的评论写入磁盘，保证高水位之前的评论都已落盘
+        csv_writer.flush()
+        cursor.commit(store, mid, comments_count=comments_count)
         print(f"微博 {url} 评论爬取完成")
         return True
     except Exception as e:
         print(f"爬取 {url} 时出错: {str(e)}")
         return False
+    finally:
+        cursor = None
 
 
-def batch_crawl_from_file(filepath="weibo/weibo_urls.txt", output_file="微博评论汇总.csv"):
-    """从文件中读取多个微博URL并批量爬取"""
+def batch_crawl_from_file(filepath="weibo/weibo_urls.txt", output_file="微博评论汇总.csv", meta_json=None,
+                          max_seconds=None, max_urls=None, incremental=False, only_changed=False, probe_workers=8):
+    """
+    从文件中读取多个微博URL并按优先级批量爬取
+    :param filepath: URL列表文件
+    :param output_file: 评论输出文件
+    :param meta_json: 搜索结果JSON（merge_json的输出），用其中的评论/转发/点赞数和发布时间排序，None时按文件顺序
+    :param max_seconds: 最长爬取时间（秒），用完后剩余的URL不再爬取
+    :param max_urls: 最多爬取的URL数
+    :param incremental: 是否只爬上次之后的新评论
+    :param only_changed: 是否先并发探测评论数，只爬评论数增长了的微博（按增长量排序，自动使用增量模式）
+    :param probe_workers: 探测评论数的并发线程数
+    """
     global count, csv_writer
 
     # 重置计数器
@@ -179,39 +214,97 @@ def batch_crawl_from_file(filepath="weibo/weibo_urls.txt", output_file="微博
         print(f"在 {filepath} 中没有找到任何URL，请添加URL后再运行程序")
         return
 
-    # 创建CSV文件并写入表头
-    with open(output_file, mode='w', newline='', encoding='utf-8-sig') as file:
-        csv_writer = csv.writer(file)
-        # 如果已有表头，则不再写入
-        if file.tell() == 0:
-            # 写入表头
-            csv_writer.writerow(['mid', 'review_id', 'sup_comment', 'uid', 'created_at', 'gender', 'source', 'text_raw', 'like', 'review_num'])
-
+    if only_changed:
+        # 先探测评论数，没有新评论的微博不进入队列
+        incremental = True
+        scheduler = probe_changed_posts(urls, lambda url: get_keyword(url)[1], get_comments_count,
+                                        get_watermarks(), max_workers=probe_workers)
+    else:
+        # 按预计评论量排序，没有分数的URL保持文件中的顺序
+        priorities = load_priorities(meta_json) if meta_json else {}
+        scheduler = PriorityScheduler()
+        for url in urls:
+            scheduler.push((url, None), priorities.get(normalize_url(url), 0))
+    budget = CrawlBudget(max_seconds=max_seconds, max_items=max_urls)
+
+    # 创建CSV文件并写入表头（增量模式追加到已有文件）
+    with BufferedCsvWriter(output_file, REVIEW_FIELDS, append=incremental, encoding='utf-8-sig', **REVIEW_STATS) as csv_writer:
         start = time.time()
-        total_urls = len(urls)
+        total_urls = len(scheduler)
 
         print(f"共有 {total_urls} 个微博URL需要爬取")
-        for i, url in enumerate(urls, 1):
-            print(f"\n[{i}/{total_urls}] 正在处理URL: {url}")
+        for i, ((url, comments_count), score) in enumerate(scheduler.drain(budget), 1):
+            print(f"\n[{i}/{total_urls}] 正在处理URL: {url}（优先级 {score:.1f}）")
             url_start_time = time.time()
-            crawl_single_weibo(url)
+            crawl_single_weibo(url, incremental=incremental, comments_count=comments_count)
             url_time = time.time() - url_start_time
             print(f"URL {i}/{total_urls} 爬取完成，耗时 {url_time/60:.2f} 分钟")
 
             # 在URLs之间稍微暂停，避免频繁请求
-            if i < total_urls:
+            if i < total_urls and not budget.exhausted():
                 pause_time = min(5, max(1, url_time * 0.1))  # 暂停时间为爬取时间的10%，最少1秒，最多5秒
                 print(f"等待 {pause_time:.1f} 秒后继续下一个URL...")
                 time.sleep(pause_time)
 
     total_time = time.time() - start
     print(f"\n全部爬取完成!")
-    print(f"共计爬取了 {total_urls} 个微博，{count} 条评论")
+    print(f"共计爬取了 {budget.used_items}/{total_urls} 个微博，{count} 条评论")
     print(f"总耗时: {total_time/60:.2f} 分钟")
     print(f"评论数据已保存至: {output_file}")
+    get_session().pool.print_stats()
+
 
+def pipeline_crawl(urls, output_dir, incremental=False, meta_interval=4.5, comment_interval=5):
+    """
+    流水线爬取：正文阶段和评论阶段各用一个线程、各自控制请求间隔，
+    爬取一条微博评论的同时已经在获取下一条微博的正文，两个CSV文件在整个过程中只打开一次
+    :param urls: 微博URL列表
+    :param output_dir: 输出目录，写入其中的 meta_data.csv 和 review_data.csv
+    :param incremental: 是否只爬上次之后的新评论
+    :param meta_interval: 正文阶段两条微博之间的最小间隔（秒）
+    :param comment_interval: 评论阶段两条微博之间的最小间隔（秒）
+    """
+    global csv_writer, count
 
-def interactive_mode(mode=2, filepath="weibo/weibo_urls.txt", output_file="weibo_details/review_data.csv", one_url="", append=True):
+    meta_writer = open_meta_csv(os.path.join(output_dir, "meta_data.csv"), append=True)
+    csv_writer = BufferedCsvWriter(os.path.join(output_dir, "review_data.csv"), REVIEW_FIELDS,
+                                   encoding='utf-8-sig', **REVIEW_STATS)
+    count = 0
+
+    def fetch_meta(url):
+        # 正文爬取失败时仍然爬评论，只是没有评论数
+        try:
+            comments_count = crawl_meta(url, meta_writer)[8]
+        except Exception as e:
+            print(f"爬取 {url} 的微博详情时出错: {e}")
+            return url, None
+        if comments_count == 0:
+            print(f"微博 {url} 没有评论，跳过评论爬取")
+            return None
+        return url, comments_count
+
+    def fetch_comments(item):
+        url, comments_count = item
+        crawl_single_weibo(url, incremental=incremental, comments_count=comments_count)
+
+    try:
+        # 评论阶段使用全局的 csv_writer 和 cursor，只能有一个线程
+        pipeline = StagedPipeline([
+            Stage("正文", fetch_meta, min_interval=meta_interval, jitter=0.5),
+            Stage("评论", fetch_comments, min_interval=comment_interval),
+        ])
+        total_time = pipeline.run(urls)
+    finally:
+        meta_writer.close()
+        csv_writer.close()
+
+    pipeline.print_stats(total_time)
+    print(f"共计爬取了 {count} 条评论，数据已保存至: {output_dir}")
+    get_session().pool.print_stats()
+
+
+def interactive_mode(mode=2, filepath="weibo/weibo_urls.txt", output_file="weibo_details/review_data.csv", one_url="", append=True,
+                     incremental=False):
     """交互式模式，允许用户选择爬取方式"""
     # 确保目录存在
     os.makedirs(os.path.dirname(output_file), exist_ok=True)
@@ -219,32 +312,20 @@ def interactive_mode(mode=2, filepath="weibo/weibo_urls.txt", output_file="weibo
     if mode == "1":
         url = one_url
         if url:
-            # 检查文件是否存在及是否为空
-            file_exists = os.path.exists(output_file)
-            file_empty = not file_exists or os.path.getsize(output_file) == 0
+            global csv_writer, count
 
-            # 根据append参数决定是追加还是覆盖
-            file_mode = 'a' if append and file_exists else 'w'
-
-            with open(output_file, mode=file_mode, newline='', encoding='utf-8-sig') as file:
-                global csv_writer, count
-
-                # 重置计数器(如果是新文件或不追加)
-                if file_mode == 'w':
-                    count = 0
-
-                csv_writer = csv.writer(file)
-
-                # 只在文件为空时写入表头
-                if file_empty:
-                    csv_writer.writerow(['mid', 'review_id', 'sup_comment', 'uid', 'created_at', 'gender', 'source', 'text_raw', 'like', 'review_num'])
+            # 重置计数器(如果是新文件或不追加)
+            if not append or not os.path.exists(output_file):
+                count = 0
 
+            # 根据append参数决定是追加还是覆盖，只在文件为空时写入表头
+            with BufferedCsvWriter(output_file, REVIEW_FIELDS, append=append, encoding='utf-8-sig', **REVIEW_STATS) as csv_writer:
                 start = time.time()
-                crawl_single_weibo(url)
+                crawl_single_weibo(url, incremental=incremental)
                 print(f"爬取完成，共 {count} 条评论，耗时 {(time.time()-start)/60:.2f} 分钟")
                 print(f"评论数据已保存至: {output_file}")
     elif mode == "2":
-        batch_crawl_from_file(filepath, output_file)
+        batch_crawl_from_file(filepath, output_file, incremental=incremental)
     else:
         print("无效的选择")
 
@@ -254,31 +335,10 @@ if __name__ == "__main__":
     with open("weibo/weibo_urls2.txt", "r", encoding="utf-8") as f:
         urls = [line.strip() for line in f if line.strip() and not line.startswith('#')]
 
-    # 创建目录(如果不存在)
-    os.makedirs("weibo/weibo_details_06_04", exist_ok=True)
-
-    # 第一次调用使用覆盖模式，创建新文件
-    first_url = False
-
-    for url in urls:
-        # 爬取单个微博URL的所有评论
-        interactive_mode(mode="1", output_file="weibo/weibo_details_06_04/review_data.csv", one_url=url)
-
-        print(f"等待5秒，避免频繁请求")
-        time.sleep(10)
-
-        # 爬取微博详情 - 第一个URL时不追加，之后的URL都追加
-        crawl_pipeline([url], file_name="weibo/weibo_details_06_04/meta_data.csv", append=True)
-
-        # 标记已处理第一个URL
-        if first_url:
-            first_url = False
+    # 正文和评论同时爬取（不同微博），结果追加到 meta_data.csv 和 review_data.csv
+    pipeline_crawl(urls, "weibo/weibo_details_06_04")
 
-    # # 读取一下评论数据集，根据uid算一下到底有多少个用户
-    # with open("weibo_details/review_data.csv", "r", encoding="utf-8") as f:
-    #     reader = csv.reader(f)
-    #     next(reader)
-    #     uid_set = set()
-    #     for row in reader:
-    #         uid_set.add(row[3])
-    #     print(f"一共爬取了 {len(uid_set)} 个用户的评论")
+    # # 算一下到底有多少个用户评论过（所有 weibo_details* 目录下的评论一起查询，需要安装duckdb）
+    # from common.query import CrawlQuery
+    # with CrawlQuery() as q:
+    #     print(f"一共爬取了 {q.distinct_count('weibo_comments', 'uid')} 个用户的评论")
@@ -6,6 +6,7 @@ import time
 import json
 import random
 import os
+import sys
 from datetime import datetime
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -15,6 +16,9 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.json_utils import dump_json
+
 
 class WeiboSearchCrawler:
     def __init__(self, driver_path='C:\\Users\\w_changing\\.conda\\envs\\crawler\\msedgedriver.exe', headless=False, output_dir="weibo_results3"):
@@ -264,11 +268,10 @@ class WeiboSearchCrawler:
             print(f"解析微博卡片时出错: {e}")
             return None
 
-    def _save_data(self, data, filename):
-        """保存数据到文件"""
+    def _save_data(self, data, filename, pretty=False):
+        """保存数据到文件，pretty为True时缩进美化输出"""
         filepath = os.path.join(self.output_dir, filename)
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        dump_json(data, filepath, pretty=pretty)
         print(f"数据已保存到 {filepath}")
 
     def get_comments(self, weibo_id, max_pages=3):
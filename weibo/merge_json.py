@@ -1,8 +1,18 @@
 import json
 import os
+import sys
+import time
 
+import pandas as pd
 
-def merge_json_files(directory="weibo/weibo_results2", output_file="merged.json", incremental=True):
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.json_utils import load_json, dump_json, dumps
+from common.frontier import UrlFrontier, normalize_url
+from common.scheduler import engagement_score, weibo_mid_to_timestamp
+from weibo.mid_codec import urls_to_mids
+
+
+def merge_json_files(directory="weibo/weibo_results2", output_file="merged.json", incremental=True, pretty=False):
     """
     合并指定目录下的所有JSON文件
 
@@ -10,6 +20,7 @@ def merge_json_files(directory="weibo/weibo_results2", output_file="merged.json"
         directory (str): JSON文件所在目录
         output_file (str): 输出的合并JSON文件名
         incremental (bool): 是否增量更新，如果是则保留已有数据
+        pretty (bool): 是否缩进美化输出，默认紧凑输出
 
     Returns:
         list: 合并后的数据
@@ -26,9 +37,8 @@ def merge_json_files(directory="weibo/weibo_results2", output_file="merged.json"
     all_data = []
     if incremental and os.path.exists(output_path):
         try:
-            with open(output_path, "r", encoding="utf-8") as existing_file:
-                all_data = json.load(existing_file)
-                print(f"已加载现有的合并文件，包含 {len(all_data)} 条数据")
+            all_data = load_json(output_path)
+            print(f"已加载现有的合并文件，包含 {len(all_data)} 条数据")
         except Exception as e:
             print(f"加载现有合并文件失败: {e}")
             all_data = []
@@ -47,15 +57,14 @@ def merge_json_files(directory="weibo/weibo_results2", output_file="merged.json"
     for json_file in json_files:
         file_path = os.path.join(directory, json_file)
         try:
-            with open(file_path, "r", encoding="utf-8") as infile:
-                # 读取json文件
-                data = json.load(infile)
+            # 读取json文件
+            data = load_json(file_path)
 
-                # 将数据添加到列表中
-                if isinstance(data, list):
-                    all_data.extend(data)
-                else:
-                    all_data.append(data)
+            # 将数据添加到列表中
+            if isinstance(data, list):
+                all_data.extend(data)
+            else:
+                all_data.append(data)
 
             print(f"成功读取: {json_file}")
         except json.JSONDecodeError as e:
@@ -63,14 +72,17 @@ def merge_json_files(directory="weibo/weibo_results2", output_file="merged.json"
         except Exception as e:
             print(f"处理 {json_file} 时出错: {e}")
 
-    # 使用字典进行去重 (基于publish_url字段)
+    # 使用字典进行去重：同一条微博的链接可能带不同参数或域名，统一按链接解出的mid去重，
+    # 整列一次转换；不是单条微博链接（解不出mid）的用原始publish_url，没有publish_url的用其JSON字符串作为键
+    mids = urls_to_mids([item.get('publish_url') for item in all_data])
     unique_data = {}
-    for item in all_data:
-        if 'publish_url' in item:
+    for item, mid in zip(all_data, mids.tolist()):
+        if mid is not pd.NA:
+            unique_data[mid] = item
+        elif 'publish_url' in item:
             unique_data[item['publish_url']] = item
         else:
-            # 对于没有publish_url的项，使用其JSON字符串作为键
-            item_json = json.dumps(item, sort_keys=True)
+            item_json = dumps(item, sort_keys=True)
             unique_data[item_json] = item
 
     # 转回列表
@@ -78,14 +90,48 @@ def merge_json_files(directory="weibo/weibo_results2", output_file="merged.json"
 
     # 将合并后的数据写入到新文件中
     print(f"合并了 {len(all_data)} 条数据 (新增 {len(all_data) - initial_count} 条)")
-    with open(output_path, "w", encoding="utf-8") as outfile:
-        json.dump(all_data, outfile, ensure_ascii=False, indent=2)
+    dump_json(all_data, output_path, pretty=pretty)
 
     print(f"合并完成，已保存到 {output_path}")
     return all_data
 
 
-def extract_urls_to_file(json_path="weibo/weibo_results2/merged.json", output_file="weibo_urls.txt", append=True):
+def get_priority(item, now=None):
+    """
+    根据搜索结果中的评论数、转发数、点赞数和发布时间（由mid推算）计算爬取优先级
+
+    Args:
+        item (dict): 搜索结果中的一条微博
+        now (float): 当前时间，默认为当前时间
+
+    Returns:
+        float: 优先级分数，越大越先爬
+    """
+    return engagement_score(item.get('comment_count', 0), item.get('repost_count', 0), item.get('like_count', 0),
+                            created_at=weibo_mid_to_timestamp(item.get('id')), now=now)
+
+
+def load_priorities(json_path):
+    """
+    读取搜索结果JSON，返回 规范化URL -> 优先级分数 的字典
+
+    Args:
+        json_path (str): 合并后的搜索结果JSON文件路径
+
+    Returns:
+        dict: 规范化URL到分数的映射
+    """
+    now = time.time()
+    priorities = {}
+    for item in load_json(json_path):
+        if 'publish_url' in item:
+            key = normalize_url(item['publish_url'])
+            priorities[key] = max(priorities.get(key, 0), get_priority(item, now))
+    return priorities
+
+
+def extract_urls_to_file(json_path="weibo/weibo_results2/merged.json", output_file="weibo_urls.txt", append=True,
+                         frontier_db=None):
     """
     从JSON文件中提取微博URL并保存到文本文件
 
@@ -93,52 +139,45 @@ def extract_urls_to_file(json_path="weibo/weibo_results2/merged.json", output_fi
         json_path (str): JSON文件路径
         output_file (str): 输出的URL文本文件名
         append (bool): 是否追加到现有文件(同时去重)
+        frontier_db (str): URL去重记录的数据库路径，默认与输出文件同名（后缀为.frontier.db）
+
+    Returns:
+        list: 本次新增的URL
     """
     # 读取合并后的JSON文件
-    with open(json_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-        new_urls = []
-        for item in data:
-            # 获取微博url
-            if 'publish_url' in item and item['comment_count'] >= 5:
-                original_url = item['publish_url']
-                new_urls.append(original_url)
+    data = load_json(json_path)
+    now = time.time()
+    scored_urls = []
+    for item in data:
+        # 获取微博url
+        if 'publish_url' in item and item['comment_count'] >= 5:
+            scored_urls.append((get_priority(item, now), item['publish_url']))
+    # 按预计评论量从高到低排列，评论爬虫按文件顺序处理时先爬价值高的微博
+    scored_urls.sort(key=lambda x: x[0], reverse=True)
+    new_urls = [url for _, url in scored_urls]
     print(f"提取到 {len(new_urls)} 条微博URL")
-    # 加载现有的URL(如果追加模式)
-    existing_urls = set()
-    if append and os.path.exists(output_file):
-        try:
-            with open(output_file, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith('#'):
-                        existing_urls.add(line)
-            print(f"已加载现有URL文件，包含 {len(existing_urls)} 条URL")
-        except Exception as e:
-            print(f"加载现有URL文件失败: {e}")
-
-    # 合并并去重
-    all_urls = set(new_urls) | existing_urls  # 使用集合进行去重
-    sorted_urls = sorted(all_urls)  # 排序以保持一致性
-
-    # # 写入到txt文件
-    # with open(output_file, "w", encoding="utf-8") as f:
-    #     for url in sorted_urls:
-    #         f.write(url + "\n")
-
-    # 追加模式
-    if append:
-        with open(output_file, "a", encoding="utf-8") as f:
-            # 追加新URL
-            for url in sorted_urls:
-                if url not in existing_urls:
-                    f.write(url + "\n")
-    else:
-        with open(output_file, "w", encoding="utf-8") as f:
-            for url in sorted_urls:
+
+    # 去重记录：规范化URL后判断（同一条微博带不同的refer_flag也算重复）
+    frontier_db = frontier_db or os.path.splitext(output_file)[0] + '.frontier.db'
+    with UrlFrontier(frontier_db) as frontier:
+        if append and len(frontier) == 0:
+            # 第一次使用去重记录时，导入现有的URL文件
+            frontier.seed_from_file(output_file)
+        existing_count = len(frontier) if append else 0
+        added_urls = frontier.filter_new(new_urls, ignore_existing=not append)  # 保持优先级顺序
+
+        # 追加模式只写入新URL，覆盖模式重写整个文件
+        with open(output_file, "a" if append else "w", encoding="utf-8") as f:
+            for url in added_urls:
                 f.write(url + "\n")
 
-    print(f"已保存 {len(sorted_urls)} 条微博URL到 {output_file} (新增 {len(all_urls) - len(existing_urls)} 条)")
+        # 文件写入成功后才记录，写入失败时这些URL下次仍会被当作新URL
+        if not append:
+            frontier.clear()
+        frontier.add_many(added_urls)
+
+    print(f"已有 {existing_count} 条微博URL，新增 {len(added_urls)} 条，已保存到 {output_file}")
+    return added_urls
 
 
 def main(directory="weibo/weibo_results_0604", merged_json="merge.json", urls_file="weibo/weibo_urls2.txt"):
@@ -1,6 +1,13 @@
-import json
+import os
+import sys
 import pandas as pd
 import re
+import shutil
+from itertools import islice
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.json_utils import iter_json_items
+from common.schema import export_unified
 
 
 def clean_article_content(text):
@@ -31,6 +38,48 @@ def clean_comment_content(text):
     return text.strip()
 
 
+def write_records_to_csv(records, output_path, chunk_size=10000):
+    """
+    分块把记录写入CSV文件，避免一次性构建整个DataFrame。
+    列为所有记录中出现过的键（按第一次出现的顺序，与 pd.DataFrame(records) 相同）：
+    数据行先写入临时文件，新出现的键追加在最后，早先写入的行缺少的末尾字段读取时为空，
+    全部写完后再写表头并拼接数据行。
+
+    :param records: 记录（字典）的可迭代对象
+    :param output_path: 输出的CSV文件路径
+    :param chunk_size: 每块的记录数
+    :return: 写入的记录条数
+    """
+    records = iter(records)
+    columns = []
+    seen = set()
+    total = 0
+    body_path = output_path + '.body.tmp'
+    try:
+        with open(body_path, 'w', encoding='utf-8', newline='') as body:
+            while True:
+                chunk = list(islice(records, chunk_size))
+                if not chunk:
+                    break
+                for record in chunk:
+                    for key in record:
+                        if key not in seen:
+                            seen.add(key)
+                            columns.append(key)
+                pd.DataFrame(chunk, columns=columns).to_csv(body, index=False, header=False)
+                total += len(chunk)
+
+        with open(output_path, 'w', encoding='utf-8-sig', newline='') as f, \
+                open(body_path, 'r', encoding='utf-8', newline='') as body:
+            if columns:
+                pd.DataFrame(columns=columns).to_csv(f, index=False)
+            shutil.copyfileobj(body, f, 1 << 20)
+    finally:
+        if os.path.exists(body_path):
+            os.remove(body_path)
+    return total
+
+
 def clean_articles(file_path, output_path):
     """
     清洗文章内容并保存到CSV文件。
@@ -38,16 +87,13 @@ def clean_articles(file_path, output_path):
     :param file_path: 输入的JSON文件路径
     :param output_path: 输出的CSV文件路径
     """
-    with open(file_path, 'r', encoding='utf-8') as f:
-        articles = json.load(f)
-
-    # 清洗content
-    for art in articles:
-        art['content'] = clean_article_content(art.get('content', ''))
+    def iter_articles():
+        for art in iter_json_items(file_path):
+            # 清洗content
+            art['content'] = clean_article_content(art.get('content', ''))
+            yield art
 
-    # 转为DataFrame
-    df_articles = pd.DataFrame(articles)
-    df_articles.to_csv(output_path, index=False, encoding='utf-8-sig')
+    write_records_to_csv(iter_articles(), output_path)
 
 
 def clean_comments(file_path, output_path):
@@ -57,32 +103,24 @@ def clean_comments(file_path, output_path):
     :param file_path: 输入的JSON文件路径
     :param output_path: 输出的CSV文件路径
     """
-    with open(file_path, 'r', encoding='utf-8') as f:
-        comments = json.load(f)
-
-    # 清洗content
-    for c in comments:
-        c['content'] = clean_comment_content(c.get('content', ''))
-
-    # 计算评论字数
-    for c in comments:
-        c['content_length'] = len(c['content'])
-
-    # 根据字数过滤评论
-    comments = [c for c in comments if 5 <= c['content_length'] <= 1000]
-
-    # 去重（content + content_id）
-    seen = set()
-    unique_comments = []
-    for c in comments:
-        key = (c['content'], c['content_id'])
-        if key not in seen:
+    def iter_comments():
+        seen = set()
+        for c in iter_json_items(file_path):
+            # 清洗content
+            c['content'] = clean_comment_content(c.get('content', ''))
+            # 计算评论字数
+            c['content_length'] = len(c['content'])
+            # 根据字数过滤评论
+            if not 5 <= c['content_length'] <= 1000:
+                continue
+            # 去重（content + content_id）
+            key = (c['content'], c['content_id'])
+            if key in seen:
+                continue
             seen.add(key)
-            unique_comments.append(c)
+            yield c
 
-    # 转为DataFrame
-    df_comments = pd.DataFrame(unique_comments)
-    df_comments.to_csv(output_path, index=False, encoding='utf-8-sig')
+    write_records_to_csv(iter_comments(), output_path)
 
 
 def delet_articles_without_comments(file_path_articles, file_path_comments, output_path):
@@ -128,43 +166,7 @@ if __name__ == "__main__":
     # print(df_articles['img_urls'].iloc[0])
     # print(type(df_articles['img_urls'].iloc[0]))
 
-    # rename
-    # url,content,content_id,created_at,like_num,id,identity_name,identity_type,nick_name,country,province,reply_num,reply_to_id,ds_stance,ds_sentiment,ds_intent
-
-    df_comments = pd.read_csv('weixin/weixin_final_results/weixin_comments_clean_with_ds.csv', encoding='utf-8-sig', dtype=str)
-    df_comments.rename(columns={
-        'url': 'article_id',
-        'content': 'content',
-        'content_id': 'content_id',
-        'created_at': 'created_time',
-        'like_num': 'like_count',
-        'id': 'comment_id',
-        'identity_name': 'identity_name',
-        'identity_type': 'identity_type',
-        'nick_name': 'username',
-        'country': 'country',
-        'province': 'location',
-        'reply_num': 'comment_count',
-        'reply_to_id': 'parent_comment_id',
-        'ds_stance': 'stance',
-        'ds_sentiment': 'sentiment',
-        'ds_intent': 'intent'
-    }, inplace=True)
-
-    # 保存到新的CSV文件
-    df_comments.to_csv('weixin/weixin_final_results/weixin_comments_clean_with_ds_renamed.csv', index=False, encoding='utf-8-sig')
-
-    # title,url,author,author_id,content,img_urls,multimodal_stance,multimodal_sentiment,multimodal_intent
-    df_articles = pd.read_csv('weixin/weixin_final_results/weixin_articles_with_comments_stance_sentiment_intent.csv',
-                              encoding='utf-8-sig', dtype=str)
-    df_articles.rename(columns={
-        'url': 'article_id',
-        'author': 'username',
-        'content': 'content',
-        'img_urls': 'img_urls',
-        'multimodal_stance': 'stance',
-        'multimodal_sentiment': 'sentiment',
-        'multimodal_intent': 'intent'
-    }, inplace=True)
-    # 保存到新的CSV文件
-    df_articles.to_csv('weixin/weixin_final_results/weixin_articles_renamed.csv', index=False, encoding='utf-8-sig')
+    # 列名按 common.schema.COLUMN_MAPPINGS 统一（url -> article_id、ds_stance -> stance 等）
+    # 评论在拆分立场时读入即统一，见 utils.split_multi_stance(..., platform='weixin')
+    export_unified('weixin/weixin_final_results/weixin_articles_with_comments_stance_sentiment_intent.csv',
+                   'weixin/weixin_final_results/weixin_articles_renamed.csv', 'weixin', 'meta')
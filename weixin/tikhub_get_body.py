@@ -3,9 +3,17 @@ import asyncio
 import json
 import os
 import requests
+import sys
 import time
 from dotenv import load_dotenv
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.json_utils import load_json, dump_json
+from common.proxy_pool import load_proxy_pool, http_get
+
+# 仓库根目录有 proxies.txt 时通过代理池请求接口
+proxy_pool = load_proxy_pool()
+
 
 # 从xlsx中读取每个url，存到txt文件中
 def read_urls_from_xlsx(file_path, save_path):
@@ -102,7 +110,7 @@ def save_data_to_json(urls):
 
         while retry_count < max_retries:
             try:
-                response = requests.get(api_url, headers=headers)
+                response = http_get(api_url, proxy_pool, headers=headers)
                 response.raise_for_status()  # 检查请求是否成功
 
                 # 解析JSON响应
@@ -116,8 +124,7 @@ def save_data_to_json(urls):
                     continue
 
                 # data不为null，保存数据
-                with open(f'weixin/weixin_articles/weixin_article_data_{i}.json', 'w', encoding='utf-8') as f:
-                    json.dump(data, f, ensure_ascii=False, indent=2)
+                dump_json(data, f'weixin/weixin_articles/weixin_article_data_{i}.json')
                 print(f"数据已成功保存到 weixin_article_data_{i}.json")
                 break  # 成功获取数据，跳出重试循环
 
@@ -152,14 +159,13 @@ def save_one_data_to_json(url, i):
     }
 
     try:
-        response = requests.get(url, headers=headers)
+        response = http_get(url, proxy_pool, headers=headers)
         response.raise_for_status()  # 检查请求是否成功
 
         # 解析JSON响应
         data = response.json()
         # 保存数据到文件
-        with open(f'weixin/weixin_articles/weixin_article_data_{i}.json', 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        dump_json(data, f'weixin/weixin_articles/weixin_article_data_{i}.json')
         print(f"数据已成功保存到 weixin_article_data_{i}.json")
     except requests.RequestException as e:
         print(f"请求失败: {e}")
@@ -175,26 +181,33 @@ def get_json_data_from_file(file_path):
     :param file_path: JSON文件夹的路径
     :return: 解析后的数据
     """
+    return list(iter_json_data_from_file(file_path))
+
+
+def iter_json_data_from_file(file_path):
+    """
+    逐个读取文件夹中的JSON文件，逐条产出解析后的文章数据。
+
+    :param file_path: JSON文件夹的路径
+    :return: 解析后的数据生成器
+    """
     # 读取文件夹中的所有JSON文件
     if not os.path.exists(file_path):
         print(f"文件 {file_path} 不存在")
-        return []
-    data_list = []
+        return
     for file_name in os.listdir(file_path):
         if file_name.endswith('.json'):
             file_path_full = os.path.join(file_path, file_name)
             try:
-                with open(file_path_full, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    data = get_data_from_json(data)
-                    if data:  # 确保数据不为空
-                        data_list.append(data)
+                data = get_data_from_json(load_json(file_path_full))
             except json.JSONDecodeError as e:
                 print(f"解析文件 {file_path_full} 时出错: {e}")
+                continue
             except Exception as e:
                 print(f"读取文件 {file_path_full} 时出错: {e}")
-
-    return data_list
+                continue
+            if data:  # 确保数据不为空
+                yield data
 
 
 def get_data_from_json(data):
@@ -240,9 +253,7 @@ if __name__ == "__main__":
     # 读取指定文件夹中的所有JSON文件
 
     # folder_path = 'weixin/weixin_articles'
-    # all_data = get_json_data_from_file(folder_path)
-    # # 存储所有数据到一个新的JSON文件
+    # # 流式存储所有数据到一个新的JSON文件
     # output_file = 'weixin/weixin_all_data.json'
-    # with open(output_file, 'w', encoding='utf-8') as f:
-    #     json.dump(all_data, f, ensure_ascii=False, indent=2)
+    # write_json_array(iter_json_data_from_file(folder_path), output_file)
     # print(f"所有数据已保存到 {output_file}")
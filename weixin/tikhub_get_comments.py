@@ -3,9 +3,18 @@ import asyncio
 import json
 import os
 import requests
+import sys
 import time
 from dotenv import load_dotenv
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.json_utils import load_json, dump_json, write_json_array
+from common.proxy_pool import load_proxy_pool, http_get
+from common.records import WeixinComment
+
+# 仓库根目录有 proxies.txt 时通过代理池请求接口
+proxy_pool = load_proxy_pool()
+
 
 # 从xlsx中读取每个url，存到txt文件中
 def read_urls_from_xlsx(file_path, save_path):
@@ -74,7 +83,7 @@ def save_data_to_json(urls):
 
         while retry_count < max_retries:
             try:
-                response = requests.get(api_url, headers=headers)
+                response = http_get(api_url, proxy_pool, headers=headers)
                 response.raise_for_status()  # 检查请求是否成功
 
                 # 解析JSON响应
@@ -90,12 +99,7 @@ def save_data_to_json(urls):
                     continue
 
                 # data不为null，保存数据
-                with open(
-                    f"weixin/weixin_comments/weixin_comments_data_{i}.json",
-                    "w",
-                    encoding="utf-8",
-                ) as f:
-                    json.dump(data, f, ensure_ascii=False, indent=2)
+                dump_json(data, f"weixin/weixin_comments/weixin_comments_data_{i}.json")
                 print(f"数据已成功保存到 weixin_comments_data_{i}.json")
                 break  # 成功获取数据，跳出重试循环
 
@@ -133,18 +137,13 @@ def save_one_data_to_json(url, i):
     }
 
     try:
-        response = requests.get(url, headers=headers)
+        response = http_get(url, proxy_pool, headers=headers)
         response.raise_for_status()  # 检查请求是否成功
 
         # 解析JSON响应
         data = response.json()
         # 保存数据到文件
-        with open(
-            f"weixin/weixin_articles/weixin_article_data_{i}.json",
-            "w",
-            encoding="utf-8",
-        ) as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        dump_json(data, f"weixin/weixin_articles/weixin_article_data_{i}.json")
         print(f"数据已成功保存到 weixin_article_data_{i}.json")
     except requests.RequestException as e:
         print(f"请求失败: {e}")
@@ -160,28 +159,37 @@ def get_json_data_from_file(file_path):
     :param file_path: JSON文件夹的路径
     :return: 解析后的数据
     """
+    return list(iter_json_data_from_file(file_path))
+
+
+def iter_json_data_from_file(file_path):
+    """
+    逐个读取文件夹中的JSON文件，逐条产出解析后的评论数据。
+
+    :param file_path: JSON文件夹的路径
+    :return: 评论数据生成器，每条为字典
+    """
     # 读取文件夹中的所有JSON文件
     if not os.path.exists(file_path):
         print(f"文件 {file_path} 不存在")
-        return []
-    data_list = []
+        return
     for file_name in os.listdir(file_path):
         if file_name.endswith(".json"):
             file_path_full = os.path.join(file_path, file_name)
             try:
-                with open(file_path_full, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    data = get_data_from_json(data)
-                    if data:  # 确保数据不为空
-                        data_list.extend(data)
-                    else:
-                        print(f"文件 {file_path_full} 中没有有效数据")
+                data = get_data_from_json(load_json(file_path_full))
             except json.JSONDecodeError as e:
                 print(f"解析文件 {file_path_full} 时出错: {e}")
+                continue
             except Exception as e:
                 print(f"读取文件 {file_path_full} 时出错: {e}")
-
-    return data_list
+                continue
+            if data:  # 确保数据不为空
+                # 文件内缓冲的是WeixinComment，对外仍然产出字典
+                for comment in data:
+                    yield comment._asdict()
+            else:
+                print(f"文件 {file_path_full} 中没有有效数据")
 
 
 def get_data_from_json(data):
@@ -189,53 +197,53 @@ def get_data_from_json(data):
     从解析后的JSON数据中提取所需信息。
 
     :param data: 解析后的JSON数据
-    :return: 提取后的数据列表
+    :return: 提取后的评论列表，每条为WeixinComment
     """
     url = data.get("params", {}).get("url", "")
     data = data.get("data", [])
 
     if not data:
         print("数据为空或格式不正确")
-        return {}
+        return []
 
     final_data = []
     for item in data:
         if isinstance(item, dict):
-            article_data = {
-                "url": url,
-                "content": item.get("content", ""),
-                "content_id": item.get("content_id", ""),
-                "created_at": item.get("create_time", ""),
-                "like_num": item.get("like_num", 0),
-                "id": item.get("id", ""),
-                "identity_name": item.get("identity_name", ""),
-                "identity_type": item.get("identity_type", ""),
-                "nick_name": item.get("nickname", ""),
-                "country": item.get("ip_wording", {}).get("country_name", ""),
-                "province": item.get("ip_wording", {}).get("province_name", ""),
-                "reply_num": item.get("reply_new", {}).get("reply_total_cnt", 0),
-                "reply_to_id": ""
-            }
+            article_data = WeixinComment(
+                url=url,
+                content=item.get("content", ""),
+                content_id=item.get("content_id", ""),
+                created_at=item.get("create_time", ""),
+                like_num=item.get("like_num", 0),
+                id=item.get("id", ""),
+                identity_name=item.get("identity_name", ""),
+                identity_type=item.get("identity_type", ""),
+                nick_name=item.get("nickname", ""),
+                country=item.get("ip_wording", {}).get("country_name", ""),
+                province=item.get("ip_wording", {}).get("province_name", ""),
+                reply_num=item.get("reply_new", {}).get("reply_total_cnt", 0),
+                reply_to_id=""
+            )
             final_data.append(article_data)
-            if article_data["reply_num"] > 0:
+            if article_data.reply_num > 0:
                 replies = item.get("reply_new", {}).get("reply_list", [])
                 if replies != []:
                     for reply in replies:
-                        reply_data = {
-                            "url": url,
-                            "content": reply.get("content", ""),
-                            "content_id": article_data["content_id"],
-                            "created_at": reply.get("create_time", ""),
-                            "like_num": reply.get("reply_like_num", 0),
-                            "id": reply.get("reply_id", ""),
-                            "identity_name": reply.get("identity_name", ""),
-                            "identity_type": reply.get("identity_type", ""),
-                            "nick_name": reply.get("nickname", ""),
-                            "country": reply.get("ip_wording", {}).get("country_name", ""),
-                            "province": reply.get("ip_wording", {}).get("province_name", ""),
-                            "reply_num": 0,  # 回复的回复数通常为0
-                            "reply_to_id": article_data["id"]  # 回复的回复指向原评论
-                        }
+                        reply_data = WeixinComment(
+                            url=url,
+                            content=reply.get("content", ""),
+                            content_id=article_data.content_id,
+                            created_at=reply.get("create_time", ""),
+                            like_num=reply.get("reply_like_num", 0),
+                            id=reply.get("reply_id", ""),
+                            identity_name=reply.get("identity_name", ""),
+                            identity_type=reply.get("identity_type", ""),
+                            nick_name=reply.get("nickname", ""),
+                            country=reply.get("ip_wording", {}).get("country_name", ""),
+                            province=reply.get("ip_wording", {}).get("province_name", ""),
+                            reply_num=0,  # 回复的回复数通常为0
+                            reply_to_id=article_data.id  # 回复的回复指向原评论
+                        )
                         final_data.append(reply_data)
 
     return final_data
@@ -258,14 +266,10 @@ if __name__ == "__main__":
     # -----------------------------
     # 读取指定文件夹中的所有JSON文件
     folder_path = 'weixin/weixin_comments'
-    all_data = get_json_data_from_file(folder_path)
     # 存储所有数据到一个新的JSON文件
     output_file = 'weixin/weixin_final_results/weixin_comments.json'
-    # 确保输出文件存在
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    # 边读取边写入，不在内存中保留全部评论
+    total = write_json_array(iter_json_data_from_file(folder_path), output_file)
     # 打印数据条数
-    print(f"共读取到 {len(all_data)} 条评论数据")
-    # 将所有数据写入到一个JSON文件中
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(all_data, f, ensure_ascii=False, indent=2)
+    print(f"共读取到 {total} 条评论数据")
     print(f"所有数据已保存到 {output_file}")
@@ -1,8 +1,13 @@
 import pandas as pd
 import re
 import os
+import sys
 from datetime import datetime
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.time_utils import to_epoch_seconds
+from common.schema import read_table, save_table, export_unified
+
 
 def extract_image_urls(text):
     """
@@ -201,7 +206,7 @@ def clean_content_pipeline(text):
 
 def convert_timestamp(timestamp):
     """
-    转换小红书时间戳为秒级时间戳
+    转换小红书时间戳为秒级时间戳（单个值；整列转换请使用 to_epoch_seconds）
     """
     try:
         if pd.isna(timestamp):
@@ -225,8 +230,8 @@ def save_matched_info_from_meta_data(content_file, comment_file):
     根据评论数据中的note_id，筛选出内容数据中匹配的记录
     """
     # 读取CSV文件
-    content_df = pd.read_csv(content_file, encoding='utf-8', dtype={'note_id': str})
-    comment_df = pd.read_csv(comment_file, encoding='utf-8', dtype={'note_id': str, 'comment_id': str})
+    content_df = read_table(content_file, 'xhs')
+    comment_df = read_table(comment_file, 'xhs')
 
     # 检查是否包含 'note_id' 列
     if 'note_id' not in content_df.columns or 'note_id' not in comment_df.columns:
@@ -234,10 +239,10 @@ def save_matched_info_from_meta_data(content_file, comment_file):
         return
 
     # 获取comment_df中所有的note_id
-    comment_note_ids = set(comment_df['note_id'].dropna().astype(str))
+    comment_note_ids = comment_df['note_id'].dropna().unique()
 
     # 匹配到的行
-    matched_content = content_df[content_df['note_id'].astype(str).isin(comment_note_ids)]
+    matched_content = content_df[content_df['note_id'].isin(comment_note_ids)]
 
     # 保存匹配到的行到新的CSV文件
     matched_content_file = content_file.replace('.csv', '_matched.csv')
@@ -252,8 +257,8 @@ def save_matched_info_from_comment_data(comment_file, content_file):
     根据内容数据中的note_id，筛选出评论数据中匹配的记录
     """
     # 读取CSV文件
-    comment_df = pd.read_csv(comment_file, encoding='utf-8', dtype={'note_id': str, 'comment_id': str})
-    content_df = pd.read_csv(content_file, encoding='utf-8', dtype={'note_id': str})
+    comment_df = read_table(comment_file, 'xhs')
+    content_df = read_table(content_file, 'xhs')
 
     # 检查是否包含 'note_id' 列
     if 'note_id' not in comment_df.columns or 'note_id' not in content_df.columns:
@@ -261,10 +266,10 @@ def save_matched_info_from_comment_data(comment_file, content_file):
         return
 
     # 获取content_df中所有的note_id
-    content_note_ids = set(content_df['note_id'].dropna().astype(str))
+    content_note_ids = content_df['note_id'].dropna().unique()
 
     # 匹配到的行
-    matched_comment = comment_df[comment_df['note_id'].astype(str).isin(content_note_ids)]
+    matched_comment = comment_df[comment_df['note_id'].isin(content_note_ids)]
 
     # 保存匹配到的行到新的CSV文件
     matched_comment_file = comment_file.replace('.csv', '_matched.csv')
@@ -279,13 +284,7 @@ def clean_xhs_comments_data(input_file, output_file):
     清理小红书评论数据
     """
     # 读取CSV文件
-    try:
-        df = pd.read_csv(input_file, encoding="utf-8-sig", dtype={'note_id': str, 'comment_id': str, 'user_id': str, 'parent_comment_id': str})
-    except:
-        try:
-            df = pd.read_csv(input_file, encoding="gbk", dtype={'note_id': str, 'comment_id': str, 'user_id': str, 'parent_comment_id': str})
-        except:
-            df = pd.read_csv(input_file, encoding="utf-8", dtype={'note_id': str, 'comment_id': str, 'user_id': str, 'parent_comment_id': str})
+    df = read_table(input_file, 'xhs')
 
     # 输出原始条目数
     print(f"原始CSV文件包含 {len(df)} 条记录")
@@ -307,7 +306,7 @@ def clean_xhs_comments_data(input_file, output_file):
     # 转换时间戳
     if 'create_time' in df.columns:
         print("正在转换时间戳...")
-        df['create_time'] = df['create_time'].apply(convert_timestamp)
+        df['create_time'] = to_epoch_seconds(df['create_time'])
 
     # 处理数值字段
     numeric_columns = ['like_count', 'sub_comment_count', 'parent_comment_id']
@@ -319,11 +318,10 @@ def clean_xhs_comments_data(input_file, output_file):
     if 'ip_location' in df.columns:
         print("正在处理ip_location列...")
         # 处理ip_location, 把空的值填充为'未知'
-        df['ip_location'] = df['ip_location'].fillna('未知')
-        # 处理ip_location中的特殊字符
-        df['ip_location'] = df['ip_location'].apply(lambda x: re.sub(r'[^\w\s]', '', str(x)))
-        # 清理多余的空格
-        df['ip_location'] = df['ip_location'].apply(lambda x: ' '.join(x.split()))
+        df['ip_location'] = df['ip_location'].astype(object).fillna('未知').astype('category')
+        # 处理ip_location中的特殊字符并清理多余的空格，category列只对每个不同的取值处理一次
+        df['ip_location'] = df['ip_location'].map(lambda x: ' '.join(re.sub(r'[^\w\s]', '', str(x)).split()))
+        df['ip_location'] = df['ip_location'].astype('category')
 
     # 过滤掉content内容长度小于7的记录
     print("正在过滤短内容...")
@@ -343,7 +341,7 @@ def clean_xhs_comments_data(input_file, output_file):
     print(f"包含@用户名的记录数：{mention_count}")
 
     # 保存清理后的数据
-    df.to_csv(output_file, index=False, encoding="utf-8-sig")
+    save_table(df, output_file)
     print(f"清理后的数据已保存到：{output_file}")
 
 
@@ -352,13 +350,7 @@ def clean_xhs_content_data(input_file, output_file):
     清理小红书内容数据
     """
     # 读取CSV文件
-    try:
-        df = pd.read_csv(input_file, encoding="utf-8-sig", dtype={'note_id': str, 'user_id': str})
-    except:
-        try:
-            df = pd.read_csv(input_file, encoding="gbk", dtype={'note_id': str, 'user_id': str})
-        except:
-            df = pd.read_csv(input_file, encoding="utf-8", dtype={'note_id': str, 'user_id': str})
+    df = read_table(input_file, 'xhs')
 
     # 输出原始条目数
     print(f"原始CSV文件包含 {len(df)} 条记录")
@@ -394,12 +386,12 @@ def clean_xhs_content_data(input_file, output_file):
     for col in time_columns:
         if col in df.columns:
             print(f"正在转换{col}时间戳...")
-            df[col] = df[col].apply(convert_timestamp)
+            df[col] = to_epoch_seconds(df[col])
 
     # 筛除time数值在1743091200以前的记录
     if 'time' in df.columns:
         print("正在筛除time数值在1743091200以前的记录...")
-        df = df[df['time'] >= 1743091200]
+        df = df[(df['time'] >= 1743091200).fillna(False)]
     else:
         print("警告：CSV文件中没有'time'列，无法进行时间筛选")
 
@@ -413,18 +405,17 @@ def clean_xhs_content_data(input_file, output_file):
     if 'ip_location' in df.columns:
         print("正在处理ip_location列...")
         # 处理ip_location, 把空的值填充为'未知'
-        df['ip_location'] = df['ip_location'].fillna('未知')
-        # 处理ip_location中的特殊字符
-        df['ip_location'] = df['ip_location'].apply(lambda x: re.sub(r'[^\w\s]', '', str(x)))
-        # 清理多余的空格
-        df['ip_location'] = df['ip_location'].apply(lambda x: ' '.join(x.split()))
+        df['ip_location'] = df['ip_location'].astype(object).fillna('未知').astype('category')
+        # 处理ip_location中的特殊字符并清理多余的空格，category列只对每个不同的取值处理一次
+        df['ip_location'] = df['ip_location'].map(lambda x: ' '.join(re.sub(r'[^\w\s]', '', str(x)).split()))
+        df['ip_location'] = df['ip_location'].astype('category')
 
     # 计算文本长度
     for col in columns_to_clean:
         df[f'{col}_length'] = df[col].apply(lambda x: len(str(x)) if pd.notna(x) else 0)
 
     # 保存清理后的数据
-    df.to_csv(output_file, index=False, encoding="utf-8-sig")
+    save_table(df, output_file)
     print(f"清理后的数据已保存到：{output_file}")
 
 
@@ -476,49 +467,7 @@ if __name__ == "__main__":
     save_matched_info_from_comment_data('xhs/xhs_results_final/cleaned_xhs_comments_ds.csv',
                                         'xhs/xhs_results_final/cleaned_xhs_content_data_matched.csv')
 
-    # rename
-    # comment_id,create_time,ip_location,note_id,content,user_id,nickname,avatar,sub_comment_count,pictures,parent_comment_id,last_modify_ts,like_count,mentions,ds_stance,ds_sentiment,ds_intent
-    # note_id,type,title,desc,video_url,time,last_update_time,user_id,nickname,avatar,liked_count,collected_count,comment_count,share_count,ip_location,image_list,tag_list,last_modify_ts,note_url,source_keyword,xsec_token,desc_hashtags,desc_mentions,title_hashtags,title_mentions,time_readable,last_update_time_readable,last_modify_ts_readable,desc_length,title_length,multimodal_stance,multimodal_sentiment,multimodal_intent
-
-    input_file = "xhs/xhs_results_final/cleaned_xhs_comments_ds_matched.csv"
-    output_file = "xhs/xhs_results_final/cleaned_xhs_comments_ds_renamed.csv"
-
-    df = pd.read_csv(input_file, encoding="utf-8-sig", dtype=str)
-
-    # 重命名列
-    df.rename(columns={'note_id': 'article_id',
-                       'create_time': 'created_time',
-                       'ip_location': 'location',
-                       'user_id': 'uid',
-                       'nickname': 'username',
-                       'sub_comment_count': 'child_comment_count',
-                       'pictures': 'img_urls',
-                       'ds_stance': 'stance',
-                       'ds_sentiment': 'sentiment',
-                       'ds_intent': 'intent'}, inplace=True)
-
-    # 输出output文件
-    df.to_csv(output_file, index=False, encoding="utf-8-sig")
-    print(f"重命名后的数据已保存到：{output_file}")
-
-    input_file = "xhs/xhs_results_final/cleaned_xhs_content_data_matched.csv"
-    output_file = "xhs/xhs_results_final/cleaned_xhs_content_data_renamed.csv"
-
-    df = pd.read_csv(input_file, encoding="utf-8-sig", dtype=str)
-    # 重命名列
-    df.rename(columns={'note_id': 'article_id',
-                       'desc': 'content',
-                       'video_url': 'video_urls',
-                       'time': 'created_time',
-                       'last_update_time': 'updated_time',
-                       'user_id': 'uid',
-                       'nickname': 'username',
-                       'liked_count': 'like_count',
-                       'ip_location': 'location',
-                       'image_list': 'img_urls',
-                       'multimodal_stance': 'stance',
-                       'multimodal_sentiment': 'sentiment',
-                       'multimodal_intent': 'intent'}, inplace=True)
-    # 输出output文件
-    df.to_csv(output_file, index=False, encoding="utf-8-sig")
-    print(f"重命名后的数据已保存到：{output_file}")
+    # 列名按 common.schema.COLUMN_MAPPINGS 统一（note_id -> article_id、ds_stance -> stance 等）
+    # 评论在拆分立场时读入即统一，见 utils.split_multi_stance(..., platform='xhs')
+    export_unified("xhs/xhs_results_final/cleaned_xhs_content_data_matched.csv",
+                   "xhs/xhs_results_final/cleaned_xhs_content_data_renamed.csv", 'xhs', 'meta')
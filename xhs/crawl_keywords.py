@@ -6,6 +6,7 @@ import time
 import json
 import random
 import os
+import sys
 from datetime import datetime
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -16,6 +17,10 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from selenium.webdriver.common.action_chains import ActionChains
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.json_utils import dump_json
+from common.frontier import UrlFrontier
+
 
 class XiaohongshuSearchCrawler:
     def __init__(self, driver_path='D:\Anaconda\envs\crawl\msedgedriver.exe', headless=False, output_dir="xiaohongshu_results"):
@@ -138,7 +143,9 @@ class XiaohongshuSearchCrawler:
         """
         print(f"开始滚动加载更多内容，共滚动{scroll_count}次...")
 
-        all_urls = set()  # 使用set自动去重
+        # 按规范化后的URL去重（同一篇笔记的search_result/explore链接、不同xsec_token只保留第一次出现的）
+        seen = UrlFrontier()
+        all_urls = []
 
         for i in range(scroll_count):
             # 获取滚动前的页面高度
@@ -168,8 +175,7 @@ class XiaohongshuSearchCrawler:
 
             # 提取当前页面的所有URL并添加到集合中
             current_urls = self._extract_note_urls()
-            for url in current_urls:
-                all_urls.add(url)
+            all_urls.extend(seen.add_many(current_urls))
 
             print(f"完成第{i+1}次滚动，本次找到 {len(current_urls)} 个链接，累积 {len(all_urls)} 个不重复链接")
 
@@ -177,7 +183,8 @@ class XiaohongshuSearchCrawler:
             if new_height == last_height:
                 print(f"页面高度未变化，可能已加载完所有内容")
 
-        return list(all_urls)
+        seen.close()
+        return all_urls
 
     def search_keyword(self, keyword, max_scroll=10):
         """
@@ -328,16 +335,15 @@ class XiaohongshuSearchCrawler:
 
         return note_urls
 
-    def _save_urls(self, urls, filename):
-        """保存URL列表到文件"""
+    def _save_urls(self, urls, filename, pretty=False):
+        """保存URL列表到文件，pretty为True时缩进美化输出"""
         filepath = os.path.join(self.output_dir, filename)
         data = {
             'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             'count': len(urls),
             'urls': urls
         }
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        dump_json(data, filepath, pretty=pretty)
         print(f"URL列表已保存到 {filepath}")
 
     def __enter__(self):
@@ -348,7 +354,8 @@ class XiaohongshuSearchCrawler:
         self.close_browser()
 
 
-def main(keywords=None, cookie_path="xiaohongshu_cookies.json", output_dir="xiaohongshu_results", max_scroll=15):
+def main(keywords=None, cookie_path="xiaohongshu_cookies.json", output_dir="xiaohongshu_results", max_scroll=15,
+         frontier_db=None):
     """
     主函数
 
@@ -357,6 +364,7 @@ def main(keywords=None, cookie_path="xiaohongshu_cookies.json", output_dir="xiao
         cookie_path: cookies文件路径
         output_dir: 输出目录
         max_scroll: 最大滚动次数
+        frontier_db: 历史URL去重记录的数据库路径，默认为输出目录下的 urls.frontier.db
     """
     keywords = keywords or ["美食"]
 
@@ -376,12 +384,14 @@ def main(keywords=None, cookie_path="xiaohongshu_cookies.json", output_dir="xiao
                 print("未登录，将以游客身份继续（可能会有限制）")
 
         all_urls = []
+        # 跨关键词、跨运行去重，之前保存过的笔记不再重复输出
+        frontier = UrlFrontier(frontier_db or os.path.join(output_dir, 'urls.frontier.db'))
 
         # 爬取每个关键词
         for keyword in keywords:
             print(f"\n开始爬取关键词: {keyword}")
             urls = crawler.search_keyword(keyword, max_scroll=max_scroll)
-            all_urls.extend(urls)
+            all_urls.extend(frontier.add_many(urls))
 
             # 打印部分结果
             if urls:
@@ -397,10 +407,11 @@ def main(keywords=None, cookie_path="xiaohongshu_cookies.json", output_dir="xiao
 
         # 保存所有结果
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        all_urls = list(set(all_urls))  # 去重
         crawler._save_urls(all_urls, f"all_xiaohongshu_urls_{timestamp}.json")
+        total_count = len(frontier)
+        frontier.close()
 
-        print(f"\n总共获取到 {len(all_urls)} 个不重复的笔记链接")
+        print(f"\n总共获取到 {len(all_urls)} 个新的笔记链接（历史累计 {total_count} 个）")
 
 
 if __name__ == "__main__":
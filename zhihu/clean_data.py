@@ -1,6 +1,11 @@
 import pandas as pd
 import re
 from bs4 import BeautifulSoup
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.schema import read_table, save_table, export_unified
 
 
 def extract_image_urls(text):
@@ -142,27 +147,8 @@ def clean_content_pipeline(text):
 
 def save_matched_info_from_meta_data(meta_file, review_file):
     # 读取CSV文件
-    meta_df = pd.read_csv(
-        meta_file,
-        encoding="utf-8",
-        dtype={
-            "article_id": str,
-            "question_id": str,
-            "answer_id": str,
-            "created_time": str,
-        },
-    )
-    review_df = pd.read_csv(
-        review_file,
-        encoding="utf-8",
-        dtype={
-            "article_id": str,
-            "question_id": str,
-            "answer_id": str,
-            "comment_id": str,
-            "super_comment_id": str,
-        },
-    )
+    meta_df = read_table(meta_file, "zhihu", dtype={"created_time": str})
+    review_df = read_table(review_file, "zhihu")
 
     # 检查是否包含 'article_id' 列
     if "article_id" not in meta_df.columns or "article_id" not in review_df.columns:
@@ -181,16 +167,16 @@ def save_matched_info_from_meta_data(meta_file, review_file):
         return
 
     # 获取review_df中所有的article_id
-    review_article_ids = set(review_df["article_id"].dropna().astype(str))
+    review_article_ids = review_df["article_id"].dropna().unique()
     # 获取review_df中所有的question_id和answer_id
-    review_question_ids = set(review_df["question_id"].dropna().astype(str))
-    review_answer_ids = set(review_df["answer_id"].dropna().astype(str))
+    review_question_ids = review_df["question_id"].dropna().unique()
+    review_answer_ids = review_df["answer_id"].dropna().unique()
 
     # 匹配到的行
     matched_meta = meta_df[
-        meta_df["article_id"].astype(str).isin(review_article_ids)
-        | meta_df["question_id"].astype(str).isin(review_question_ids)
-        | meta_df["answer_id"].astype(str).isin(review_answer_ids)
+        meta_df["article_id"].isin(review_article_ids)
+        | meta_df["question_id"].isin(review_question_ids)
+        | meta_df["answer_id"].isin(review_answer_ids)
     ]
 
     # 保存匹配到的行到新的CSV文件
@@ -202,27 +188,8 @@ def save_matched_info_from_meta_data(meta_file, review_file):
 
 def save_matched_info_from_review_data(review_file, meta_file):
     # 读取CSV文件
-    review_df = pd.read_csv(
-        review_file,
-        encoding="utf-8",
-        dtype={
-            "article_id": str,
-            "question_id": str,
-            "answer_id": str,
-            "comment_id": str,
-            "super_comment_id": str,
-        },
-    )
-    meta_df = pd.read_csv(
-        meta_file,
-        encoding="utf-8",
-        dtype={
-            "article_id": str,
-            "question_id": str,
-            "answer_id": str,
-            "created_time": str,
-        },
-    )
+    review_df = read_table(review_file, "zhihu")
+    meta_df = read_table(meta_file, "zhihu", dtype={"created_time": str})
 
     # 检查是否包含 'article_id' 列
     if "article_id" not in review_df.columns or "article_id" not in meta_df.columns:
@@ -241,16 +208,16 @@ def save_matched_info_from_review_data(review_file, meta_file):
         return
 
     # 获取meta_df中所有的article_id
-    meta_article_ids = set(meta_df["article_id"].dropna().astype(str))
-    meta_question_ids = set(meta_df["question_id"].dropna().astype(str))
-    meta_answer_ids = set(meta_df["answer_id"].dropna().astype(str))
+    meta_article_ids = meta_df["article_id"].dropna().unique()
+    meta_question_ids = meta_df["question_id"].dropna().unique()
+    meta_answer_ids = meta_df["answer_id"].dropna().unique()
 
     # 匹配到的行
     matched_review = review_df[
-        review_df["article_id"].astype(str).isin(meta_article_ids)
+        review_df["article_id"].isin(meta_article_ids)
         | (
-            review_df["question_id"].astype(str).isin(meta_question_ids)
-            & review_df["answer_id"].astype(str).isin(meta_answer_ids)
+            review_df["question_id"].isin(meta_question_ids)
+            & review_df["answer_id"].isin(meta_answer_ids)
         )
     ]
     # 保存匹配到的行到新的CSV文件
@@ -265,43 +232,7 @@ def clean_zhihu_comments_data(input_file, output_file):
     清理知乎评论数据
     """
     # 读取CSV文件
-    try:
-        df = pd.read_csv(
-            input_file,
-            encoding="utf-8-sig",
-            dtype={
-                "article_id": str,
-                "question_id": str,
-                "answer_id": str,
-                "comment_id": str,
-                "super_comment_id": str,
-            },
-        )
-    except:
-        try:
-            df = pd.read_csv(
-                input_file,
-                encoding="gbk",
-                dtype={
-                    "article_id": str,
-                    "question_id": str,
-                    "answer_id": str,
-                    "comment_id": str,
-                    "super_comment_id": str,
-                },
-            )
-        except:
-            df = pd.read_csv(
-                input_file,
-                encoding="utf-8",
-                dtype={
-                    "article_id": str,
-                    "question_id": str,
-                    "answer_id": str,
-                    "comment_id": str,
-                    "super_comment_id": str,
-                },
-            )
+    df = read_table(input_file, "zhihu")
 
     # 输出原始条目数
     print(f"原始CSV文件包含 {len(df)} 条记录")
@@ -352,48 +283,12 @@ def clean_zhihu_comments_data(input_file, output_file):
     print(f"- 文字+图片记录：{text_and_img}")
     print(f"- 总图片记录数：{img_count}")
     # 保存清理后的数据
-    df.to_csv(output_file, index=False, encoding="utf-8-sig")
+    save_table(df, output_file)
 
 
 def clean_zhihu_meta_data(input_file, output_file):
     # 读取CSV文件
-    try:
-        df = pd.read_csv(
-            input_file,
-            encoding="utf-8-sig",
-            dtype={
-                "article_id": str,
-                "question_id": str,
-                "answer_id": str,
-                "comment_id": str,
-                "super_comment_id": str,
-            },
-        )
-    except:
-        try:
-            df = pd.read_csv(
-                input_file,
-                encoding="gbk",
-                dtype={
-                    "article_id": str,
-                    "question_id": str,
-                    "answer_id": str,
-                    "comment_id": str,
-                    "super_comment_id": str,
-                },
-            )
-        except:
-            df = pd.read_csv(
-                input_file,
-                encoding="utf-8",
-                dtype={
-                    "article_id": str,
-                    "question_id": str,
-                    "answer_id": str,
-                    "comment_id": str,
-                    "super_comment_id": str,
-                },
-            )
+    df = read_table(input_file, "zhihu")
 
     # 输出原始条目数
     print(f"原始CSV文件包含 {len(df)} 条记录")
@@ -424,7 +319,7 @@ def clean_zhihu_meta_data(input_file, output_file):
     else:
         print("警告：CSV文件中没有'created_time'列，无法进行时间筛选")
     # 保存清理后的数据
-    df.to_csv(output_file, index=False, encoding="utf-8-sig")
+    save_table(df, output_file)
     print(f"清理后的数据已保存到：{output_file}")
 
 
@@ -450,56 +345,11 @@ if __name__ == "__main__":
     #     "zhihu/zhihu_results_final/cleaned_zhihu_meta_data_matched.csv",
     # )
 
-    # rename
-    input_file = "zhihu/zhihu_results_final/cleaned_zhihu_comments_ds_matched.csv"
-
-    df = pd.read_csv(
-        input_file,
-        encoding="utf-8-sig",
-        dtype=str,
+    # 列名按 common.schema.COLUMN_MAPPINGS 统一（author -> uid、ds_stance -> stance 等）
+    # 评论在拆分立场时读入即统一，见 utils.split_multi_stance(..., platform="zhihu")
+    export_unified(
+        "zhihu/zhihu_results_final/cleaned_zhihu_meta_data_matched.csv",
+        "zhihu/zhihu_results_final/cleaned_zhihu_meta_data_renamed.csv",
+        "zhihu",
+        "meta",
     )
-    if "author" in df.columns:
-        df.rename(columns={"author": "uid"}, inplace=True)
-    if "super_comment_id" in df.columns:
-        df.rename(columns={"super_comment_id": "parent_comment_id"}, inplace=True)
-    if "author_name" in df.columns:
-        df.rename(columns={"author_name": "username"}, inplace=True)
-    if "ds_stance" in df.columns:
-        df.rename(columns={"ds_stance": "stance"}, inplace=True)
-    if "ds_sentiment" in df.columns:
-        df.rename(columns={"ds_sentiment": "sentiment"}, inplace=True)
-    if "ds_intent" in df.columns:
-        df.rename(columns={"ds_intent": "intent"}, inplace=True)
-    if "img_url" in df.columns:
-        df.rename(columns={"img_url": "img_urls"}, inplace=True)
-    if "created_area" in df.columns:
-        df.rename(columns={"created_area": "location"}, inplace=True)
-    if "child_comment_count" in df.columns:
-        df.rename(columns={"child_comment_count": "comment_count"}, inplace=True)
-
-    output_file = "zhihu/zhihu_results_final/cleaned_zhihu_comments_ds_renamed.csv"
-    df.to_csv(output_file, index=False, encoding="utf-8-sig")
-
-    input_file = "zhihu/zhihu_results_final/cleaned_zhihu_meta_data_matched.csv"
-    df = pd.read_csv(
-        input_file,
-        encoding="utf-8-sig",
-        dtype=str,
-    )
-    if "author_id" in df.columns:
-        df.rename(columns={"author_id": "uid"}, inplace=True)
-    if "author_name" in df.columns:
-        df.rename(columns={"author_name": "username"}, inplace=True)
-    if "vote_count" in df.columns:
-        df.rename(columns={"vote_count": "like_count"}, inplace=True)
-    if "multimodal_stance" in df.columns:
-        df.rename(columns={"multimodal_stance": "stance"}, inplace=True)
-    if "multimodal_sentiment" in df.columns:
-        df.rename(columns={"multimodal_sentiment": "sentiment"}, inplace=True)
-    if "multimodal_intent" in df.columns:
-        df.rename(columns={"multimodal_intent": "intent"}, inplace=True)
-    if "publish_time" in df.columns:
-        df.rename(columns={"publish_time": "created_time"}, inplace=True)
-
-    output_file = "zhihu/zhihu_results_final/cleaned_zhihu_meta_data_renamed.csv"
-    df.to_csv(output_file, index=False, encoding="utf-8-sig")
@@ -1,62 +1,70 @@
 from crawl_img import parse_page
-import requests
 import json
 import os
-import time
 import random
 from bs4 import BeautifulSoup
 from urllib.parse import urlparse, urljoin
-import csv
-from datetime import datetime
 import re
 
 # 添加路径
 import sys
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.time_utils import format_timestamp
+from common.account_pool import AccountPool
+from common.http_client import CrawlerSession
+from common.proxy_pool import load_proxy_pool
+from common.buffered_writer import BufferedCsvWriter
 
 
 class Zhihu_BodyCrawler:
-    def __init__(self):
-        self.headers = self.get_headers()
-
-    def get_headers(self, open_path='zhihu/zhihu_cookie_.json'):
-        with open(open_path, 'r', encoding='utf-8') as f:
-            headers = json.load(f)
-        return headers
+    def __init__(self, cookie_pattern='zhihu/zhihu_cookie*.json', strategy='round_robin'):
+        # 加载所有匹配的cookie文件，每次请求轮流使用
+        self.pool = AccountPool.from_glob(cookie_pattern, strategy=strategy, min_interval=1)
+        # 仓库根目录有 proxies.txt 时按账号分配代理
+        self.session = CrawlerSession(self.pool, proxy_pool=load_proxy_pool())
+        # 每个输出文件一个写入器，整个运行期间只打开一次
+        self.writers = {}
 
     def save_to_csv(self, data, csv_file='zhihu/zhihu_data.csv', is_append=True):
-        # 检查文件是否存在
-        file_exists = os.path.isfile(csv_file)
         # 增量追加数据
         # 如果表格不存在，或者里面没有数据，则写入表头
-        with open(csv_file, 'a', encoding='utf-8', newline='') as f:
-            writer = csv.writer(f)
-            if not file_exists or os.stat(csv_file).st_size == 0:
-                # 写入表头
-                writer.writerow(['article_id', 'question_id', 'answer_id', 'title', 'content', 'img_urls',
-                                 'publish_time', 'location', 'author_id', 'author_name',
-                                 'gender', 'vote_count', 'comment_count'])
-            # 写入数据
-            writer.writerow([
-                data.get('article_id', ''),
-                data.get('question_id', ''),
-                data.get('answer_id', ''),
-                data.get('title', ''),
-                data.get('content', ''),
-                data.get('img_urls', ''),
-                data.get('publish_time', ''),
-                data.get('location', ''),
-                data.get('author_id', ''),
-                data.get('author_name', ''),
-                data.get('gender', -1),
-                data.get('vote_count', 0),
-                data.get('comment_count', 0)
-            ])
+        writer = self.writers.get(csv_file)
+        if writer is None:
+            writer = BufferedCsvWriter(csv_file, ['article_id', 'question_id', 'answer_id', 'title', 'content', 'img_urls',
+                                                  'publish_time', 'location', 'author_id', 'author_name',
+                                                  'gender', 'vote_count', 'comment_count'],
+                                       append=is_append, max_rows=20,
+                                       stats_columns=['article_id', 'question_id', 'answer_id'],
+                                       timestamp_column='publish_time')
+            self.writers[csv_file] = writer
+        # 写入数据
+        writer.writerow([
+            data.get('article_id', ''),
+            data.get('question_id', ''),
+            data.get('answer_id', ''),
+            data.get('title', ''),
+            data.get('content', ''),
+            data.get('img_urls', ''),
+            data.get('publish_time', ''),
+            data.get('location', ''),
+            data.get('author_id', ''),
+            data.get('author_name', ''),
+            data.get('gender', -1),
+            data.get('vote_count', 0),
+            data.get('comment_count', 0)
+        ])
 
         print(f"数据已保存到 {csv_file}")
 
+    def close(self):
+        # 写出缓冲区并关闭所有输出文件
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
+
     def crawl_body_from_articles(self, url):
-        response = requests.get(url, headers=self.headers)
+        response = self.session.get(url)
         if response.status_code == 200:
             soup = BeautifulSoup(response.text, 'html.parser')
             # 处理内容中的图片链接
@@ -84,7 +92,7 @@ class Zhihu_BodyCrawler:
                     vote_count = article_info.get('voteupCount', 0)
                     comment_count = article_info.get('commentCount', 0)
                     if publish_time:
-                        publish_time = datetime.fromtimestamp(publish_time).strftime('%Y-%m-%d %H:%M:%S')
+                        publish_time = format_timestamp(publish_time)
                 except (KeyError, json.JSONDecodeError):
                     print("解析数据时发生错误，可能是页面结构变化或数据格式不正确")
                     title = '无标题'
@@ -115,7 +123,7 @@ class Zhihu_BodyCrawler:
             return None
 
     def crawl_body_from_answers(self, url):
-        response = requests.get(url, headers=self.headers)
+        response = self.session.get(url)
         if response.status_code == 200:
             soup = BeautifulSoup(response.text, 'html.parser')
             img_info = parse_page(response.text, url)
@@ -143,7 +151,7 @@ class Zhihu_BodyCrawler:
                     comment_count = author.get('commentCount', 0)
                     publish_time = author.get('createdTime', '无时间')
                     if publish_time:
-                        publish_time = datetime.fromtimestamp(publish_time).strftime('%Y-%m-%d %H:%M:%S')
+                        publish_time = format_timestamp(publish_time)
                 except (KeyError, json.JSONDecodeError):
                     pass
 
@@ -206,7 +214,8 @@ if __name__ == "__main__":
         if data:
             crawler.save_to_csv(data, csv_file='zhihu/zhihu_data.csv', is_append=True)
             print(f"第 {i + 1} 个URL处理完成\n")
-        # 爬完一个URL后，随机等待5到10秒
-        wait_time = random.randint(5, 10)
-        print(f"等待 {wait_time} 秒...")
-        time.sleep(wait_time)
+        # 爬完一个URL后，随机等待5到10秒（账号越多等待越短）
+        wait_time = crawler.pool.pause(random.randint(5, 10))
+        print(f"等待了 {wait_time:.1f} 秒")
+    crawler.close()
+    crawler.pool.print_stats()
@@ -1,40 +1,80 @@
-import requests
 import json
-from datetime import datetime
-import csv
 import time
 import os
+import sys
+from concurrent.futures import Future, ThreadPoolExecutor
+from bs4 import BeautifulSoup
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.time_utils import format_timestamp
+from common.account_pool import AccountPool
+from common.http_client import CrawlerSession
+from common.proxy_pool import load_proxy_pool
+from common.watermark import WatermarkStore, IncrementalCursor
+from common.change_probe import probe_changed_posts
+from common.buffered_writer import BufferedCsvWriter
+from common.pipeline import RateBudget
+from common.paginator import CursorPaginator
+from common.records import ZhihuComment
 
 
 class ZhiHu_CommentCrawler:
-    def __init__(self):
-        self.headers = self.get_headers()
+    def __init__(self, cookie_pattern='zhihu/zhihu_cookie*.json', strategy='round_robin',
+                 watermark_file='zhihu/zhihu_watermarks.json', child_workers=4, child_interval=2,
+                 root_interval=3, prefetch=3):
+        # 加载所有匹配的cookie文件，每次请求轮流使用
+        self.pool = AccountPool.from_glob(cookie_pattern, strategy=strategy, min_interval=1)
+        # 仓库根目录有 proxies.txt 时按账号分配代理
+        self.session = CrawlerSession(self.pool, proxy_pool=load_proxy_pool())
         self.comments_list = []
-
-    def get_headers(self, open_path='zhihu/zhihu_cookie_.json'):
-        with open(open_path, 'r', encoding='utf-8') as f:
-            headers = json.load(f)
-        return headers
+        # 每篇文章/回答上次爬到的最新评论，用于增量爬取
+        self.watermarks = WatermarkStore(watermark_file)
+        # 每个输出文件一个写入器，整个运行期间只打开一次
+        self.writers = {}
+        # 子评论在线程池中爬取，一级评论继续翻页；所有子评论线程共用一个请求节奏（账号越多间隔越短）
+        self.child_executor = ThreadPoolExecutor(max_workers=child_workers)
+        self.child_budget = RateBudget(min_interval=child_interval / len(self.pool))
+        # 一级评论翻页的请求节奏，以及offset可推算的问答接口同时预取的页数
+        self.root_budget = RateBudget(min_interval=root_interval / len(self.pool))
+        self.prefetch = prefetch
+        # 本次翻页停下的位置，评论保存到文件后才写入高水位记录，保证断点之前的评论都已落盘
+        self.cursors = {}
+        # 增量模式下成功翻完的帖子 -> (IncrementalCursor, 评论数)，同样在评论保存后才推进高水位
+        self.commits = {}
 
     def clean_comment_list(self):
         self.comments_list = []
 
     def save_comments_to_csv(self, filename='comments.csv', is_append=True):
-        mode = 'a' if is_append else 'w'
-        with open(filename, mode, newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['article_id', 'answer_id', 'question_id', 'comment_id', 'super_comment_id',
-                          'content', 'like_count', 'dislike_count', 'author', 'author_name', 'gender',
-                          'created_time', 'created_area',
-                          'child_comment_count', 'is_article']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            # 如果文件本身有内容，则不写入表头
-            if not is_append or os.stat(filename).st_size == 0:
-                writer.writeheader()
-            for comment in self.comments_list:
-                writer.writerow(comment)
+        # 第一次保存到某个文件时打开写入器（is_append为False时清空文件），之后一直追加，由close统一关闭
+        writer = self.writers.get(filename)
+        if writer is None:
+            writer = BufferedCsvWriter(filename, ZhihuComment._fields, append=is_append,
+                                       stats_columns=['comment_id', 'article_id', 'answer_id', 'question_id'],
+                                       timestamp_column='created_time')
+            self.writers[filename] = writer
+        self.merge_child_comments()
+        writer.writerows(self.comments_list)
+        writer.flush()
+        for key, cursor in self.cursors.items():
+            self.watermarks.update(key, cursor=cursor, save=False)
+        for key, (cursor, comments_count) in self.commits.items():
+            cursor.commit(self.watermarks, key, comments_count=comments_count, save=False)
+        if self.cursors or self.commits:
+            self.watermarks.save()
+            self.cursors = {}
+            self.commits = {}
         print(f'Comments saved to {filename}')
 
-    def change_url(self, url):
+    def close(self):
+        # 等待子评论线程结束，写出缓冲区并关闭所有输出文件
+        self.child_executor.shutdown(wait=True)
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
+
+    def change_url(self, url, incremental=False):
+        # incremental为True时使用按时间倒序的接口（order_by=ts），问答也改用comment_v5接口，返回格式与专栏相同
         # https://zhuanlan.zhihu.com/p/1891878484755871157
         # https://www.zhihu.com/question/1890393113299775650/answer/1890538177489515849
         # 有以上两种形式的url —— 知乎专栏和知乎问答
@@ -43,201 +83,291 @@ class ZhiHu_CommentCrawler:
         if 'zhuanlan.zhihu.com' in url:
             # 专栏文章
             article_id = url.split('/')[-1]
-            new_url = f'https://www.zhihu.com/api/v4/comment_v5/articles/{article_id}/root_comment?order_by=score&limit=20&offset='
+            order_by = 'ts' if incremental else 'score'
+            new_url = f'https://www.zhihu.com/api/v4/comment_v5/articles/{article_id}/root_comment?order_by={order_by}&limit=20&offset='
             return new_url, article_id, '', ''
         elif 'zhihu.com/question/' in url and 'answer' in url:
             # 问答文章
             question_id = url.split('/')[-3]
             answer_id = url.split('/')[-1]
-            new_url = f'https://www.zhihu.com/api/v4/answers/{answer_id}/root_comments?order=normal&limit=20&offset=0&status=open'
+            if incremental:
+                new_url = f'https://www.zhihu.com/api/v4/comment_v5/answers/{answer_id}/root_comment?order_by=ts&limit=20&offset='
+            else:
+                new_url = f'https://www.zhihu.com/api/v4/answers/{answer_id}/root_comments?order=normal&limit=20&offset=0&status=open'
             return new_url, '', question_id, answer_id
         else:
             print('URL格式不正确，请提供知乎专栏或问答的链接')
             return '', '', '', ''
 
-    def crawl_comments_from_articles(self, url, article_id=''):
-        finish = 0
-        url_ = url
-        while (finish < 2):
-            response = requests.get(url_, headers=self.headers)
-            if response.status_code == 200:
-                data = response.json()
-                # 先判断是否为起始页
-                if_start = data.get('paging', {}).get('is_start', False)
-                if_end = data.get('paging', {}).get('is_end', False)
-                url_ = data.get('paging', {}).get('next', '')
-                if if_start or if_end:
-                    finish += 1
-                    if finish >= 2:
-                        print("评论抽取完成")
-                        break
-                comments = data.get('data', [])
-                if data == []:
-                    print('This url has no more comments to fetch.')
-                    break
-                for comment in comments:
-                    comment_id = comment.get('id')
-                    content = comment.get('content')
-                    author = comment.get('author', {}).get('id')
-                    author_name = comment.get('author', {}).get('name')
-                    created_time = comment.get('created_time')
-                    created_area = comment.get('comment_tag', [])
-                    like_count = comment.get('like_count', 0)
-                    dislike_count = comment.get('dislike_count', 0)
-                    gender = comment.get('author', {}).get('gender', -1)
-                    if created_area:
-                        created_area = created_area[0].get('text', '未知')
-                    else:
-                        created_area = '未知'
-                    child_comment_count = comment.get('child_comment_count', 0)
-                    self.comments_list.append({
-                        'article_id': str(article_id),
-                        'answer_id': '',
-                        'question_id': '',
-                        'comment_id': str(comment_id),
-                        'super_comment_id': '',
-                        'content': content,
-                        'like_count': like_count,
-                        'dislike_count': dislike_count,
-                        'author': author,
-                        'author_name': author_name,
-                        'gender': gender,
-                        'created_time': created_time,
-                        'created_area': created_area,
-                        'child_comment_count': child_comment_count,
-                        'is_article': article_id != ''
-                    })
-                    # print(type(child_comment_count), child_comment_count)
-                    if child_comment_count > 0:
-                        child_url = f'https://www.zhihu.com/api/v4/comment_v5/comment/{comment_id}/child_comment?order_by=ts&limit=20&offset='
-                        self.crawl_child_comments(child_url, article_id, question_id='', answer_id='', super_comment_id=comment_id)
-            else:
-                print(f'Failed to fetch comments, status code: {response.status_code}')
-                break
-            # 等待，避免请求过快
-            print(f'Fetched {len(self.comments_list)} comments so far.')
-            print('等待3秒后继续爬取评论')
-            time.sleep(3)
+    def fetch_page(self, url):
+        # 翻页器使用的请求函数，失败时抛出异常，翻页器停在这一页
+        # 通过 get_json 请求，缺少 data 字段的响应记为空数据，连续出现时隔离账号
+        data = self.session.get_json(url, data_key='data')
+        if not isinstance(data, dict) or 'data' not in data:
+            raise RuntimeError(f'Failed to fetch comments: {data}')
+        return data
+
+    def paginate(self, url, key=None, prefetch=1):
+        """
+        创建一级评论的翻页器，上次没有翻完的帖子从记录的断点继续
+        :param url: 第一页的接口地址
+        :param key: 文章/回答ID，None表示不使用断点
+        :param prefetch: 同时请求的页数（只对offset可推算的接口生效）
+        :return: CursorPaginator
+        """
+        mark = self.watermarks.get(key) if key else None
+        if mark and mark.get('cursor'):
+            url = mark['cursor']
+            print(f'从上次中断的位置继续翻页: {url}')
+        return CursorPaginator(self.fetch_page, url, prefetch=prefetch, budget=self.root_budget)
+
+    def finish_paging(self, key, paginator):
+        # 翻完时清除断点，中途失败时记下停下的位置，在保存评论时一起写入
+        if key:
+            self.cursors[key] = paginator.cursor or ''
+        if paginator.cursor is None:
+            print("评论抽取完成")
 
-    def crawl_child_comments(self, url, article_id='', question_id='', answer_id='', super_comment_id=''):
-        finish = 0
-        url_ = url
-        while (finish < 2):
-            response = requests.get(url_, headers=self.headers)
-            if response.status_code == 200:
-                data = response.json()
-                # print(data)
-                # print(f'正在爬取子评论，当前url: {url_}')
-                # 先判断是否为起始页
-                if_start = data.get('paging', {}).get('is_start', False)
-                if_end = data.get('paging', {}).get('is_end', False)
-                url_ = data.get('paging', {}).get('next', '')
-                if if_end or if_start:
-                    finish += 1
-                    if finish >= 2:
-                        print("子评论抽取完成")
+    def crawl_comments_from_articles(self, url, article_id='', question_id='', answer_id='', cursor=None):
+        """
+        爬取comment_v5接口的一级评论（专栏文章，或增量模式下的问答），按paging.next一直翻到最后一页
+        :param cursor: IncrementalCursor，增量模式下遇到已经爬过的评论会停止翻页
+        :return: 翻页中途出错时返回异常，正常结束返回None
+        """
+        # 增量模式每次从最新的评论开始翻，不记录断点
+        key = (article_id or answer_id) if cursor is None else None
+        paginator = self.paginate(url, key)
+        for data in paginator:
+            comments = data.get('data', [])
+            for comment in comments:
+                comment_id = comment.get('id')
+                if cursor is not None and cursor.is_seen(comment_id, comment.get('created_time')):
+                    if cursor.should_stop:
                         break
-                comments = data.get('data', [])
-                if data == [] or comments == []:
-                    print('This url has no more comments to fetch.')
-                    break
-                for comment in comments:
-                    comment_id = comment.get('id')
-                    content = comment.get('content')
-                    author = comment.get('author', {}).get('id')
-                    author_name = comment.get('author', {}).get('name')
-                    created_time = comment.get('created_time')
-                    created_area = comment.get('comment_tag', [])
-                    like_count = comment.get('like_count', 0)
-                    dislike_count = comment.get('dislike_count', 0)
-                    gender = comment.get('author', {}).get('gender', -1)
-                    if created_area:
-                        created_area = created_area[0].get('text', '未知')
-                    else:
-                        created_area = '未知'
-                    child_comment_count = comment.get('child_comment_count', 0)
-                    self.comments_list.append({
-                        'article_id': str(article_id),
-                        'answer_id': str(answer_id),
-                        'question_id': str(question_id),
-                        'comment_id': str(comment_id),
-                        'super_comment_id': str(super_comment_id),
-                        'content': content,
-                        'like_count': like_count,
-                        'dislike_count': dislike_count,
-                        'author': author,
-                        'author_name': author_name,
-                        'gender': gender,
-                        'created_time': datetime.fromtimestamp(created_time).strftime('%Y-%m-%d %H:%M:%S'),
-                        'created_area': created_area,
-                        'child_comment_count': child_comment_count,
-                        'is_article': article_id != ''
-                    })
-            else:
-                print(f'Failed to fetch child comments, status code: {response.status_code}')
+                    continue
+                content = comment.get('content')
+                author = comment.get('author', {}).get('id')
+                author_name = comment.get('author', {}).get('name')
+                created_time = comment.get('created_time')
+                created_area = comment.get('comment_tag', [])
+                like_count = comment.get('like_count', 0)
+                dislike_count = comment.get('dislike_count', 0)
+                gender = comment.get('author', {}).get('gender', -1)
+                if created_area:
+                    created_area = created_area[0].get('text', '未知')
+                else:
+                    created_area = '未知'
+                child_comment_count = comment.get('child_comment_count', 0)
+                self.comments_list.append(ZhihuComment(
+                    article_id=str(article_id),
+                    answer_id=str(answer_id),
+                    question_id=str(question_id),
+                    comment_id=str(comment_id),
+                    super_comment_id='',
+                    content=content,
+                    like_count=like_count,
+                    dislike_count=dislike_count,
+                    author=author,
+                    author_name=author_name,
+                    gender=gender,
+                    created_time=created_time,
+                    created_area=created_area,
+                    child_comment_count=child_comment_count,
+                    is_article=article_id != ''
+                ))
+                # print(type(child_comment_count), child_comment_count)
+                if child_comment_count > 0:
+                    self.queue_child_comments(comment_id, article_id, question_id=question_id, answer_id=answer_id)
+            if cursor is not None and cursor.should_stop:
+                print(f"已到达上次爬取的位置，本次新增 {cursor.new_count} 条一级评论")
                 break
-            # 等待，避免请求过快
             print(f'Fetched {len(self.comments_list)} comments so far.')
-            print('等待2秒后继续爬取评论')
-            time.sleep(2)
+        self.finish_paging(key, paginator)
+        # 等待排队的子评论爬完，按一级评论的顺序合并
+        self.merge_child_comments()
+        return paginator.error
 
-    def crawl_comments_from_answers(self, url, question_id='', answer_id=''):
-        # 处理知乎问答的评论
-        finish = 0
-        url_ = url
-        while (finish < 10):
-            finish += 1
-            response = requests.get(url_, headers=self.headers)
-            if response.status_code == 200:
-                data = response.json()
-                url_ = data.get('paging', {}).get('next', '')
-                comments = data.get('data', [])
-                if data == [] or comments == []:
-                    print('This url has no more comments to fetch.')
-                    break
-                for comment in comments:
-                    comment_id = comment.get('id')
-                    content = comment.get('content')
-                    author = comment.get('author', {}).get('member', {}).get('id')
-                    author_name = comment.get('author', {}).get('member', {}).get('name')
-                    created_time = comment.get('created_time')
-                    created_area = comment.get('comment_tag', [])
-                    like_count = comment.get('vote_count', 0)
-                    dislike_count = comment.get('dislike_count', 0)
-                    gender = comment.get('author', {}).get('member', {}).get('gender', -1)
-                    created_area = comment.get('address_text', '未知')
-                    child_comment_count = comment.get('child_comment_count', 0)
-                    self.comments_list.append({
-                        'article_id': '',
-                        'answer_id': str(answer_id),
-                        'question_id': str(question_id),
-                        'comment_id': str(comment_id),
-                        'super_comment_id': '',
-                        'content': content,
-                        'like_count': like_count,
-                        'dislike_count': dislike_count,
-                        'author': author,
-                        'author_name': author_name,
-                        'gender': gender,
-                        'created_time': datetime.fromtimestamp(created_time).strftime('%Y-%m-%d %H:%M:%S'),
-                        'created_area': created_area,
-                        'child_comment_count': child_comment_count,
-                        'is_article': article_id != ''
-                    })
+    def queue_child_comments(self, comment_id, article_id='', question_id='', answer_id=''):
+        """
+        把一条一级评论的子评论交给线程池爬取，comments_list中先放一个占位，
+        merge_child_comments 时换成子评论，保证子评论紧跟在所属一级评论后面
+        """
+        child_url = f'https://www.zhihu.com/api/v4/comment_v5/comment/{comment_id}/child_comment?order_by=ts&limit=20&offset='
+        future = self.child_executor.submit(self.fetch_child_comments, child_url, article_id,
+                                            question_id=question_id, answer_id=answer_id,
+                                            super_comment_id=comment_id)
+        self.comments_list.append(future)
 
-                    # print(type(child_comment_count), child_comment_count)
-                    if child_comment_count > 0:
-                        child_url = f'https://www.zhihu.com/api/v4/comment_v5/comment/{comment_id}/child_comment?order_by=ts&limit=20&offset='
-                        self.crawl_child_comments(child_url, article_id='', question_id=question_id, answer_id=answer_id, super_comment_id=comment_id)
+    def fetch_child_comments(self, url, article_id='', question_id='', answer_id='', super_comment_id=''):
+        """
+        在线程池中运行的子评论爬取，出错时保留已经爬到的部分
+        """
+        comments = []
+        try:
+            self.crawl_child_comments(url, article_id, question_id, answer_id, super_comment_id, comments)
+        except Exception as e:
+            print(f'爬取评论 {super_comment_id} 的子评论时出错: {e}')
+        return comments
 
+    def merge_child_comments(self):
+        """
+        等待已提交的子评论爬取完成，按一级评论的顺序合并到comments_list
+        """
+        merged = []
+        for item in self.comments_list:
+            if isinstance(item, Future):
+                merged.extend(item.result())
             else:
-                print(f'Failed to fetch comments, status code: {response.status_code}')
-                break
-            # 等待，避免请求过快
-            print(f'Fetched {len(self.comments_list)} comments so far.')
-            print('等待3秒后继续爬取评论')
-            time.sleep(3)
+                merged.append(item)
+        self.comments_list = merged
+
+    def crawl_child_comments(self, url, article_id='', question_id='', answer_id='', super_comment_id='',
+                             comments_list=None):
+        """
+        :param comments_list: 子评论保存到的列表，默认为self.comments_list
+        """
+        if comments_list is None:
+            comments_list = self.comments_list
+        # 所有子评论线程共用一个请求节奏
+        paginator = CursorPaginator(self.fetch_page, url, budget=self.child_budget)
+        for data in paginator:
+            comments = data.get('data', [])
+            for comment in comments:
+                comment_id = comment.get('id')
+                content = comment.get('content')
+                author = comment.get('author', {}).get('id')
+                author_name = comment.get('author', {}).get('name')
+                created_time = comment.get('created_time')
+                created_area = comment.get('comment_tag', [])
+                like_count = comment.get('like_count', 0)
+                dislike_count = comment.get('dislike_count', 0)
+                gender = comment.get('author', {}).get('gender', -1)
+                if created_area:
+                    created_area = created_area[0].get('text', '未知')
+                else:
+                    created_area = '未知'
+                child_comment_count = comment.get('child_comment_count', 0)
+                comments_list.append(ZhihuComment(
+                    article_id=str(article_id),
+                    answer_id=str(answer_id),
+                    question_id=str(question_id),
+                    comment_id=str(comment_id),
+                    super_comment_id=str(super_comment_id),
+                    content=content,
+                    like_count=like_count,
+                    dislike_count=dislike_count,
+                    author=author,
+                    author_name=author_name,
+                    gender=gender,
+                    created_time=format_timestamp(created_time),
+                    created_area=created_area,
+                    child_comment_count=child_comment_count,
+                    is_article=article_id != ''
+                ))
+            print(f'Fetched {len(comments_list)} child comments of {super_comment_id} so far.')
+        if paginator.cursor is None:
+            print("子评论抽取完成")
+
+    def probe_comment_count(self, url):
+        """
+        从页面的 js-initialData 中读取专栏或问答当前的评论数（与crawl_body解析的commentCount相同）
+        :param url: 知乎专栏或问答链接
+        :return: 评论数，请求或解析失败时抛出异常
+        """
+        response = self.session.get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f'状态码 {response.status_code}')
+        full_info = BeautifulSoup(response.text, 'html.parser').find('script', id='js-initialData')
+        if not full_info:
+            raise RuntimeError('页面中没有 js-initialData')
+        entities = json.loads(full_info.string)['initialState']['entities']
+        _, article_id, _, answer_id = self.change_url(url)
+        if article_id:
+            return entities['articles'][article_id]['commentCount']
+        return entities['answers'][answer_id]['commentCount']
+
+    def probe_changed(self, urls, max_workers=8):
+        """
+        并发探测一批链接的评论数，只返回评论数比上次增长了的链接
+        :param urls: 知乎专栏或问答链接列表
+        :param max_workers: 并发线程数
+        :return: PriorityScheduler，元素为 (url, 当前评论数)，按评论增量从大到小出队
+        """
+        def get_key(url):
+            _, article_id, _, answer_id = self.change_url(url)
+            return article_id or answer_id
 
+        urls = [url for url in urls if get_key(url)]
+        return probe_changed_posts(urls, get_key, self.probe_comment_count, self.watermarks,
+                                   max_workers=max_workers)
+
+    def crawl_incremental(self, url, comments_count=None):
+        """
+        增量爬取一个专栏或问答链接：按时间倒序翻页，只保留上次之后的新评论；
+        翻页成功结束时，在评论保存到文件后（save_comments_to_csv）更新高水位，中途出错时不更新
+        :param url: 知乎专栏或问答链接
+        :param comments_count: 探测到的当前评论数，爬取完成后记入高水位
+        :return: 本次新增的一级评论数
+        """
+        new_url, article_id, question_id, answer_id = self.change_url(url, incremental=True)
+        if not new_url:
+            return 0
+        key = article_id or answer_id
+        cursor = IncrementalCursor(self.watermarks.get(key))
+        error = self.crawl_comments_from_articles(new_url, article_id, question_id, answer_id, cursor=cursor)
+        if error is not None:
+            # 出错位置和上次高水位之间的评论还没有爬到，高水位保持不变，下次重新爬取
+            print(f'翻页出错，不更新高水位: {error}')
+            return cursor.new_count
+        self.commits[key] = (cursor, comments_count)
+        return cursor.new_count
+
+    def crawl_comments_from_answers(self, url, question_id='', answer_id=''):
+        """
+        爬取v4 root_comments接口的问答一级评论，offset可以推算，同时预取prefetch页
+        :return: 翻页中途出错时返回异常，正常结束返回None
+        """
+        paginator = self.paginate(url, answer_id, prefetch=self.prefetch)
+        for data in paginator:
+            comments = data.get('data', [])
+            for comment in comments:
+                comment_id = comment.get('id')
+                content = comment.get('content')
+                author = comment.get('author', {}).get('member', {}).get('id')
+                author_name = comment.get('author', {}).get('member', {}).get('name')
+                created_time = comment.get('created_time')
+                created_area = comment.get('comment_tag', [])
+                like_count = comment.get('vote_count', 0)
+                dislike_count = comment.get('dislike_count', 0)
+                gender = comment.get('author', {}).get('member', {}).get('gender', -1)
+                created_area = comment.get('address_text', '未知')
+                child_comment_count = comment.get('child_comment_count', 0)
+                self.comments_list.append(ZhihuComment(
+                    article_id='',
+                    answer_id=str(answer_id),
+                    question_id=str(question_id),
+                    comment_id=str(comment_id),
+                    super_comment_id='',
+                    content=content,
+                    like_count=like_count,
+                    dislike_count=dislike_count,
+                    author=author,
+                    author_name=author_name,
+                    gender=gender,
+                    created_time=format_timestamp(created_time),
+                    created_area=created_area,
+                    child_comment_count=child_comment_count,
+                    is_article=False
+                ))
+
+                # print(type(child_comment_count), child_comment_count)
+                if child_comment_count > 0:
+                    self.queue_child_comments(comment_id, article_id='', question_id=question_id, answer_id=answer_id)
+            print(f'Fetched {len(self.comments_list)} comments so far.')
+        self.finish_paging(answer_id, paginator)
+        # 等待排队的子评论爬完，按一级评论的顺序合并
+        self.merge_child_comments()
+        return paginator.error
 
 if __name__ == "__main__":
     crawler = ZhiHu_CommentCrawler()
@@ -252,10 +382,18 @@ if __name__ == "__main__":
     # crawler.crawl_comments_from_answers(new_url, question_id, answer_id)
     # crawler.save_comments_to_csv('zhihu/comments_test.csv', is_append=True)
 
+    # 每天刷新已跟踪的话题时设为True，只爬上次之后的新评论
+    incremental = False
+
     # 读取url
     with open('zhihu/filtered_urls.txt', 'r', encoding='utf-8') as f:
         urls = f.readlines()
     urls = [url.strip() for url in urls if url.strip()]  # 去除空行
+    counts = {}
+    if incremental:
+        # 先并发探测评论数，评论数没有增长的链接直接跳过，增长多的先爬
+        counts = dict(item for item, score in crawler.probe_changed(urls).drain())
+        urls = list(counts)
     for i in range(len(urls)):
         url = urls[i]
         print(f'正在处理第 {i + 1} 个 URL:')
@@ -263,7 +401,9 @@ if __name__ == "__main__":
             new_url, article_id, question_id, answer_id = crawler.change_url(url)
             print(f'Processing URL: {url}')
             # crawler.crawl_comments_from_articles(new_url, article_id, question_id, answer_id)
-            if article_id != '':
+            if incremental:
+                crawler.crawl_incremental(url, comments_count=counts.get(url))
+            elif article_id != '':
                 crawler.crawl_comments_from_articles(new_url, article_id)
             elif question_id != '' and answer_id != '':
                 crawler.crawl_comments_from_answers(new_url, question_id, answer_id)
@@ -276,3 +416,5 @@ if __name__ == "__main__":
             time.sleep(5)
         except Exception as e:
             print(f'Error processing URL {url}: {e}')
+    crawler.close()
+    crawler.pool.print_stats()
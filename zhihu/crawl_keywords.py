@@ -6,6 +6,7 @@ import time
 import json
 import random
 import os
+import sys
 from datetime import datetime
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -16,6 +17,9 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from selenium.webdriver.common.action_chains import ActionChains
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.json_utils import dump_json
+
 
 class ZhihuSearchCrawler:
     def __init__(self, driver_path='D:\Anaconda\envs\crawl\msedgedriver.exe', headless=False, output_dir="zhihu_results"):
@@ -281,11 +285,10 @@ class ZhihuSearchCrawler:
             print(f"解析文章卡片时出错: {e}")
             return None
 
-    def _save_data(self, data, filename):
-        """保存数据到文件"""
+    def _save_data(self, data, filename, pretty=False):
+        """保存数据到文件，pretty为True时缩进美化输出"""
         filepath = os.path.join(self.output_dir, filename)
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        dump_json(data, filepath, pretty=pretty)
         print(f"数据已保存到 {filepath}")
 
     def get_article_content(self, article_url):
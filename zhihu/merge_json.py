@@ -1,53 +1,53 @@
-import json
 import os
+import sys
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.json_utils import load_json
+from common.frontier import UrlFrontier
 
-def merge_json_files(directory, output_file="zhihu/zhihu_urls.txt", incremental=True):
-    # 读取指定目录下的JSON文件
-    json_files = [f for f in os.listdir(directory) if f.endswith('.json')]
-    print(f"找到 {len(json_files)} 个JSON文件")
-    all_data = []
-    # 读取json文件内容——json里面是一个列表，列表中是字典
-    # 从字典中提取url
-    for json_file in json_files:
-        file_path = os.path.join(directory, json_file)
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+
+def merge_json_files(directory, output_file="zhihu/zhihu_urls.txt", incremental=True, frontier_db=None):
+    # 去重记录：规范化URL后判断，默认与输出文件同名（后缀为.frontier.db）
+    frontier_db = frontier_db or os.path.splitext(output_file)[0] + '.frontier.db'
+    with UrlFrontier(frontier_db) as frontier:
+        if incremental and len(frontier) == 0:
+            # 第一次使用去重记录时，导入现有的输出文件
+            frontier.seed_from_file(output_file)
+        print(f"现有输出文件中已有 {len(frontier) if incremental else 0} 条数据")
+
+        # 读取指定目录下的JSON文件
+        json_files = [f for f in os.listdir(directory) if f.endswith('.json')]
+        print(f"找到 {len(json_files)} 个JSON文件")
+        urls = []
+        # 读取json文件内容——json里面是一个列表，列表中是字典
+        # 从字典中提取url
+        for json_file in json_files:
+            file_path = os.path.join(directory, json_file)
+            try:
+                data = load_json(file_path)
                 if isinstance(data, list):
-                    urls = [item['url'] for item in data if 'url' in item]
-                    all_data.extend(urls)
+                    urls.extend(item['url'] for item in data if 'url' in item)
                 else:
                     print(f"文件 {json_file} 格式不正确，跳过")
-        except Exception as e:
-            print(f"读取文件 {json_file} 时出错: {e}")
-    # 去重
-    unique_data = list(set(all_data))
-    print(f"合并后的数据量: {len(unique_data)}")
-    
-    # 写入到输出文件
-    # 先读取现有的输出文件（如果存在）
-    if incremental and os.path.exists(output_file):
-        try:
-            with open(output_file, 'r', encoding='utf-8') as existing_file:
-                existing_data = existing_file.read().splitlines()
-                existing_set = set(existing_data)
-                unique_data = list(set(unique_data) - existing_set)
-                print(f"现有输出文件中已有 {len(existing_set)} 条数据")
-                print(f"将新增 {len(unique_data)} 条数据写入输出文件")
-        except Exception as e:
-            print(f"读取现有输出文件时出错: {e}")
-            existing_set = set()
+            except Exception as e:
+                print(f"读取文件 {json_file} 时出错: {e}")
+        # 去重（不记录），写入输出文件成功后再记录
+        new_urls = frontier.filter_new(urls, ignore_existing=not incremental)
+        print(f"将新增 {len(new_urls)} 条数据写入输出文件")
 
-    # 增量更新：将新数据追加到现有文件
-    try:
-        with open(output_file, 'a', encoding='utf-8') as out_file:
-            for url in unique_data:
-                if url not in existing_set:  # 确保不重复写入
+        # 增量更新：将新数据追加到现有文件，否则覆盖
+        try:
+            with open(output_file, 'a' if incremental else 'w', encoding='utf-8') as out_file:
+                for url in new_urls:
                     out_file.write(url + '\n')
-        print(f"数据已写入 {output_file}")
-    except Exception as e:
-        print(f"写入输出文件时出错: {e}")
+            print(f"数据已写入 {output_file}")
+        except Exception as e:
+            # 没有写入的URL不记录，下次运行时仍会被当作新URL
+            print(f"写入输出文件时出错: {e}")
+            return
+        if not incremental:
+            frontier.clear()
+        frontier.add_many(new_urls)
 
 if __name__ == "__main__":
     # 设置要合并的目录
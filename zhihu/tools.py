@@ -3,49 +3,45 @@ import os
 import json
 import csv
 import re
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.csv_bytes import append_csv_bytes, truncate_csv_bytes
+from common.stats_index import get_stats
 
 
 # 计算comments_full.csv中总共有多少条评论
+# 读取旁边的统计索引（.stats.json），文件有新增内容时只统计新增的部分
 def count_comments_in_csv(csv_file):
     if not os.path.exists(csv_file):
         print(f"文件 {csv_file} 不存在")
         return 0
 
-    df = pd.read_csv(csv_file, encoding="utf-8-sig")
-    total_comments = len(df)
+    total_comments = get_stats(csv_file).rows
     # print(df.head())  # 打印前几行数据以检查格式
     print(f"CSV文件 {csv_file} 包含 {total_comments} 条评论")
     return total_comments
 
 
 # 计算comments_full.csv中有多少article_id，多少answer_id
+# 不同ID的个数由统计索引中的HyperLogLog估计（误差约1.6%），不需要读取整个文件
 def count_ids_in_csv(csv_file):
     if not os.path.exists(csv_file):
         print(f"文件 {csv_file} 不存在")
         return 0, 0, 0
 
-    # df = pd.read_csv(csv_file, encoding="utf-8-sig")
-    # 有的整数太大了，显示不出来，改成字符串读取
-    df = pd.read_csv(csv_file, encoding="utf-8-sig", dtype={'article_id': str, 'answer_id': str, 'question_id': str})
-
-    # 计算不同的article_id
-    article_ids = df['article_id'].dropna().unique()
-    total_article_ids = len(article_ids)
-
-    # 计算不同的answer_id
-    answer_ids = df['answer_id'].dropna().unique()
-    total_answer_ids = len(answer_ids)
-
-    # 计算不同的question_id
-    question_ids = df['question_id'].dropna().unique()
-    total_question_ids = len(question_ids)
+    stats = get_stats(csv_file, ['article_id', 'answer_id', 'question_id'])
+    total_article_ids = stats.distinct('article_id')
+    total_answer_ids = stats.distinct('answer_id')
+    total_question_ids = stats.distinct('question_id')
 
-    print(f"CSV文件 {csv_file} 包含 {total_article_ids} 个不同的文章ID，{total_answer_ids} 个不同的回答ID，{total_question_ids} 个不同的问题ID")
+    print(f"CSV文件 {csv_file} 包含约 {total_article_ids} 个不同的文章ID，{total_answer_ids} 个不同的回答ID，{total_question_ids} 个不同的问题ID")
 
-    return article_ids, answer_ids, question_ids
+    return total_article_ids, total_answer_ids, total_question_ids
 
 
 # 把一个csv文件的内容并到另一个csv文件中（追加模式: 两个文件的列名必须一致）
+# 只比较表头，数据行按字节直接拷贝，不经过pandas解析
 def append_csv(source_file, target_file):
     if not os.path.exists(source_file):
         print(f"源文件 {source_file} 不存在")
@@ -53,32 +49,25 @@ def append_csv(source_file, target_file):
 
     if not os.path.exists(target_file):
         print(f"目标文件 {target_file} 不存在，创建新文件")
-        with open(target_file, 'w', encoding='utf-8-sig') as f:
-            pass  # 创建空文件
 
     try:
-        source_df = pd.read_csv(source_file, encoding="utf-8-sig",
-                                dtype={'article_id': str, 'answer_id': str, 'question_id': str, 'comment_id': str, 'super_comment_id': str})
-        source_df.to_csv(target_file, mode='a', header=False, index=False, encoding='utf-8-sig')
-        print(f"已将 {source_file} 的内容追加到 {target_file}")
+        appended = append_csv_bytes(source_file, target_file)
+        print(f"已将 {source_file} 的内容追加到 {target_file}（{appended} 字节）")
     except Exception as e:
         print(f"追加CSV时出错: {e}")
 
 
 # 截取csv文件的前n行，删除后面的行
+# 按字节找到第n行的结尾（引号内的换行不算），直接截断文件
 def truncate_csv(file_path, n):
     if not os.path.exists(file_path):
         print(f"文件 {file_path} 不存在")
         return
 
     try:
-        df = pd.read_csv(file_path, encoding="utf-8-sig",
-                         dtype={'article_id': str, 'answer_id': str, 'question_id': str, 'comment_id': str, 'super_comment_id': str})
-        if len(df) <= n:
+        if truncate_csv_bytes(file_path, n) is None:
             print(f"文件 {file_path} 的行数少于或等于 {n}，无需截取")
             return
-        truncated_df = df.head(n)
-        truncated_df.to_csv(file_path, index=False, encoding='utf-8-sig')
         print(f"已将 {file_path} 截取前 {n} 行")
     except Exception as e:
         print(f"截取CSV时出错: {e}")